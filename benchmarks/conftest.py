@@ -0,0 +1,119 @@
+import glob
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from data_ingest import prices
+from data_ingest.prices import PriceCache
+from data_ingest.sectors import ETF_MAP
+from data_ingest.synthetic import generate_universe, write_universe
+from db.bulk_loader import SCHEMA
+from db.migrate import create_schema, migrate
+from overlay.features import sector_columns
+from overlay.neutral import SECTOR_ETFS, sector_codes
+
+# Universe sizes; larger ones take minutes per pass (50000 also needs
+# several GB of RAM), so they are opt-in: BENCH_SCALES=500,5000,50000
+SCALES = [int(n) for n in os.environ.get("BENCH_SCALES", "500").split(",")]
+DAYS = int(os.environ.get("BENCH_DAYS", "252"))
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "3"))
+# Postgres DSN with db/schema.sql and `python -m db.migrate` applied to the
+# quant schema; unset starts a throwaway cluster if initdb is installed
+DSN = os.environ.get("BENCH_DSN")
+
+
+@pytest.fixture(scope="session", params=SCALES, ids=lambda n: f"{n}_tickers")
+def universe(request):
+    return generate_universe(request.param, DAYS)
+
+
+# The universe as files, laid out like data/
+@pytest.fixture(scope="session")
+def universe_dir(universe, tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp(f"universe_{len(universe.tickers)}")
+    return write_universe(universe, out_dir)
+
+
+# Random returns/betas for the universe's stocks plus the sector ETFs,
+# with the per-day sector columns (ref) and codes from sector_codes()
+@pytest.fixture(scope="session")
+def overlay_inputs(universe):
+    tickers = universe.tickers + SECTOR_ETFS
+    sectors = [ETF_MAP[universe.sectors[t]] for t in universe.tickers]
+    rng = np.random.default_rng(0)
+    shape = (len(universe.dates), len(tickers))
+    sector_col = sector_columns(tickers, sectors + [""] * len(SECTOR_ETFS))
+    ref, code = sector_codes(tickers, np.broadcast_to(sector_col, shape))
+    return {
+        "returns": rng.normal(0.0, 0.02, shape).astype(np.float32),
+        "beta": rng.normal(1.0, 0.3, shape).astype(np.float32),
+        "ref": ref,
+        "code": code,
+    }
+
+
+# Fixed-round timing; whole-universe passes are too slow to calibrate
+@pytest.fixture
+def run(benchmark):
+    def run(func, *args, **kwargs):
+        return benchmark.pedantic(
+            func, args, kwargs, rounds=ROUNDS, iterations=1
+        )
+    return run
+
+
+# Measure the CSV parse unless a benchmark passes its own PriceCache
+@pytest.fixture(autouse=True)
+def no_price_cache(monkeypatch):
+    monkeypatch.setattr(
+        prices, "CACHE", PriceCache(max_bytes=0, cache_dir=None)
+    )
+
+
+# Directory holding initdb/pg_ctl: PATH, then Debian's versioned dirs
+def postgres_bin():
+    initdb = shutil.which("initdb")
+    if initdb:
+        return Path(initdb).parent
+    dirs = sorted(glob.glob("/usr/lib/postgresql/*/bin/initdb"))
+    return Path(dirs[-1]).parent if dirs else None
+
+
+# Postgres for the db benchmarks: BENCH_DSN as given, or a cluster in a
+# temp dir (Unix socket only) with the schema created and migrated
+@pytest.fixture(scope="session")
+def dsn(tmp_path_factory):
+    if DSN:
+        yield DSN
+        return
+    bin_dir = postgres_bin()
+    if bin_dir is None:
+        pytest.skip("BENCH_DSN not set and initdb not found")
+    if os.geteuid() == 0:
+        pytest.skip("BENCH_DSN not set and initdb refuses to run as root")
+
+    root = tmp_path_factory.mktemp("postgres")
+    data_dir = root / "data"
+    subprocess.run(
+        [bin_dir / "initdb", "-D", data_dir, "-U", "postgres",
+         "-A", "trust", "--no-sync"],
+        check=True, capture_output=True,
+    )
+    pg_ctl = [bin_dir / "pg_ctl", "-D", data_dir]
+    subprocess.run(
+        pg_ctl + ["-l", root / "log", "-w", "start",
+                  "-o", f"-k {root} -c listen_addresses='' -F"],
+        check=True, capture_output=True,
+    )
+    try:
+        url = f"host={root} dbname=postgres user=postgres"
+        create_schema(url, SCHEMA)
+        migrate(url, SCHEMA)
+        yield url
+    finally:
+        subprocess.run(pg_ctl + ["-m", "immediate", "stop"],
+                       capture_output=True)
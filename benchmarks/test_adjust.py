@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from data_ingest.adjust import adjust_arrays, adjust_frames, extend_adjusted
+from data_ingest.backfill import COLUMNS
+
+
+# Factors and adjusted OHLCV for the whole universe in one block
+def test_adjust_arrays(run, universe):
+    frames = universe.stock_data()
+    fields = {
+        name: pd.DataFrame({t: df[name] for t, df in frames.items()})
+        .reindex(universe.dates).to_numpy(np.float64)
+        for name in COLUMNS
+    }
+    out = run(adjust_arrays, fields)
+    assert out["adjClose"].shape == fields["close"].shape
+
+
+# Per-ticker frames scattered into one block and back
+def test_adjust_frames(run, universe):
+    out = run(adjust_frames, universe.prices)
+    assert len(out) == len(universe.prices)
+
+
+def event_frame(dates, close, div, split, volume):
+    return pd.DataFrame({
+        "date": pd.to_datetime(dates), "close": close, "high": close,
+        "low": close, "open": close, "volume": volume, "divCash": div,
+        "splitFactor": split,
+    })
+
+
+# A 2:1 split on the third bar and a dividend on the last, priced off the
+# previous close: 1 - 1.04 / 52 = 0.98. Earlier bars take 0.98 / 2.
+DATES = ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05",
+         "2024-01-08"]
+SPLIT_DIV = event_frame(
+    DATES, [100.0, 102.0, 51.0, 52.0, 50.0], [0, 0, 0, 0, 1.04],
+    [1, 1, 2, 1, 1], [1000, 1000, 2000, 2000, 2000],
+)
+
+
+def test_split_and_dividend():
+    # B misses the bar before its dividend; the last traded close (51)
+    # prices it instead: 1 - 1.02 / 51 = 0.98
+    gap = event_frame(
+        [DATES[i] for i in (0, 1, 2, 4)], [100.0, 102.0, 51.0, 50.0],
+        [0, 0, 0, 1.02], [1, 1, 2, 1], [1000, 1000, 2000, 2000],
+    )
+    out = adjust_frames({"A": SPLIT_DIV, "B": gap})
+    np.testing.assert_allclose(
+        out["A"]["adjClose"], [49.0, 49.98, 49.98, 50.96, 50.0]
+    )
+    np.testing.assert_allclose(out["A"]["adjVolume"], [2000.0] * 5)
+    np.testing.assert_allclose(
+        out["B"]["adjClose"], [49.0, 49.98, 49.98, 50.0]
+    )
+
+
+# Appending the dividend bars to stored history adjusted without them
+# gives the same values as adjusting everything at once
+def test_extend_adjusted():
+    stored = adjust_frames({"A": SPLIT_DIV.iloc[:3]})["A"]
+    history, new = extend_adjusted(stored, SPLIT_DIV.iloc[3:])
+    full = adjust_frames({"A": SPLIT_DIV})["A"]
+    np.testing.assert_allclose(
+        pd.concat([history, new])["adjClose"], full["adjClose"]
+    )
+    np.testing.assert_allclose(
+        pd.concat([history, new])["adjVolume"], full["adjVolume"]
+    )
@@ -0,0 +1,36 @@
+import pytest
+
+from data_ingest import prices
+from data_ingest.backfill import (
+    backfill_composite, load_constituents, load_holdings
+)
+
+
+@pytest.fixture(scope="session")
+def stock_data(universe):
+    return universe.stock_data()
+
+
+# Composite OHLCV of all 11 sector ETFs from their holdings
+def test_sector_composites(run, universe, universe_dir, stock_data):
+    holdings = {
+        etf: load_holdings(
+            universe_dir / "holdings" / f"index_holdings_{etf.lower()}.csv"
+        )
+        for etf in universe.holdings
+    }
+    run(lambda: {
+        etf: backfill_composite(stock_data, weights, universe.dates)
+        for etf, weights in holdings.items()
+    })
+
+
+# Reading every constituent CSV once, shared across ETFs
+def test_load_constituents(run, universe, universe_dir, monkeypatch):
+    monkeypatch.setattr(
+        prices, "TIINGO_DIR", universe_dir / "tiingo" / "ohlcv"
+    )
+    run(
+        load_constituents, universe.prices,
+        universe.dates[0], universe.dates[-1]
+    )
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pytest
+
+from overlay.backtest import (
+    GRID as DEFAULT_GRID, default_grid, expand_grid, residual_signal,
+    run_config, simulate, sweep, target_weights
+)
+
+WORKERS = [1, os.cpu_count() or 1]
+GRID = {"lookback": [1, 5, 21], "sign": [-1, 1], "limit": [0.02, 0.05],
+        "rebalance": [1, 5]}
+
+
+# Random residuals/returns for the universe's stocks plus the sector
+# ETFs; a tenth of the stocks join the universe halfway through
+@pytest.fixture(scope="module")
+def inputs(universe, overlay_inputs):
+    code = overlay_inputs["code"]
+    tradable = code >= 0
+    tradable[:len(code) // 2, :len(universe.tickers) // 10] = False
+    residual = np.random.default_rng(1).normal(0.0, 0.01, code.shape)
+    residual[code < 0] = np.nan
+    return {
+        "residual": residual,
+        "returns": overlay_inputs["returns"].astype(np.float64),
+        "code": code,
+        "tradable": tradable,
+    }
+
+
+# Day-by-day reference for simulate()
+def loop_simulate(weights, returns, tradable, rebalance, cost_bps):
+    held = np.zeros(weights.shape[1])
+    pnl, turnover = [], []
+    for t in range(len(weights)):
+        gross = held @ returns[t]
+        target = weights[t - t % rebalance]
+        target = np.where(tradable[t] & np.isfinite(target), target, 0.0)
+        traded = np.abs(target - held).sum()
+        held = target
+        pnl.append(gross - traded * cost_bps / 1e4)
+        turnover.append(traded)
+    return np.array(pnl), np.array(turnover)
+
+
+# Positions, caps, costs and P&L for one configuration, whole arrays
+def test_run_config(run, inputs):
+    params = {"lookback": 5, "sign": -1, "limit": 0.02, "rebalance": 5}
+    pnl, turnover = run(run_config, inputs, params)
+
+    weights = target_weights(
+        residual_signal(inputs, 5, -1), inputs["tradable"], inputs["code"],
+        0.02,
+    )
+    expected = loop_simulate(
+        weights, inputs["returns"], inputs["tradable"], 5, 5.0
+    )
+    np.testing.assert_allclose(pnl, expected[0], atol=1e-12)
+    np.testing.assert_allclose(turnover, expected[1], atol=1e-12)
+    np.testing.assert_allclose(
+        simulate(weights, inputs["returns"], inputs["tradable"], 5)[0], pnl
+    )
+
+
+# The whole grid, serially vs spread over a process pool
+@pytest.mark.parametrize("workers", sorted(set(WORKERS)))
+def test_sweep(run, inputs, workers):
+    configs = expand_grid(GRID)
+    pnl, _ = run(sweep, inputs, configs, workers=workers)
+    assert pnl.shape == (len(configs), len(inputs["returns"]))
+
+
+# A custom signal only gets the default grid keys it accepts
+def test_default_grid(inputs):
+    def momentum(inputs, window=21):
+        return residual_signal(inputs, window, 1)
+
+    grid = default_grid(momentum)
+    assert set(grid) == {"limit", "rebalance"}
+    assert default_grid(residual_signal) == DEFAULT_GRID
+    params = expand_grid({**grid, "window": [5]})[0]
+    pnl, _ = run_config(inputs, params, momentum)
+    assert len(pnl) == len(inputs["returns"])
@@ -0,0 +1,55 @@
+import psycopg2
+from psycopg2 import sql
+
+from db.bulk_loader import build_jobs, load_all, prepare_ohlcv
+from db.migrate import create_schema, migrate
+
+# Scratch schema for the row-count check
+SCHEMA = "load_check"
+
+
+# CSV -> COPY-ready frames, the client-side half of the upload
+def test_prepare_ohlcv(run, universe_dir):
+    files = sorted((universe_dir / "tiingo" / "ohlcv").glob("*.csv"))
+    run(lambda: [prepare_ohlcv(f, "ohlcv_tiingo") for f in files])
+
+
+# Full COPY + upsert of the synthetic universe
+def test_load_all(run, dsn, universe_dir):
+    run(load_all, dsn, universe_dir, workers=4)
+
+
+# Every prepared row lands once per table, and a reload adds nothing
+def test_load_matches_files(dsn, universe_dir):
+    expected = {}
+    for table, files, prepare in build_jobs(universe_dir):
+        rows = sum(len(prepare(f, table)) for f in files)
+        expected[table] = expected.get(table, 0) + rows
+
+    conn = psycopg2.connect(dsn)
+    drop = sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(
+        sql.Identifier(SCHEMA)
+    )
+    try:
+        with conn.cursor() as cur:
+            cur.execute(drop)
+        conn.commit()
+        create_schema(dsn, SCHEMA)
+        migrate(dsn, SCHEMA)
+        for _ in range(2):
+            load_all(dsn, universe_dir, SCHEMA, universe_file=None)
+            with conn.cursor() as cur:
+                for table, rows in expected.items():
+                    cur.execute(
+                        sql.SQL("SELECT count(*) FROM {}").format(
+                            sql.Identifier(SCHEMA, table)
+                        )
+                    )
+                    assert cur.fetchone()[0] == rows, table
+            conn.commit()
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(drop)
+        conn.commit()
+        conn.close()
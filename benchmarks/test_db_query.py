@@ -0,0 +1,74 @@
+import shutil
+
+import pandas as pd
+import psycopg2
+import pytest
+
+from data_ingest.sectors import ETF_MAP
+from db.bulk_loader import load_all, refresh_sector_members
+from db.query import get_prices, sector_prices
+
+
+# The universe loaded into the database, with a membership file and one
+# stand-in price file per sector ETF (a member's bars under the ETF name)
+@pytest.fixture(scope="module")
+def loaded(dsn, universe, universe_dir, tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("db_query")
+    shutil.copytree(universe_dir / "tiingo", data_dir / "tiingo")
+    ohlcv_dir = data_dir / "tiingo" / "ohlcv"
+
+    etfs = {t: ETF_MAP[universe.sectors[t]] for t in universe.tickers}
+    for etf in ETF_MAP.values():
+        member = next((t for t, e in etfs.items() if e == etf), None)
+        if member is not None:
+            df = universe.prices[member]
+            df.to_csv(ohlcv_dir / f"{etf}.csv", index=False)
+
+    dates = universe.dates.strftime("%Y-%m-%d")
+    universe_file = data_dir / "final_tickers_dates_sectors.csv"
+    pd.DataFrame({
+        "Ticker": [t.replace(".", "-") for t in universe.tickers],
+        "StartDate": dates[0],
+        "EndDate": dates[-1],
+        "SectorETF": list(etfs.values()),
+    }).to_csv(universe_file, index=False)
+
+    load_all(dsn, data_dir, universe_file=universe_file, sector_file=None)
+    conn = psycopg2.connect(dsn)
+    yield conn, universe.dates
+    conn.close()
+
+
+def last_month(dates):
+    return str(dates[-21].date()), str(dates[-1].date())
+
+
+# Sector ETF + members from the summary table
+def test_sector_summary(run, loaded):
+    conn, dates = loaded
+    start, end = last_month(dates)
+    run(sector_prices, conn, "XLK", start, end)
+
+
+# The same result joined from the price tables at query time
+def test_sector_join(run, loaded):
+    conn, dates = loaded
+    start, end = last_month(dates)
+    expected = sector_prices(conn, "XLK", start, end)
+    result = run(sector_prices, conn, "XLK", start, end, use_summary=False)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+# All tickers over one month: partition pruning + date-leading index
+def test_date_range(run, loaded):
+    conn, dates = loaded
+    start, end = last_month(dates)
+    run(get_prices, conn, None, start, end)
+
+
+# Refresh after a load that touched the last month only, then everything
+@pytest.mark.parametrize("days", [21, None], ids=["incremental", "full"])
+def test_refresh(run, loaded, days):
+    conn, dates = loaded
+    since = None if days is None else dates[-days].date()
+    run(refresh_sector_members, conn, since)
@@ -0,0 +1,133 @@
+from datetime import date
+
+import pandas as pd
+import psycopg2
+import pytest
+from psycopg2 import sql
+
+from db.bulk_loader import OHLCV_COLUMNS, copy_upsert, ensure_partitions
+from db.migrate import MIGRATION_DIR, create_schema, migrate
+
+# Scratch schema, recreated from db/schema.sql for each test
+SCHEMA = "schema_check"
+
+
+@pytest.fixture
+def conn(dsn):
+    drop = sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(
+        sql.Identifier(SCHEMA)
+    )
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cur:
+        cur.execute(drop)
+    conn.commit()
+    create_schema(dsn, SCHEMA)
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(drop)
+    conn.commit()
+    conn.close()
+
+
+def fetch(conn, query, args=()):
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(query).format(schema=sql.Identifier(SCHEMA)), args
+        )
+        return cur.fetchall()
+
+
+# (ticker, date, close, adjclose, partition) per stored bar
+def stored(conn, table):
+    return fetch(
+        conn,
+        "SELECT k.ticker, p.date, p.close, p.adjclose, "
+        "p.tableoid::regclass::text "
+        f"FROM {{schema}}.{table} p JOIN {{schema}}.tickers k "
+        "USING (ticker_id) ORDER BY 1, 2",
+    )
+
+
+def bars(ticker, days, close):
+    df = pd.DataFrame(0.0, index=range(len(days)), columns=OHLCV_COLUMNS)
+    df["date"] = pd.to_datetime(days).date
+    df["close"] = df["adjclose"] = close
+    df["volume"] = df["adjvolume"] = 0
+    df.insert(0, "ticker", ticker)
+    return df
+
+
+# Legacy TEXT-keyed rows move into the yearly partitions under their
+# ticker codes; a second run applies nothing
+def test_migration(dsn, conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                "INSERT INTO {0}.ohlcv_tiingo (Ticker, Date, Close, AdjClose) "
+                "VALUES ('AAA', '2019-12-31', 10, 9.5), "
+                "('AAA', '2020-01-02', 11, 10.5), "
+                "('BBB', '2020-06-01', 20, 20); "
+                "INSERT INTO {0}.sector_etf_prices "
+                "(ETF, Date, Close, AdjClose) "
+                "VALUES ('XLK', '2020-01-02', 100, 99)"
+            ).format(sql.Identifier(SCHEMA))
+        )
+    conn.commit()
+
+    names = [path.name for path in sorted(MIGRATION_DIR.glob("*.sql"))]
+    assert migrate(dsn, SCHEMA) == names
+    assert migrate(dsn, SCHEMA) == []
+
+    part = f"{SCHEMA}.ohlcv_tiingo"
+    assert stored(conn, "ohlcv_tiingo") == [
+        ("AAA", date(2019, 12, 31), 10.0, 9.5, f"{part}_2019"),
+        ("AAA", date(2020, 1, 2), 11.0, 10.5, f"{part}_2020"),
+        ("BBB", date(2020, 6, 1), 20.0, 20.0, f"{part}_2020"),
+    ]
+    assert stored(conn, "sector_etf_prices") == [
+        ("XLK", date(2020, 1, 2), 100.0, 99.0,
+         f"{SCHEMA}.sector_etf_prices_2020"),
+    ]
+    # Yearly partitions from the first legacy year through next year
+    (count,), = fetch(
+        conn,
+        "SELECT count(*) FROM pg_inherits WHERE inhparent = %s::regclass",
+        [part],
+    )
+    assert count == date.today().year + 1 - 2019 + 1
+
+
+# COPY -> staging -> INSERT ON CONFLICT: new partitions on demand, the
+# earliest inserted or changed date back, unchanged rows left alone, and
+# the last row winning when a key repeats in a batch
+def test_copy_upsert(dsn, conn):
+    migrate(dsn, SCHEMA)
+    days = ["2019-12-30", "2019-12-31", "2020-01-02", "2020-01-03"]
+    ensure_partitions(
+        conn, "ohlcv_tiingo", date(2019, 12, 30), date(2020, 1, 3), SCHEMA
+    )
+
+    first = bars("AAA", days, [1.0, 2.0, 3.0, 4.0])
+    assert copy_upsert(conn, "ohlcv_tiingo", [first], SCHEMA) == (
+        4, date(2019, 12, 30)
+    )
+    assert copy_upsert(conn, "ohlcv_tiingo", [first], SCHEMA) == (4, None)
+
+    frames = [
+        bars("AAA", days[2:], [3.0, 5.0]),
+        bars("AAA", days[3:], [6.0]),
+        bars("BBB", days[3:], [7.0]),
+    ]
+    assert copy_upsert(conn, "ohlcv_tiingo", frames, SCHEMA) == (
+        4, date(2020, 1, 3)
+    )
+
+    part = f"{SCHEMA}.ohlcv_tiingo"
+    assert stored(conn, "ohlcv_tiingo") == [
+        ("AAA", date(2019, 12, 30), 1.0, 1.0, f"{part}_2019"),
+        ("AAA", date(2019, 12, 31), 2.0, 2.0, f"{part}_2019"),
+        ("AAA", date(2020, 1, 2), 3.0, 3.0, f"{part}_2020"),
+        ("AAA", date(2020, 1, 3), 6.0, 6.0, f"{part}_2020"),
+        ("BBB", date(2020, 1, 3), 7.0, 7.0, f"{part}_2020"),
+    ]
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingest.panel import BENCHMARK, Panel, to_day_numbers
+from data_ingest.sectors import ETF_MAP
+from overlay.features import update_features
+
+FEATURES = ["returns", "vol", "beta_sector", "beta_spy", "sector_corr"]
+APPENDED = 5
+
+
+# The universe's stocks plus random-walk sector ETFs and benchmark, as a
+# panel of adjClose
+@pytest.fixture(scope="module")
+def panel(universe):
+    close = pd.DataFrame({
+        t: df["adjClose"] for t, df in universe.stock_data().items()
+    }).reindex(universe.dates)
+    etfs = list(ETF_MAP.values()) + [BENCHMARK]
+    rng = np.random.default_rng(0)
+    walks = 100 * np.exp(np.cumsum(
+        rng.normal(0.0, 0.01, (len(close), len(etfs))), axis=0
+    ))
+    prices = np.hstack([close.to_numpy(), walks]).astype(np.float32)
+    tickers = list(close.columns) + etfs
+    sectors = [ETF_MAP[universe.sectors[t]] for t in close.columns]
+    return Panel(
+        to_day_numbers(universe.dates), tickers,
+        sectors + [""] * len(etfs), {"adjClose": prices},
+        np.isfinite(prices),
+    )
+
+
+# The panel with the last `n` days not loaded yet
+def without_last(panel, n):
+    prices = panel["adjClose"].copy()
+    prices[-n:] = np.nan
+    return Panel(panel.dates, panel.tickers, panel.sectors,
+                 {"adjClose": prices}, panel.mask)
+
+
+# Appending bars to stored features matches building from scratch
+def test_update_matches_full(run, panel):
+    old, _ = update_features(without_last(panel, APPENDED))
+    updated, added = run(update_features, panel, old)
+    full, _ = update_features(panel)
+
+    assert added == APPENDED
+    assert len(updated.dates) == len(full.dates) == len(panel.dates)
+    for name in FEATURES:
+        np.testing.assert_allclose(
+            updated[name], full[name], rtol=1e-4, atol=1e-6, err_msg=name
+        )
+    assert np.array_equal(updated["sector_col"], full["sector_col"])
@@ -0,0 +1,27 @@
+import json
+import re
+
+from data_ingest import instrument
+
+
+# RSS growth is charged to the span that raised the peak, not to a later
+# one, and profiles are stamped like the report instead of overwritten
+def test_span_report(tmp_path, monkeypatch):
+    peaks = iter([100.0, 100.0, 150.0, 150.0, 150.0, 150.0])
+    monkeypatch.setattr(instrument, "peak_rss_mb", lambda: next(peaks))
+    monkeypatch.setattr(instrument, "REPORT_DIR", tmp_path)
+    monkeypatch.setattr(instrument, "_spans", [])
+    with instrument.span("stage", profile=True):
+        with instrument.span("alloc"):
+            pass
+        with instrument.span("idle"):
+            pass
+
+    report = instrument.write_report("run", tmp_path)
+    spans = {s["name"]: s for s in json.loads(report.read_text())["spans"]}
+    growth = {name: s["rss_growth_mb"] for name, s in spans.items()}
+    assert growth == {"alloc": 50.0, "idle": 0.0, "stage": 50.0}
+    assert spans["idle"]["process_peak_rss_mb"] == 150.0
+    profiles = [f.name for f in tmp_path.glob("*.prof")]
+    assert len(profiles) == 1
+    assert re.fullmatch(r"stage_\d{8}T\d{6}\.prof", profiles[0])
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingest.macro import CURVES, FIELDS, MacroStore
+from data_ingest.panel import to_day_numbers
+
+
+# Seven daily series on their own calendars around the universe's days
+@pytest.fixture(scope="module")
+def frames(universe):
+    rng = np.random.default_rng(0)
+    days = pd.date_range(universe.dates[0], universe.dates[-1], freq="D")
+    frames = {}
+    for label in ["DXY", "VIX", "OIL", "GOLD", "10Y", "5Y", "3M"]:
+        index = days[rng.random(len(days)) < 0.7]
+        frames[label] = pd.DataFrame(
+            rng.normal(2.0, 0.3, (len(index), len(FIELDS))),
+            index=index, columns=FIELDS,
+        ).astype(np.float32)
+    return frames
+
+
+@pytest.fixture(scope="module")
+def store(frames):
+    store = MacroStore.empty()
+    store.update(frames)
+    return store
+
+
+# As-of join of every series and curve onto the trading days
+def test_as_of(run, universe, store):
+    days = to_day_numbers(universe.dates)
+    out = run(store.as_of, days, max_stale=10 ** 6)
+    assert len(out["slope_10y_3m"]) == len(days)
+
+
+# Strictly-before joins match pandas' merge_asof with the same staleness
+# tolerance, series by series and for the curve slopes
+@pytest.mark.parametrize("allow_exact", [True, False])
+def test_as_of_matches_merge_asof(universe, frames, store, allow_exact):
+    days = to_day_numbers(universe.dates)
+    out = store.as_of(days, allow_exact=allow_exact, max_stale=3)
+    target = pd.DataFrame({"date": universe.dates})
+
+    expected = {}
+    for label, df in frames.items():
+        joined = pd.merge_asof(
+            target, df["close"].rename(label).rename_axis("date")
+            .reset_index(), on="date", allow_exact_matches=allow_exact,
+            tolerance=pd.Timedelta(days=3),
+        )
+        expected[label] = joined[label].to_numpy()
+        np.testing.assert_array_equal(out[label], expected[label])
+    for name, (long_leg, short_leg) in CURVES.items():
+        np.testing.assert_allclose(
+            out[name], expected[long_leg] - expected[short_leg], rtol=1e-6
+        )
+
+
+# Values on each day never depend on bars after it (or on it, with
+# allow_exact=False): a store built from the history up to a cut-off
+# gives the same answers through that day
+def test_no_look_ahead(universe, frames, store):
+    days = to_day_numbers(universe.dates)
+    cut = universe.dates[len(universe.dates) // 2]
+    past = MacroStore.empty()
+    past.update({label: df[df.index < cut] for label, df in frames.items()})
+
+    before = days[days <= to_day_numbers([cut])[0]]
+    full = store.as_of(before, allow_exact=False)
+    truncated = past.as_of(before, allow_exact=False)
+    for name, values in full.items():
+        np.testing.assert_array_equal(values, truncated[name], err_msg=name)
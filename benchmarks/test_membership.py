@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from data_ingest.sp500.membership import MembershipIndex, build_intervals
+
+# BBB leaves, AAA joins, CCC leaves and comes back; DDD never changes
+CHANGES = pd.DataFrame({
+    "Date": pd.to_datetime(
+        ["2020-02-03", "2019-05-01", "2018-06-01", "2018-01-10"]
+    ),
+    "AddTicker": ["CCC", None, None, "AAA"],
+    "RemoveTicker": [None, "BBB", "CCC", None],
+})
+CURRENT = pd.DataFrame({
+    "Symbol": ["AAA", "CCC", "DDD"],
+    "Date added": ["2018-01-10", "2020-02-03", "2010-01-04"],
+})
+
+
+def from_frames(changes, current):
+    df = build_intervals(changes, current)
+    return MembershipIndex(
+        df["Ticker"].to_numpy(str), df["Start"].to_numpy(),
+        df["End"].to_numpy(),
+    )
+
+
+# Starts are inclusive, ends exclusive, around every kind of change
+def test_point_in_time():
+    index = from_frames(CHANGES, CURRENT)
+    member = index.is_member
+    assert not member("AAA", "2018-01-09") and member("AAA", "2018-01-10")
+    assert member("BBB", "2019-04-30") and not member("BBB", "2019-05-01")
+    assert member("CCC", "2018-05-31") and not member("CCC", "2018-06-01")
+    assert not member("CCC", "2020-02-02") and member("CCC", "2020-02-03")
+    assert member("DDD", "2012-06-01") and not member("DDD", "2009-12-31")
+    assert not member("ZZZ", "2020-01-01")
+
+    assert index.universe_on("2019-01-02") == ["AAA", "BBB", "DDD"]
+    assert index.universe_on("2025-01-02") == ["AAA", "CCC", "DDD"]
+    assert len(index.intervals("CCC")) == 2
+    assert index.intervals("AAA")[0][1] is None
+    assert index.members_between("2019-06-01", "2020-01-31") == [
+        "AAA", "DDD"
+    ]
+
+
+# Members on `day`: today's list with every later change undone
+def replay(changes, current, day):
+    members = set(current["Symbol"])
+    for _, row in changes[changes["Date"] > day].iterrows():
+        if isinstance(row["AddTicker"], str):
+            members.discard(row["AddTicker"])
+        if isinstance(row["RemoveTicker"], str):
+            members.add(row["RemoveTicker"])
+    return sorted(members)
+
+
+# The index and its mask against the naive replay on the synthetic
+# change file
+def test_matches_replay(run, universe_dir):
+    sp500_dir = universe_dir / "sp500"
+    index = run(
+        MembershipIndex.from_csv, sp500_dir / "sp500_changes_parsed.csv",
+        sp500_dir / "sp500_current_constituents.csv",
+    )
+    changes = pd.read_csv(
+        sp500_dir / "sp500_changes_parsed.csv", parse_dates=["Date"]
+    )
+    current = pd.read_csv(sp500_dir / "sp500_current_constituents.csv")
+    # Each change day and the day before, for up to 50 change days
+    dates = pd.DatetimeIndex(sorted(set(changes["Date"])))
+    dates = dates[::max(1, len(dates) // 50)]
+    dates = dates.union(dates - pd.Timedelta(days=1))
+
+    mask = index.mask(dates)
+    for i, day in enumerate(dates):
+        expected = replay(changes, current, day)
+        assert index.universe_on(day) == expected
+        assert index.symbols[mask[i]].tolist() == expected
+    assert np.isin(current["Symbol"], index.universe_on(dates[-1])).all()
@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+
+from overlay.neutral import (
+    SECTOR_LIMIT, cap_sectors, compute_overlay, overlay_rows
+)
+
+# Two workers even on one CPU, so the shared-memory path always runs
+WORKERS = [1, 2, os.cpu_count() or 1]
+
+
+# Serial pass vs one date block per worker through shared memory
+@pytest.mark.parametrize("workers", sorted(set(WORKERS)))
+def test_compute_overlay(run, overlay_inputs, workers):
+    returns, beta, ref, code = (
+        overlay_inputs[k] for k in ("returns", "beta", "ref", "code")
+    )
+    block_rows = -(-len(returns) // workers)
+    out = run(compute_overlay, returns, beta, ref, code,
+              workers=workers, block_rows=block_rows)
+    assert np.isfinite(out["zscore"][1:][code[1:] >= 0]).all()
+
+    expected = overlay_rows(returns, beta, ref, code, 0, len(returns))
+    for name, values in expected.items():
+        np.testing.assert_allclose(out[name], values, rtol=1e-12)
+
+    # Net weight per (day, sector) after the cap, as saved
+    exposure = cap_sectors(out["weight"].copy(), code)
+    assert (np.abs(exposure) <= SECTOR_LIMIT + 1e-12).all()
+    np.testing.assert_allclose(out["exposure"], exposure, atol=1e-12)
+
+
+# Sector nets of +-0.5 are shifted back to +-0.05 and the returned
+# exposure is the applied one
+def test_cap_sectors():
+    weight = np.array([[0.3, 0.2, -0.1, -0.4, np.nan]])
+    code = np.array([[0, 0, 1, 1, -1]])
+    exposure = cap_sectors(weight, code, 0.05)
+    np.testing.assert_allclose(
+        weight, [[0.075, -0.025, 0.125, -0.175, np.nan]]
+    )
+    expected = np.zeros_like(exposure)
+    expected[0, :2] = [0.05, -0.05]
+    np.testing.assert_allclose(exposure, expected, atol=1e-12)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from data_ingest.panel import build_panel, load_universe, nyse_days
+from data_ingest.price_store import read_prices, store_ticker, write_ticker
+
+
+# Dotted symbols and ETFs find their store partitions (BRK.B -> BRK-B)
+def test_build_panel_tickers(universe, tmp_path):
+    frames = list(universe.prices.values())
+    store_dir = tmp_path / "store"
+    for j, ticker in enumerate(["BRK.B", "AAPL", "XLF", "SPY"]):
+        write_ticker(store_ticker(ticker), frames[j], store_dir)
+
+    dates = universe.dates.strftime("%Y-%m-%d")
+    universe_file = tmp_path / "universe.csv"
+    pd.DataFrame({
+        "Ticker": ["BRK.B", "AAPL"],
+        "StartDate": dates[0],
+        "EndDate": dates[-1],
+        "SectorETF": "XLF",
+    }).to_csv(universe_file, index=False)
+
+    members = load_universe(universe_file)
+    days = nyse_days(dates[0], dates[-1])
+    prices = read_prices(
+        tickers=members["Ticker"].map(store_ticker), store_dir=store_dir
+    )
+    panel = build_panel(members, prices, days)
+    counts = np.isfinite(panel["adjClose"]).sum(axis=0)
+    assert panel.tickers == ["BRK.B", "AAPL", "XLF", "SPY"]
+    assert (counts > 0).all()
@@ -0,0 +1,47 @@
+import datetime
+
+from data_ingest.pipeline import STAGES, Hasher, Stage, code_files
+
+
+# A stage module importing a helper, laid out like the repo
+def write_stage(root):
+    pkg = root / "data_ingest"
+    pkg.mkdir()
+    (pkg / "helper.py").write_text("SCALE = 1\n")
+    (pkg / "step.py").write_text(
+        "from data_ingest.helper import SCALE\n"
+        "from data_ingest import other\n"
+    )
+    (pkg / "other.py").write_text("import numpy\n")
+    return Stage("step", "data_ingest.step", inputs=[], outputs=[])
+
+
+# Editing a module the stage only imports makes the stage stale
+def test_helper_edit_changes_fingerprint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stage = write_stage(tmp_path)
+    before = Hasher({}).stage(stage)
+    assert Hasher({}).stage(stage) == before
+
+    (tmp_path / "data_ingest" / "helper.py").write_text("SCALE = 2\n")
+    assert Hasher({}).stage(stage) != before
+
+
+# Daily stages go stale on a new day with unchanged files
+def test_daily_stage_expires(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    stage = write_stage(tmp_path)
+    stage.daily = True
+    day = datetime.date(2025, 1, 2)
+    same_day = Hasher({}, day).stage(stage)
+    assert Hasher({}, day).stage(stage) == same_day
+    assert Hasher({}, day + datetime.timedelta(1)).stage(stage) != same_day
+
+
+# Every stage's fingerprint covers its helpers, e.g. the XLC backfill
+def test_stage_code_files(run):
+    files = run(lambda: {s.name: code_files(s.module) for s in STAGES})
+    assert "data_ingest/backfill.py" in map(str, files["xlc_backfill"])
+    assert "data_ingest/adjust.py" in map(
+        str, files["yfinance_stock_loader"]
+    )
@@ -0,0 +1,83 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingest.price_store import (
+    COLUMNS, add_backfills, convert_csv_dirs, find_backfills, read_prices,
+    read_snapshot, write_snapshot
+)
+from data_ingest.prices import parse_ohlcv
+
+
+# The universe's CSVs as hive partitions plus the Arrow snapshot
+@pytest.fixture(scope="module")
+def store(universe_dir, tmp_path_factory):
+    root = tmp_path_factory.mktemp("price_store")
+    store_dir = root / "ohlcv"
+    snapshot = root / "ohlcv_universe.arrow"
+    convert_csv_dirs([universe_dir / "tiingo" / "ohlcv"], store_dir)
+    write_snapshot(store_dir, snapshot)
+    return store_dir, snapshot
+
+
+# Source CSV rows of `tickers` on [start, end], long and sorted
+def expected_rows(universe_dir, tickers, start, end):
+    parts = []
+    for ticker in tickers:
+        df = parse_ohlcv(universe_dir / "tiingo" / "ohlcv" / f"{ticker}.csv")
+        df = df.loc[start:end, COLUMNS[1:]].reset_index()
+        parts.append(df.assign(ticker=ticker))
+    return pd.concat(parts, ignore_index=True)
+
+
+def sort_rows(df):
+    df = df.assign(ticker=df["ticker"].astype(str))
+    return df.sort_values(["ticker", "date"], ignore_index=True)
+
+
+# Filtered reads from the partitions and the snapshot match the CSVs
+@pytest.mark.parametrize("source", ["partitions", "snapshot"])
+def test_round_trip(run, universe_dir, store, source):
+    store_dir, snapshot = store
+    files = sorted((universe_dir / "tiingo" / "ohlcv").glob("*.csv"))
+    tickers = [f.stem for f in files[::7]]
+    start, end = "2017-03-01", "2017-06-30"
+
+    if source == "partitions":
+        got = run(read_prices, tickers, None, start, end, store_dir)
+    else:
+        got = run(read_snapshot, tickers, None, start, end, snapshot,
+                  as_pandas=True)
+    got = sort_rows(got)
+    expected = sort_rows(expected_rows(universe_dir, tickers, start, end))
+
+    assert set(got["ticker"]) == set(expected["ticker"])
+    assert (got["date"].to_numpy("datetime64[D]")
+            == expected["date"].to_numpy("datetime64[D]")).all()
+    for col in COLUMNS[1:]:
+        np.testing.assert_allclose(
+            got[col].to_numpy(np.float64, na_value=np.nan),
+            expected[col].to_numpy(np.float64),
+            rtol=1e-6, err_msg=col,
+        )
+
+
+# Every <ETF>_merged.csv in the backfill directories is spliced, not
+# just XLC's
+def test_add_backfills(universe_dir, tmp_path):
+    files = sorted((universe_dir / "tiingo" / "ohlcv").glob("*.csv"))
+    dirs = [tmp_path / "data_ingest", tmp_path / "ohlcv_backfilled"]
+    for d, src, etf in zip(dirs, files, ["ZZA", "ZZB"]):
+        d.mkdir()
+        shutil.copy(src, d / f"{etf}_merged.csv")
+        shutil.copy(src, d / f"{etf}_backfilled_raw.csv")
+
+    found = find_backfills(dirs)
+    assert [f.name for f in found] == ["ZZA_merged.csv", "ZZB_merged.csv"]
+    store_dir = tmp_path / "ohlcv"
+    assert add_backfills(found, store_dir) == 2
+    got = read_prices(["ZZA", "ZZB"], ["close"], store_dir=store_dir)
+    for src, etf in zip(files, ["ZZA", "ZZB"]):
+        assert (got["ticker"] == etf).sum() == len(parse_ohlcv(src))
@@ -0,0 +1,24 @@
+from data_ingest.prices import PriceCache, load_file
+
+
+def ohlcv_files(universe_dir):
+    return sorted((universe_dir / "tiingo" / "ohlcv").glob("*.csv"))
+
+
+# Parquet copies written by a warm-up pass, read instead of the CSVs
+def test_disk_cache(run, universe_dir, tmp_path):
+    cache = PriceCache(max_bytes=0, cache_dir=tmp_path)
+    files = ohlcv_files(universe_dir)
+    for f in files:
+        load_file(f, cache=cache)
+    run(lambda: [load_file(f, cache=cache) for f in files])
+    assert cache.stats["parses"] == len(files)
+    assert cache.stats["disk_hits"] >= len(files)
+
+
+# Repeat loads within one run come from the in-memory LRU
+def test_memory_cache(run, universe_dir):
+    cache = PriceCache(max_bytes=2 * 1024 ** 3, cache_dir=None)
+    files = ohlcv_files(universe_dir)
+    run(lambda: [load_file(f, cache=cache) for f in files])
+    assert cache.stats["parses"] == len(files)
@@ -0,0 +1,140 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingest.panel import BENCHMARK, to_day_numbers
+from overlay import rolling
+from overlay.features import MIN_OBS, WINDOW, FeatureSet
+from overlay.rolling import RollingEngine
+
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "3"))
+
+
+# (days x tickers) log returns, each ticker paired with a random other one
+@pytest.fixture(scope="module")
+def pairs(universe):
+    close = pd.DataFrame({
+        t: df["adjClose"] for t, df in universe.stock_data().items()
+    })
+    x = np.log(close / close.shift()).to_numpy()
+    rng = np.random.default_rng(0)
+    y = x[:, rng.permutation(x.shape[1])]
+    return list(close.columns), x, y
+
+
+# Full recompute of the last bar's beta over the whole history
+def pandas_beta(x, y):
+    ok = np.isfinite(x) & np.isfinite(y)
+    x = pd.DataFrame(np.where(ok, x, np.nan))
+    y = pd.DataFrame(np.where(ok, y, np.nan))
+    cov = x.rolling(WINDOW, min_periods=MIN_OBS).cov(y)
+    var = y.rolling(WINDOW, min_periods=MIN_OBS).var()
+    return (cov / var).iloc[-1].to_numpy()
+
+
+# One new bar through an engine seeded with the rest; each round gets a
+# fresh copy (untimed) since update() advances the state
+def test_engine_update(benchmark, pairs):
+    tickers, x, y = pairs
+    seeded = RollingEngine.seed(tickers, x[:-1], y[:-1])
+    engines = []
+
+    def setup():
+        engines.append(copy.deepcopy(seeded))
+        return (engines[-1],), {}
+
+    benchmark.pedantic(
+        lambda engine: engine.update(x[-1], y[-1]),
+        setup=setup, rounds=ROUNDS,
+    )
+    np.testing.assert_allclose(
+        engines[-1].beta(), pandas_beta(x, y), rtol=1e-9, atol=1e-12
+    )
+
+
+def test_pandas_recompute(run, pairs):
+    _, x, y = pairs
+    run(pandas_beta, x, y)
+
+
+# Mean, variance, covariance and beta after every bar, including the
+# evictions once the window is full, against pandas over the same pairs
+def test_engine_moments():
+    window, min_obs = 10, 5
+    rng = np.random.default_rng(1)
+    x = rng.normal(0.0, 0.02, (40, 3))
+    y = rng.normal(0.0, 0.01, (40, 3))
+    x[rng.random(x.shape) < 0.1] = np.nan
+    y[rng.random(y.shape) < 0.1] = np.nan
+
+    ok = np.isfinite(x) & np.isfinite(y)
+    px = pd.DataFrame(np.where(ok, x, np.nan)).rolling(window, min_obs)
+    py = pd.DataFrame(np.where(ok, y, np.nan))
+    expected = {
+        "mean": px.mean(),
+        "var": px.var(),
+        "cov": px.cov(py),
+        "beta": px.cov(py) / py.rolling(window, min_obs).var(),
+    }
+
+    engine = RollingEngine(["A", "B", "C"], window, min_obs)
+    for t in range(len(x)):
+        engine.update(x[t], y[t])
+        for name, frame in expected.items():
+            np.testing.assert_allclose(
+                getattr(engine, name)(), frame.iloc[t].to_numpy(),
+                rtol=1e-9, atol=1e-12, err_msg=f"{name} at bar {t}",
+            )
+        np.testing.assert_allclose(
+            engine.std(), np.sqrt(expected["var"].iloc[t].to_numpy()),
+            rtol=1e-9,
+        )
+
+
+# Saved state is reused while the features are unchanged and reseeded
+# once a rebuilt store revises the bars it holds
+def test_state_tracks_features(universe, tmp_path):
+    tickers = universe.tickers[:20] + [BENCHMARK]
+    rng = np.random.default_rng(2)
+    shape = (len(universe.dates), len(tickers))
+    returns = rng.normal(0.0, 0.01, shape).astype(np.float32)
+    dates = to_day_numbers(universe.dates)
+
+    # No sector ETFs, so every ticker is paired with the benchmark
+    def features(returns, n):
+        return FeatureSet(dates[:n], tickers, [], {
+            "returns": returns[:n],
+            "sector_col": np.full((n, len(tickers)), -1, np.int32),
+        })
+
+    def save(returns, n):
+        features(returns, n).save(tmp_path / "features")
+
+    def advance():
+        rolling.main([
+            "--features", str(tmp_path / "features"),
+            "--state", str(tmp_path / "state.npz"),
+            "--out", str(tmp_path / "latest.csv"),
+        ])
+        return RollingEngine.load(tmp_path / "state.npz")
+
+    def seeded(returns):
+        x, y = rolling.sector_pairs(features(returns, len(dates)))
+        return RollingEngine.seed(tickers, x, y, dates)
+
+    save(returns, len(dates) - 3)
+    advance()
+    save(returns, len(dates))
+    engine = advance()
+    assert engine.bars == WINDOW + 3
+    np.testing.assert_allclose(engine.beta(), seeded(returns).beta())
+
+    revised = returns.copy()
+    revised[-WINDOW // 2:] *= 2
+    save(revised, len(dates))
+    engine = advance()
+    assert engine.bars == WINDOW
+    np.testing.assert_allclose(engine.beta(), seeded(revised).beta())
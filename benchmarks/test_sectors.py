@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingest.sectors import (
+    REMOVED_FILE, SectorTable, build_table, sector_matrix
+)
+from data_ingest.tickers_dates_sectors import VALID_RESULTS, map_sectors
+
+
+@pytest.fixture(scope="module")
+def table(universe):
+    as_of = np.datetime64(universe.dates[-1].date(), "D")
+    return SectorTable(build_table(universe.current, as_of))
+
+
+# Ticker windows mapped to sector ETFs through the interval index
+def test_map_sectors(run, universe, table):
+    base = pd.DataFrame({
+        "Ticker": universe.tickers,
+        "StartDate": universe.dates[0].date(),
+        "EndDate": universe.dates[-1].date(),
+    })
+    base.loc[::10, "EndDate"] = None
+    final = run(map_sectors, base, table)
+    assert len(final) == len(universe.tickers)
+
+    # Rows without an EndDate still get the current members' sector
+    current = set(universe.current["Symbol"])
+    blank = base["EndDate"].isna() & base["Ticker"].isin(current)
+    assert (final.loc[blank, "SectorETF"] != "").all()
+
+
+# Every (day, ticker) cell of a panel-sized grid
+def test_sector_matrix(run, universe, table):
+    days = universe.dates.values.astype("datetime64[D]").astype(np.int64)
+    fallback = [""] * len(universe.tickers)
+    etf = run(sector_matrix, table, universe.tickers, days, fallback)
+    assert etf.shape == (len(days), len(universe.tickers))
+
+
+# Every shipped removed constituent gets its sector at removal, and the
+# GICS moves still apply before it
+def test_removed_sectors(universe):
+    removed = pd.read_csv(REMOVED_FILE)
+    as_of = np.datetime64(universe.dates[-1].date(), "D")
+    table = SectorTable(build_table(universe.current, as_of, removed=removed))
+
+    base = pd.read_csv(VALID_RESULTS)
+    base = base[base["Ticker"].isin(removed["Symbol"])]
+    final = map_sectors(base, table)
+    assert len(final) == len(removed)
+    assert (final["SectorETF"] != "").all()
+
+    days = np.array(["2018-06-14", "2023-03-17", "2024-06-28"],
+                    dtype="datetime64[D]")
+    assert list(table.etf(["TWX", "CDAY", "CDAY"], days)) == [
+        "XLY", "XLK", "XLI"
+    ]
@@ -0,0 +1,29 @@
+from data_ingest.sp500.parse_sp500_changes import parse_lines, to_long
+
+# A dated row, rows sharing its date with no date cell and an empty one,
+# a row without a Reason and one with no ticker at all
+LINES = [
+    "June 22, 2020\tBIO\tBio-Rad\tADS\tAlliance Data\tMarket cap[4]",
+    "TMUS\tT-Mobile US\tHRB\tH&R Block\tMarket cap",
+    "\tTYL\tTyler Technologies\tHOG\tHarley-Davidson\tMarket cap",
+    "2020-09-21\tETSY\tEtsy\tHP\tHelmerich & Payne",
+    "\t\tAcme\t\tAcme Holdings",
+]
+
+
+def test_parse_lines():
+    wide, rejects = parse_lines(LINES)
+    assert list(wide["AddTicker"]) == ["BIO", "TMUS", "TYL", "ETSY"]
+    assert list(wide["Date"].dt.strftime("%Y-%m-%d")) == [
+        "2020-06-22", "2020-06-22", "2020-06-22", "2020-09-21"
+    ]
+    assert list(wide["Reason"]) == ["Market cap"] * 3 + [""]
+    assert list(rejects["Line"]) == [5]
+
+
+# Many repeats of the sample, parsed and reshaped
+def test_parse_many(run):
+    lines = LINES[:4] * 5000
+    long = run(lambda: to_long(parse_lines(lines)[0]))
+    assert len(long) == 2 * len(lines)
+    assert long["Date"].notna().all()
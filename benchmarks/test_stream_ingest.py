@@ -0,0 +1,42 @@
+import pytest
+
+from data_ingest import stream_ingest
+from data_ingest.price_store import read_prices
+from data_ingest.stream_ingest import StoreSink, ingest
+
+
+def ohlcv_files(universe_dir):
+    return sorted((universe_dir / "tiingo" / "ohlcv").glob("*.csv"))
+
+
+# Every file streamed into a fresh store, a few chunks per file
+def test_store_sink(run, universe_dir, tmp_path):
+    files = ohlcv_files(universe_dir)[:50]
+    store_dir = tmp_path / "store"
+    stats = run(ingest, files, StoreSink(store_dir), 100)
+    assert stats["rows"] > 0
+    assert read_prices(store_dir=store_dir)["ticker"].nunique() == len(files)
+
+
+# A chunk failing midway leaves the ticker's old partition untouched
+def test_failed_chunk_keeps_partition(universe_dir, tmp_path, monkeypatch):
+    file_path = ohlcv_files(universe_dir)[0]
+    store_dir = tmp_path / "store"
+    ingest([file_path], StoreSink(store_dir), 100)
+    part_dir = store_dir / f"ticker={file_path.stem}"
+    before = (part_dir / "part-0.parquet").read_bytes()
+
+    normalize = stream_ingest.normalize_chunk
+    calls = []
+
+    def failing(chunk, stats=None):
+        calls.append(len(chunk))
+        if len(calls) == 2:
+            raise ValueError("bad chunk")
+        return normalize(chunk, stats)
+
+    monkeypatch.setattr(stream_ingest, "normalize_chunk", failing)
+    with pytest.raises(ValueError):
+        ingest([file_path], StoreSink(store_dir), 100)
+    assert (part_dir / "part-0.parquet").read_bytes() == before
+    assert [p.name for p in part_dir.iterdir()] == ["part-0.parquet"]
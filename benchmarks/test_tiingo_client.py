@@ -0,0 +1,111 @@
+import datetime
+import json
+import time
+
+import pytest
+import requests
+
+from data_ingest import tiingo_client
+from data_ingest.tiingo_client import (
+    Checkpoint, TokenBucket, download_all, fetch_prices
+)
+
+BARS = [
+    {"date": "2025-01-02T00:00:00.000Z", "close": 10.0, "adjClose": 10.0},
+    {"date": "2025-01-03T00:00:00.000Z", "close": 11.0, "adjClose": 11.0},
+]
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=BARS, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+# Stands in for requests.Session: scripted responses per ticker (the last
+# one repeats), every requested ticker recorded
+class FakeSession:
+    def __init__(self, scripts=None):
+        self.scripts = scripts or {}
+        self.requested = []
+
+    def get(self, url, params=None, timeout=None):
+        ticker = url.rstrip("/").split("/")[-2]
+        self.requested.append(ticker)
+        script = self.scripts.get(ticker, [FakeResponse()])
+        return script.pop(0) if len(script) > 1 else script[0]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tiingo_client.time, "sleep", calls.append)
+    return calls
+
+
+# 429 and 5xx are retried, honouring Retry-After; 404 is not
+def test_fetch_retries(sleeps):
+    bucket = TokenBucket(1e6, 100)
+    session = FakeSession({
+        "AAPL": [FakeResponse(429, headers={"Retry-After": "3"}),
+                 FakeResponse(503), FakeResponse()],
+        "GONE": [FakeResponse(404)],
+    })
+    df = fetch_prices(session, bucket, "AAPL")
+    assert len(df) == len(BARS)
+    assert session.requested == ["AAPL"] * 3
+    assert sleeps[0] == 3.0 and len(sleeps) == 2
+
+    with pytest.raises(requests.HTTPError):
+        fetch_prices(session, bucket, "GONE")
+    assert session.requested.count("GONE") == 1
+
+
+# Past the burst, tokens arrive at `rate` per second
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=50, capacity=2)
+    start = time.monotonic()
+    for _ in range(7):
+        bucket.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+# A failed ticker is retried on resume, finished ones are not; the next
+# day's run starts over
+def test_download_resume(tmp_path, monkeypatch, sleeps):
+    session = FakeSession({"BAD": [FakeResponse(404)]})
+    monkeypatch.setattr(tiingo_client, "make_session", lambda *a: session)
+    checkpoint = tmp_path / "checkpoint.json"
+    day = datetime.date(2025, 1, 6)
+
+    def download(today):
+        session.requested.clear()
+        return download_all(
+            ["AAA", "BAD", "CCC"], "key", tmp_path / "ohlcv", checkpoint,
+            workers=1, today=today,
+        )
+
+    assert set(download(day)) == {"BAD"}
+    assert sorted(json.loads(checkpoint.read_text())["done"]) == [
+        "AAA", "CCC"
+    ]
+    assert (tmp_path / "ohlcv" / "AAA.csv").exists()
+
+    download(day)
+    assert session.requested == ["BAD"]
+
+    download(day + datetime.timedelta(1))
+    assert sorted(session.requested) == ["AAA", "BAD", "CCC"]
+
+    assert Checkpoint(checkpoint, "other run").done == set()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from data_ingest.coverage import coverage_report
+from data_ingest.validate_data import (
+    START_DATE_DEFAULT, TODAY, build_added_index, build_change_index,
+    calendar_range, day_number, get_date_range, load_trading_days,
+    slice_trading_days, validate_file
+)
+
+
+def trading_days(universe):
+    return universe.dates.values.astype("datetime64[D]").astype(np.int64)
+
+
+# Coverage and OHLC checks for every ticker against the shared calendar
+def test_coverage_report(run, universe):
+    days = trading_days(universe)
+    run(lambda: [
+        coverage_report(ticker, df, days)
+        for ticker, df in universe.prices.items()
+    ])
+
+
+# Per-ticker validation windows from the change history
+def test_date_ranges(run, universe):
+    current = set(universe.current["Symbol"])
+
+    def date_ranges():
+        change_index = build_change_index(universe.changes)
+        added_index = build_added_index(universe.current)
+        return {
+            ticker: get_date_range(
+                ticker, current, added_index, change_index, {}
+            )
+            for ticker in universe.tickers
+        }
+
+    run(date_ranges)
+
+
+# An override starting before 2017 keeps its early trading days
+def test_override_before_default_start():
+    ranges = {
+        "OLD": (pd.Timestamp("2015-03-02"), pd.Timestamp("2017-06-30")),
+        "NEW": (START_DATE_DEFAULT, TODAY),
+    }
+    days = load_trading_days(*calendar_range(ranges))
+    old = slice_trading_days(days, *ranges["OLD"])
+    assert old[0] == day_number(pd.Timestamp("2015-03-02"))
+    assert old[-1] == day_number(pd.Timestamp("2017-06-30"))
+    assert len(slice_trading_days(days, *ranges["NEW"])) == len(
+        load_trading_days()
+    )
+
+
+# Read and validate each CSV, as the worker processes in main() do
+def test_validate_files(run, universe, universe_dir):
+    ohlcv_dir = universe_dir / "tiingo" / "ohlcv"
+    files = {
+        ticker: ohlcv_dir / f"{ticker.replace('.', '-')}.csv"
+        for ticker in universe.prices
+    }
+    days = trading_days(universe)
+    results = run(lambda: [
+        validate_file(ticker, path, days) for ticker, path in files.items()
+    ])
+    assert all(r["status"] in ("valid", "invalid") for r in results)
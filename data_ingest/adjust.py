@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Raw field -> adjusted field, Tiingo naming
+ADJ_FIELDS = {
+    "close": "adjClose",
+    "high": "adjHigh",
+    "low": "adjLow",
+    "open": "adjOpen",
+}
+RAW_FIELDS = [*ADJ_FIELDS, "volume", "divCash", "splitFactor"]
+
+
+# Product of f over days after t, for every t (reverse cumulative product)
+def future_product(f):
+    out = np.ones_like(f)
+    out[:-1] = np.cumprod(f[::-1], axis=0)[::-1][1:]
+    return out
+
+
+# Last finite value at or before each row, down axis 0
+def ffill_rows(values):
+    rows = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    idx = np.where(np.isfinite(values), rows, 0)
+    idx = np.maximum.accumulate(np.broadcast_to(idx, values.shape), axis=0)
+    return np.take_along_axis(values, idx, axis=0)
+
+
+# Per-bar event multipliers. A dividend on day k scales earlier prices by
+# 1 - div_k / close_(k-1), the previous close being the last one traded;
+# a split scales them by 1 / split_k. Missing bars carry no event.
+def event_factors(close, div_cash, split_factor):
+    close = np.asarray(close, dtype=np.float64)
+    prev = np.full_like(close, np.nan)
+    prev[1:] = ffill_rows(close)[:-1]
+    div = np.nan_to_num(np.asarray(div_cash, dtype=np.float64))
+    split = np.asarray(split_factor, dtype=np.float64)
+    split = np.where(np.isfinite(split) & (split > 0), split, 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        div_ratio = np.where((div != 0) & (prev > 0), 1 - div / prev, 1.0)
+    return div_ratio / split, split
+
+
+# (price factor, volume factor) per bar: every later event multiplied
+# together, so adjusted = raw * factor and the last bar has factor 1
+def adjustment_factors(close, div_cash, split_factor):
+    price, split = event_factors(close, div_cash, split_factor)
+    return future_product(price), future_product(split)
+
+
+# Adjusted OHLCV from raw (dates x tickers) arrays, all tickers at once
+def adjust_arrays(fields):
+    price, volume = adjustment_factors(
+        fields["close"], fields["divCash"], fields["splitFactor"]
+    )
+    out = {adj: fields[raw] * price for raw, adj in ADJ_FIELDS.items()}
+    out["adjVolume"] = fields["volume"] * volume
+    return out
+
+
+# Per-ticker frames with a date column and the raw fields -> the same
+# frames with adj* columns. The frames are scattered into one
+# (dates x tickers) block so the factors come from a single pass.
+def adjust_frames(frames):
+    if not frames:
+        return {}
+    tickers = list(frames)
+    dates = [pd.to_datetime(frames[t]["date"]).to_numpy() for t in tickers]
+    calendar = np.unique(np.concatenate(dates))
+    rows = [np.searchsorted(calendar, d) for d in dates]
+
+    fields = {}
+    for name in RAW_FIELDS:
+        block = np.full((len(calendar), len(tickers)), np.nan)
+        for j, t in enumerate(tickers):
+            block[rows[j], j] = frames[t][name].to_numpy(np.float64)
+        fields[name] = block
+    adjusted = adjust_arrays(fields)
+
+    out = {}
+    for j, t in enumerate(tickers):
+        out[t] = frames[t].assign(**{
+            name: values[rows[j], j] for name, values in adjusted.items()
+        })
+    return out
+
+
+# Stored adjusted history plus newly downloaded raw bars. Factors of the
+# new bars use the last stored close; events among them scale every stored
+# adjusted value by their combined factor, which is 1 when there are none.
+# Returns (stored history rescaled, new bars with adj* columns).
+def extend_adjusted(stored, new):
+    last = stored[RAW_FIELDS].iloc[-1:].assign(divCash=0.0, splitFactor=1.0)
+    block = pd.concat([last, new[RAW_FIELDS]], ignore_index=True)
+    fields = {name: block[name].to_numpy(np.float64) for name in RAW_FIELDS}
+    price, volume = adjustment_factors(
+        fields["close"], fields["divCash"], fields["splitFactor"]
+    )
+    adjusted = adjust_arrays(fields)
+
+    history = stored.copy()
+    if price[0] != 1.0 or volume[0] != 1.0:
+        for adj in ADJ_FIELDS.values():
+            history[adj] = history[adj] * price[0]
+        history["adjVolume"] = history["adjVolume"] * volume[0]
+    new = new.assign(**{
+        name: values[1:] for name, values in adjusted.items()
+    })
+    return history, new
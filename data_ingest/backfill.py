@@ -0,0 +1,249 @@
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_ingest.instrument import span, write_report
+from data_ingest.prices import get_file_path, get_prices, load_file
+
+# Config
+OUT_DIR = Path("data/tiingo/ohlcv_backfilled/")
+START_DATE_DEFAULT = pd.to_datetime("2017-01-01")
+
+# Tiingo OHLCV columns carried through the composite
+COLUMNS = [
+    "close", "high", "low", "open", "volume",
+    "adjClose", "adjHigh", "adjLow", "adjOpen", "adjVolume",
+    "divCash", "splitFactor"
+]
+
+PRICE_COLUMNS = [
+    "close", "high", "low", "open",
+    "adjClose", "adjHigh", "adjLow", "adjOpen"
+]
+
+
+# One synthetic ETF (or custom basket) to backfill
+@dataclass
+class EtfSpec:
+    etf: str
+    holdings_file: Path
+    start: pd.Timestamp = START_DATE_DEFAULT
+    splice_date: pd.Timestamp = None
+    excluded: set = field(default_factory=set)
+
+
+# Load holdings and rebalance weights over the kept symbols
+def load_holdings(holdings_file, excluded=()):
+    # SPDR exports carry a title row above the header
+    with open(holdings_file, encoding="utf-8-sig") as f:
+        skiprows = 0 if f.readline().startswith("Symbol") else 1
+
+    df = pd.read_csv(holdings_file, skiprows=skiprows, encoding="utf-8-sig")
+    df["Symbol"] = df["Symbol"].str.strip()
+    df["Index Weight"] = (
+        df["Index Weight"]
+        .astype(str)
+        .str.replace('%', '')
+        .astype(float) / 100.0
+    )
+
+    df = df[~df["Symbol"].isin(excluded)].copy()
+    df["Rebalanced Weight"] = df["Index Weight"] / df["Index Weight"].sum()
+    return dict(zip(df["Symbol"], df["Rebalanced Weight"]))
+
+
+# Load every constituent file once, shared across all ETFs
+def load_constituents(tickers, start, end):
+    stock_data = {}
+    for ticker in sorted(tickers):
+        file_path = get_file_path(ticker)
+        if not file_path.exists():
+            print(f"[WARNING] Missing file for {ticker}: {file_path}")
+            continue
+        stock_data[ticker] = get_prices(ticker, start=start, end=end)
+    return stock_data
+
+
+# Stack constituent frames into one (date x ticker x field) array
+def align_constituents(stock_data, tickers, dates, columns=COLUMNS):
+    dates = pd.DatetimeIndex(dates)
+    cube = np.full((len(dates), len(tickers), len(columns)), np.nan)
+    col_pos = {col: k for k, col in enumerate(columns)}
+
+    for j, ticker in enumerate(tickers):
+        df = stock_data.get(ticker)
+        if df is None or df.empty:
+            continue
+        df = df[~df.index.duplicated(keep="last")]
+        present = [col for col in columns if col in df.columns]
+        block = (
+            df[present]
+            .apply(pd.to_numeric, errors="coerce")
+            .reindex(dates)
+        )
+        cube[:, j, [col_pos[col] for col in present]] = (
+            block.to_numpy(dtype=float)
+        )
+    return cube
+
+
+# Weighted composite per (date, field); NaN where no constituent has data
+def weighted_composite(cube, weights, renormalize=False):
+    weights = np.asarray(weights, dtype=float)
+    present = ~np.isnan(cube)
+    total = np.einsum("dtf,t->df", np.where(present, cube, 0.0), weights)
+    total_weight = np.einsum("dtf,t->df", present, weights)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if renormalize:
+            total = total / total_weight
+    return np.where(total_weight > 0, total, np.nan)
+
+
+# Composite OHLCV frame for a weighted basket of constituents
+def backfill_composite(stock_data, weights, dates, columns=COLUMNS,
+                       renormalize=False):
+    tickers = list(weights)
+    cube = align_constituents(stock_data, tickers, dates, columns)
+    values = weighted_composite(
+        cube, [weights[t] for t in tickers], renormalize=renormalize
+    )
+    out = pd.DataFrame(values, columns=columns)
+    out.insert(0, "date", pd.DatetimeIndex(dates))
+    return out
+
+
+# Scaling factor matching composite to real adjClose on the overlap day
+def splice_factor(composite_df, real_df, splice_date):
+    backfilled = composite_df.set_index("date")["adjClose"].get(splice_date)
+    real = real_df["adjClose"].get(splice_date)
+    if backfilled is None or real is None or pd.isna(backfilled):
+        raise ValueError(f"No overlap data on {splice_date.date()}")
+    return float(real) / float(backfilled)
+
+
+# Backfill one ETF from the shared constituent data
+def backfill_etf(spec, weights, stock_data, real_df=None, renormalize=False):
+    splice_date = spec.splice_date
+    if splice_date is None and real_df is not None:
+        splice_date = real_df.index.min()
+
+    end = splice_date if splice_date is not None else pd.Timestamp.today()
+    all_dates = pd.date_range(start=spec.start, end=end, freq="B")
+
+    composite = backfill_composite(
+        stock_data, weights, all_dates, renormalize=renormalize
+    )
+    composite = composite.dropna(
+        subset=["close", "open", "high", "low", "volume"]
+    )
+
+    if real_df is None:
+        return composite, composite.copy(), None, 1.0
+
+    scaling_factor = splice_factor(composite, real_df, splice_date)
+    raw = composite[composite["date"] < splice_date].reset_index(drop=True)
+
+    scaled = raw.copy()
+    scaled[PRICE_COLUMNS] = (
+        scaled[PRICE_COLUMNS].multiply(scaling_factor).round(6)
+    )
+
+    real = real_df[real_df.index >= splice_date].reset_index()
+    merged = pd.concat([scaled, real], ignore_index=True)
+    return raw, scaled, merged, scaling_factor
+
+
+# Backfill every ETF in one pass over the union of their constituents
+def backfill_etfs(specs, out_dir=OUT_DIR, renormalize=False):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    holdings = {
+        spec.etf: load_holdings(spec.holdings_file, spec.excluded)
+        for spec in specs
+    }
+    real = {}
+    for spec in specs:
+        real_file = get_file_path(spec.etf)
+        if real_file.exists():
+            real[spec.etf] = load_file(real_file)
+
+    splice_dates = [
+        spec.splice_date or real[spec.etf].index.min()
+        for spec in specs if spec.splice_date or spec.etf in real
+    ]
+    start = min(spec.start for spec in specs)
+    end = max(splice_dates, default=pd.Timestamp.today().normalize())
+    all_tickers = set().union(*(set(w) for w in holdings.values()))
+    with span("backfill_load_constituents") as s:
+        stock_data = load_constituents(all_tickers, start, end)
+        s.add_rows(sum(len(df) for df in stock_data.values()))
+    print(
+        f"Loaded {len(stock_data)} constituent files "
+        f"for {len(specs)} ETFs"
+    )
+
+    results = {}
+    for spec in specs:
+        with span(f"backfill_{spec.etf}") as s:
+            raw, scaled, merged, scaling_factor = backfill_etf(
+                spec, holdings[spec.etf], stock_data,
+                real.get(spec.etf), renormalize=renormalize
+            )
+            s.add_rows(len(raw))
+        name = spec.etf.lower()
+        raw.to_csv(out_dir / f"{name}_backfilled_raw.csv", index=False)
+        scaled.to_csv(out_dir / f"{name}_backfilled_scaled.csv", index=False)
+        if merged is not None:
+            merged.to_csv(out_dir / f"{spec.etf}_merged.csv", index=False)
+
+        print(
+            f"{spec.etf} | Rows: {len(raw)} | "
+            f"Scaling factor = {scaling_factor:.6f}"
+        )
+        results[spec.etf] = merged if merged is not None else scaled
+    return results
+
+
+# Parse "ETF=holdings.csv" or "ETF=holdings.csv@YYYY-MM-DD"
+def parse_etf_arg(value, start, excluded):
+    etf, _, rest = value.partition("=")
+    holdings_file, _, splice = rest.partition("@")
+    return EtfSpec(
+        etf=etf.strip(),
+        holdings_file=Path(holdings_file),
+        start=start,
+        splice_date=pd.to_datetime(splice) if splice else None,
+        excluded=excluded,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Backfill synthetic sector ETF histories from holdings."
+    )
+    parser.add_argument(
+        "--etf", action="append", required=True,
+        help="ETF=holdings.csv[@splice-date], repeatable"
+    )
+    parser.add_argument("--start", default=str(START_DATE_DEFAULT.date()))
+    parser.add_argument("--exclude", default="",
+                        help="Comma-separated tickers to drop")
+    parser.add_argument("--out-dir", default=str(OUT_DIR))
+    parser.add_argument("--renormalize", action="store_true",
+                        help="Divide by the weight of constituents present")
+    args = parser.parse_args(argv)
+
+    excluded = {t.strip() for t in args.exclude.split(",") if t.strip()}
+    start = pd.to_datetime(args.start)
+    specs = [parse_etf_arg(v, start, excluded) for v in args.etf]
+    backfill_etfs(specs, args.out_dir, renormalize=args.renormalize)
+    write_report("backfill")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Config
+STALE_MIN_BARS = 3
+ISSUE_COLUMNS = ["Ticker", "Issue", "StartDate", "EndDate", "Days"]
+
+
+# Dates -> int64 day numbers (days since 1970-01-01), tz dropped
+def to_day_numbers(dates):
+    dates = pd.to_datetime(pd.Series(dates), errors="coerce", utc=True)
+    dates = dates.dropna().dt.tz_localize(None)
+    return dates.values.astype("datetime64[D]").astype(np.int64)
+
+
+def day_to_date(day):
+    return np.datetime64(int(day), "D").astype(object)
+
+
+# (start, end) index pairs of each run of True in a 1-D mask, end inclusive
+def true_runs(mask):
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return starts, ends
+
+
+def _issues(ticker, issue, days, starts, ends, lengths):
+    return [
+        [ticker, issue, day_to_date(days[s]), day_to_date(days[e]), int(n)]
+        for s, e, n in zip(starts, ends, lengths)
+    ]
+
+
+# Coverage summary and issue list for one ticker against its trading days.
+# `expected` holds the ticker's trading days as sorted int64 day numbers.
+def coverage_report(ticker, df, expected):
+    dates = pd.to_datetime(df["date"], errors="coerce", utc=True)
+    valid = dates.notna().to_numpy()
+    days = to_day_numbers(dates[valid])
+    order = np.argsort(days, kind="stable")
+    days = days[order]
+    keep = np.ones(len(days), dtype=bool)
+    keep[:-1] = days[1:] != days[:-1]
+    days = days[keep]
+
+    def column(name):
+        if name not in df.columns:
+            return np.full(len(days), np.nan)
+        values = pd.to_numeric(df[name], errors="coerce").to_numpy(float)
+        return values[valid][order][keep]
+
+    # Presence of each expected trading day
+    if len(days):
+        pos = np.minimum(np.searchsorted(days, expected), len(days) - 1)
+        hits = days[pos] == expected
+    else:
+        hits = np.zeros(len(expected), dtype=bool)
+
+    summary = {
+        "coverage_ratio": float(hits.mean()) if len(expected) else 0.0,
+        "start_ok": bool(hits[0]) if len(expected) else False,
+        "end_ok": bool(hits[-1]) if len(expected) else False,
+    }
+    bounds = [
+        name for name, ok in (("start", summary["start_ok"]),
+                              ("end", summary["end_ok"])) if not ok
+    ]
+    summary["missing_bound"] = "|".join(bounds)
+
+    issues = []
+    starts, ends = true_runs(~hits)
+    issues += _issues(
+        ticker, "missing", expected, starts, ends, ends - starts + 1
+    )
+
+    # Restrict bar-level checks to the validated window
+    in_window = (
+        (days >= expected[0]) & (days <= expected[-1])
+        if len(expected) else np.zeros(len(days), dtype=bool)
+    )
+    bar_days = days[in_window]
+    close = column("close")[in_window]
+    high = column("high")[in_window]
+    low = column("low")[in_window]
+    volume = column("volume")[in_window]
+
+    # Runs of identical closes spanning at least STALE_MIN_BARS bars
+    same = np.diff(close) == 0
+    starts, ends = true_runs(same)
+    lengths = ends - starts + 2
+    stale = lengths >= STALE_MIN_BARS
+    issues += _issues(
+        ticker, "stale_price", bar_days,
+        starts[stale], ends[stale] + 1, lengths[stale]
+    )
+
+    for issue, mask in (
+        ("zero_volume", volume == 0),
+        ("high_below_low", high < low),
+        ("close_outside_range", (close > high) | (close < low)),
+    ):
+        idx = np.flatnonzero(mask)
+        issues += _issues(
+            ticker, issue, bar_days, idx, idx, np.ones(len(idx))
+        )
+
+    summary["missing_days"] = int((~hits).sum())
+    summary["issue_count"] = len(issues)
+    return summary, issues
+
+
+def issues_frame(issues):
+    return pd.DataFrame(issues, columns=ISSUE_COLUMNS)
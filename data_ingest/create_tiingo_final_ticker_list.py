@@ -4,10 +4,11 @@ INPUT_FILE = Path("data/sp500/sp500_all_unique_post2017_tickers.txt")
 OUTPUT_FILE = Path("data/tiingo/tiingo_all_tickers.txt")
 sector_etfs = ["XLC", "XLY", "XLP", "XLE", "XLF", "XLV",
                "XLI", "XLB", "XLRE", "XLK", "XLU"]
+benchmarks = ["SPY"]
 
 # Read and merge
 tickers = INPUT_FILE.read_text().splitlines()
-all_tickers = sorted(set(tickers + sector_etfs))
+all_tickers = sorted(set(tickers + sector_etfs + benchmarks))
 
 # Write to output
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,78 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+
+# Header columns of a stored OHLCV CSV
+def read_header(file_path):
+    with open(file_path, "r") as f:
+        return f.readline().strip().split(",")
+
+
+# Last stored bar date, read from the tail of the file only
+def last_stored_date(file_path, tail_bytes=4096):
+    file_path = Path(file_path)
+    if not file_path.exists() or file_path.stat().st_size == 0:
+        return None
+
+    date_pos = read_header(file_path).index("date")
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - tail_bytes))
+        lines = f.read().decode().splitlines()
+
+    lines = [line for line in lines if line.strip()]
+    if size <= tail_bytes:
+        lines = lines[1:]
+    if not lines:
+        return None
+
+    last = pd.to_datetime(lines[-1].split(",")[date_pos], errors="coerce")
+    if pd.isna(last):
+        return None
+    if last.tzinfo is not None:
+        last = last.tz_localize(None)
+    return last.normalize()
+
+
+# New bars carrying a split or dividend invalidate the stored adjusted history
+def needs_full_refresh(new_df):
+    split = pd.to_numeric(new_df.get("splitFactor"), errors="coerce")
+    div = pd.to_numeric(new_df.get("divCash"), errors="coerce")
+    split = pd.Series(split).fillna(1.0)
+    div = pd.Series(div).fillna(0.0)
+    return bool(((split != 1.0) | (div != 0.0)).any())
+
+
+# Keep only bars strictly after the last stored date
+def rows_after(new_df, last_date):
+    dates = pd.to_datetime(new_df["date"])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return new_df[dates.dt.normalize() > last_date]
+
+
+# Write a full file via temp file + rename
+def write_atomic(file_path, df):
+    file_path = Path(file_path)
+    tmp = file_path.with_name(file_path.name + ".tmp")
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, file_path)
+
+
+# Append bars in stored column order; readers never see a partial file
+def append_atomic(file_path, new_df):
+    file_path = Path(file_path)
+    tmp = file_path.with_name(file_path.name + ".tmp")
+    new_df = new_df.reindex(columns=read_header(file_path))
+
+    shutil.copyfile(file_path, tmp)
+    with open(tmp, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+    new_df.to_csv(tmp, mode="a", header=False, index=False)
+    os.replace(tmp, file_path)
@@ -0,0 +1,129 @@
+import cProfile
+import csv
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Config
+REPORT_DIR = Path(os.environ.get("INGEST_REPORT_DIR", "data/reports/"))
+PROFILE = os.environ.get("INGEST_PROFILE", "") == "1"
+
+_spans = []
+_lock = threading.Lock()
+_local = threading.local()
+
+
+# Per-thread stack of open spans, so worker threads nest independently
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+# Peak resident set size of this process in MB
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Timing record for one instrumented block
+class Span:
+    def __init__(self, name):
+        self.name = name
+        stack = _stack()
+        self.parent = stack[-1].name if stack else ""
+        self.rows = 0
+
+    def add_rows(self, n):
+        self.rows += int(n)
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "rows": self.rows,
+            "rss_growth_mb": round(self.rss_growth_mb, 1),
+            "process_peak_rss_mb": round(self.process_peak_rss_mb, 1),
+        }
+
+
+# Time a block: wall, CPU, rows processed, how far it raised the process
+# peak RSS (ru_maxrss only grows, so spans that run concurrently share
+# the growth), and the process peak so far; optional cProfile dump to
+# <name>_<start stamp>.prof
+@contextmanager
+def span(name, profile=None):
+    s = Span(name)
+    # Only one profiler can be active, so only outermost spans are profiled
+    main_thread = threading.current_thread() is threading.main_thread()
+    outermost = main_thread and not _stack()
+    profiler = None
+    if outermost and (PROFILE if profile is None else profile):
+        profiler = cProfile.Profile()
+    _stack().append(s)
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    peak = peak_rss_mb()
+    wall, cpu = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        yield s
+    finally:
+        if profiler:
+            profiler.disable()
+            REPORT_DIR.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(REPORT_DIR / f"{name}_{stamp}.prof")
+        s.wall_s = time.perf_counter() - wall
+        s.cpu_s = time.process_time() - cpu
+        s.process_peak_rss_mb = peak_rss_mb()
+        s.rss_growth_mb = s.process_peak_rss_mb - peak
+        _stack().pop()
+        with _lock:
+            _spans.append(s)
+
+
+# Decorator form of span(); rows(result) gives the row count, if set
+def timed(name=None, rows=None):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__qualname__) as s:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    s.add_rows(rows(result))
+                return result
+        return wrapper
+    return decorate
+
+
+# Write all spans recorded so far as <run>.json and <run>.csv
+def write_report(run_name, report_dir=None):
+    report_dir = Path(report_dir or REPORT_DIR)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S")
+    with _lock:
+        rows = [s.as_dict() for s in _spans]
+
+    json_file = report_dir / f"{run_name}_{stamp}.json"
+    json_file.write_text(json.dumps(
+        {"run": run_name, "started": stamp, "spans": rows}, indent=2
+    ))
+    with open(report_dir / f"{run_name}_{stamp}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["name", "parent", "wall_s", "cpu_s", "rows",
+                           "rss_growth_mb", "process_peak_rss_mb"]
+        )
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"Timing report -> {json_file}")
+    return json_file
@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_ingest.panel import Panel, nyse_days, to_day_numbers
+
+# Config
+MACRO_DIR = Path("data/yfinance/macro/")
+STORE_DIR = Path("data/macro/")
+ALIGNED_FILE = Path("data/macro/macro_nyse.parquet")
+FIELDS = ["close", "high", "low", "open", "volume"]
+MAX_STALE_DAYS = 5
+
+# Yield curve slopes: name -> (long leg, short leg)
+CURVES = {
+    "slope_10y_3m": ("10Y", "3M"),
+    "slope_10y_5y": ("10Y", "5Y"),
+}
+
+
+# One loader CSV (yfinance's Price/Ticker/Date header rows) -> frame with
+# a datetime index and lower-case fields
+def read_macro_csv(file_path):
+    df = pd.read_csv(file_path, header=[0, 1], index_col=0)
+    df.columns = [str(col).lower() for col in df.columns.get_level_values(0)]
+    df.index = pd.to_datetime(df.index, format="%Y-%m-%d", errors="coerce")
+    df = df[df.index.notna()].reindex(columns=FIELDS)
+    return df.apply(pd.to_numeric, errors="coerce").dropna(subset=["close"])
+
+
+# Last row at or before each row holding a bar, per series, starting from
+# `seed` (the answer for the row before the block); -1 where none yet
+def last_bar_rows(close, first_row=0, seed=None):
+    rows = np.arange(first_row, first_row + len(close))[:, None]
+    last = np.where(np.isfinite(close), rows, -1)
+    if seed is not None:
+        last = np.vstack([np.asarray(seed)[None, :], last])
+    last = np.maximum.accumulate(last, axis=0)
+    return last[1:] if seed is not None else last
+
+
+# All series on the union of their own calendars: one float32 array per
+# field (NaN where a series has no bar), the row of each series' latest
+# bar, and curve slopes from the latest closes. Memory-mappable on disk.
+class MacroStore:
+    def __init__(self, dates, series, fields, last_row, curves):
+        self.dates = dates
+        self.series = list(series)
+        self.fields = fields
+        self.last_row = last_row
+        self.curves = curves
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    @classmethod
+    def empty(cls, series=()):
+        k = len(series)
+        return cls(
+            np.empty(0, dtype=np.int64), series,
+            {f: np.empty((0, k), dtype=np.float32) for f in FIELDS},
+            np.empty((0, k), dtype=np.int32),
+            np.empty((0, len(CURVES)), dtype=np.float32),
+        )
+
+    # Merge new bars ({label: frame from read_macro_csv}). A series' bars
+    # from its first new date on replace the stored ones, so revised
+    # closes are picked up. Derived arrays are recomputed only from the
+    # first row whose bars differ. Returns the number of rows recomputed.
+    def update(self, frames):
+        series = self.series + sorted(set(frames) - set(self.series))
+        new_days = [to_day_numbers(df.index) for df in frames.values()]
+        dates = np.union1d(self.dates, np.concatenate([[], *new_days]))
+        dates = dates.astype(np.int64)
+        old_rows = np.searchsorted(dates, self.dates)
+
+        fields = {}
+        for name in FIELDS:
+            arr = np.full((len(dates), len(series)), np.nan, np.float32)
+            arr[old_rows, :len(self.series)] = self.fields[name]
+            fields[name] = arr
+
+        before = {name: arr.copy() for name, arr in fields.items()}
+        for (label, df), days in zip(frames.items(), new_days):
+            if not len(days):
+                continue
+            j = series.index(label)
+            start = np.searchsorted(dates, days.min())
+            rows = np.searchsorted(dates, days)
+            for name in FIELDS:
+                fields[name][start:, j] = np.nan
+                fields[name][rows, j] = df[name].to_numpy(np.float32)
+
+        # Recompute from the first row whose bars changed; stored rows
+        # also move when new dates are inserted among them
+        changed = np.zeros(len(dates), dtype=bool)
+        for name in FIELDS:
+            a, b = before[name], fields[name]
+            changed |= ((a != b) & ~(np.isnan(a) & np.isnan(b))).any(axis=1)
+        changed[old_rows[old_rows != np.arange(len(old_rows))]] = True
+        first = np.argmax(changed) if changed.any() else len(dates)
+        keep = min(first, len(self.dates))
+        seed = None
+        if keep:
+            seed = np.full(len(series), -1, dtype=np.int32)
+            seed[:len(self.series)] = self.last_row[keep - 1]
+
+        last_row = np.full((len(dates), len(series)), -1, dtype=np.int32)
+        last_row[:keep, :len(self.series)] = self.last_row[:keep]
+        last_row[keep:] = last_bar_rows(fields["close"][keep:], keep, seed)
+        curves = np.full((len(dates), len(CURVES)), np.nan, np.float32)
+        curves[:keep] = self.curves[:keep]
+        curves[keep:] = self._curves(fields["close"], series, last_row[keep:])
+
+        self.dates, self.series, self.fields = dates, series, fields
+        self.last_row, self.curves = last_row, curves
+        return len(dates) - keep
+
+    @staticmethod
+    def _curves(close, series, last_row):
+        out = np.full((len(last_row), len(CURVES)), np.nan, np.float32)
+        for k, (long_leg, short_leg) in enumerate(CURVES.values()):
+            if long_leg not in series or short_leg not in series:
+                continue
+            legs = []
+            for label in (long_leg, short_leg):
+                j = series.index(label)
+                rows = last_row[:, j]
+                legs.append(np.where(
+                    rows >= 0, close[np.maximum(rows, 0), j], np.nan
+                ))
+            out[:, k] = legs[0] - legs[1]
+        return out
+
+    # Values known on each target day (merge_asof, direction="backward"):
+    # the latest bar dated on or before the day, or strictly before it
+    # with allow_exact=False. Bars older than max_stale calendar days are
+    # dropped. Returns {series or curve name: array over target days}.
+    def as_of(self, days, field="close", allow_exact=True,
+              max_stale=MAX_STALE_DAYS):
+        days = np.asarray(days, dtype=np.int64)
+        side = "right" if allow_exact else "left"
+        rows = np.searchsorted(self.dates, days, side=side) - 1
+        ok = rows >= 0
+        rows = np.maximum(rows, 0)
+
+        out = {}
+        if len(self.dates):
+            last = np.where(ok[:, None], self.last_row[rows], -1)
+            age = days[:, None] - self.dates[np.maximum(last, 0)]
+            fresh = (last >= 0) & (age <= max_stale)
+            values = np.take_along_axis(
+                self.fields[field], np.maximum(last, 0), axis=0
+            )
+            for j, label in enumerate(self.series):
+                out[label] = np.where(fresh[:, j], values[:, j], np.nan)
+            for k, (name, legs) in enumerate(CURVES.items()):
+                if not set(legs) <= set(self.series):
+                    continue
+                cols = [self.series.index(label) for label in legs]
+                curve_ok = ok & fresh[:, cols].all(axis=1)
+                out[name] = np.where(curve_ok, self.curves[rows, k], np.nan)
+        return out
+
+    def save(self, store_dir=STORE_DIR):
+        store_dir = Path(store_dir)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "dates": self.dates, "last_row": self.last_row,
+            "curves": self.curves, **self.fields,
+        }
+        for name, values in arrays.items():
+            tmp = store_dir / f".{name}.npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp, store_dir / f"{name}.npy")
+        meta = {"series": self.series, "curves": list(CURVES)}
+        (store_dir / "meta.json").write_text(json.dumps(meta))
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR, mmap_mode=None):
+        store_dir = Path(store_dir)
+        meta = json.loads((store_dir / "meta.json").read_text())
+        if meta["curves"] != list(CURVES):
+            return cls.empty()
+
+        def load(name):
+            return np.load(store_dir / f"{name}.npy", mmap_mode=mmap_mode)
+
+        return cls(
+            load("dates"), meta["series"],
+            {name: load(name) for name in FIELDS},
+            load("last_row"), load("curves"),
+        )
+
+
+# Macro closes and curve slopes as of each of `days` (NYSE day numbers)
+def align(store, days, allow_exact=True, max_stale=MAX_STALE_DAYS):
+    values = store.as_of(days, "close", allow_exact, max_stale)
+    index = pd.DatetimeIndex(
+        np.asarray(days).astype("datetime64[D]"), name="date"
+    )
+    return pd.DataFrame(values, index=index)
+
+
+# Same, on the equity panel's days
+def align_to_panel(store, panel, **kwargs):
+    return align(store, panel.dates, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Update the macro store and align it to NYSE days."
+    )
+    parser.add_argument("--macro-dir", default=str(MACRO_DIR))
+    parser.add_argument("--store", default=str(STORE_DIR))
+    parser.add_argument("--panel", default=None,
+                        help="Align to this panel's days (default NYSE)")
+    parser.add_argument("--strict", action="store_true",
+                        help="Use only bars dated before each day")
+    args = parser.parse_args(argv)
+
+    store_dir = Path(args.store)
+    store = (
+        MacroStore.load(store_dir) if (store_dir / "meta.json").exists()
+        else MacroStore.empty()
+    )
+    frames = {
+        path.stem: read_macro_csv(path)
+        for path in sorted(Path(args.macro_dir).glob("*.csv"))
+    }
+    recomputed = store.update(frames)
+    store.save(store_dir)
+    print(
+        f"Macro store: {len(store.dates)} dates x {len(store.series)} "
+        f"series, {recomputed} rows recomputed -> {store_dir}"
+    )
+
+    if args.panel:
+        panel = Panel.load(args.panel, fields=["adjClose"])
+        aligned = align_to_panel(store, panel, allow_exact=not args.strict)
+    else:
+        start, end = store.dates[[0, -1]].astype("datetime64[D]")
+        days = nyse_days(str(start), str(end))
+        aligned = align(store, days, allow_exact=not args.strict)
+    aligned.to_parquet(ALIGNED_FILE)
+    print(f"Saved {len(aligned)} aligned days -> {ALIGNED_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pandas_market_calendars as mcal
+
+from data_ingest.price_store import STORE_DIR, read_prices, store_ticker
+
+# Config
+UNIVERSE_FILE = Path("data_ingest/final_tickers_dates_sectors.csv")
+BENCHMARK = "SPY"
+PANEL_DIR = Path("data/panel/")
+FIELDS = [
+    "adjClose", "adjOpen", "adjHigh", "adjLow", "adjVolume",
+    "close", "volume", "divCash", "splitFactor"
+]
+
+
+def to_day_numbers(dates):
+    return pd.DatetimeIndex(dates).values.astype("datetime64[D]").astype(
+        np.int64
+    )
+
+
+# NYSE trading days as int64 day numbers
+def nyse_days(start, end):
+    nyse = mcal.get_calendar("NYSE")
+    days = nyse.valid_days(start_date=start, end_date=end)
+    return to_day_numbers(days.tz_localize(None))
+
+
+# Dense date x ticker panel; one contiguous float32 array per field
+class Panel:
+    def __init__(self, dates, tickers, sectors, fields, mask):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.sectors = list(sectors)
+        self.fields = fields
+        self.mask = mask
+        self.col = {t: j for j, t in enumerate(self.tickers)}
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(self.dates.astype("datetime64[D]"))
+
+    # One field as a DataFrame view (no copy of the underlying array)
+    def frame(self, field):
+        return pd.DataFrame(
+            self.fields[field], index=self.index, columns=self.tickers,
+            copy=False
+        )
+
+    def save(self, panel_dir=PANEL_DIR):
+        panel_dir = Path(panel_dir)
+        panel_dir.mkdir(parents=True, exist_ok=True)
+        np.save(panel_dir / "dates.npy", self.dates)
+        np.save(panel_dir / "mask.npy", self.mask)
+        for name, values in self.fields.items():
+            np.save(panel_dir / f"{name}.npy", values)
+        meta = {
+            "tickers": self.tickers,
+            "sectors": self.sectors,
+            "fields": list(self.fields),
+        }
+        (panel_dir / "meta.json").write_text(json.dumps(meta))
+
+    # Memory-mapped load; pages are read on first touch
+    @classmethod
+    def load(cls, panel_dir=PANEL_DIR, fields=None, mmap_mode="r"):
+        panel_dir = Path(panel_dir)
+        meta = json.loads((panel_dir / "meta.json").read_text())
+        fields = fields or meta["fields"]
+        return cls(
+            np.load(panel_dir / "dates.npy"),
+            meta["tickers"],
+            meta["sectors"],
+            {
+                name: np.load(
+                    panel_dir / f"{name}.npy", mmap_mode=mmap_mode
+                )
+                for name in fields
+            },
+            np.load(panel_dir / "mask.npy", mmap_mode=mmap_mode),
+        )
+
+
+# Validated tickers plus the sector ETFs they map to and the market
+# benchmark (full window)
+def load_universe(universe_file=UNIVERSE_FILE):
+    universe = pd.read_csv(
+        universe_file, parse_dates=["StartDate", "EndDate"]
+    ).dropna(subset=["StartDate", "EndDate"])
+    universe["SectorETF"] = universe["SectorETF"].fillna("")
+
+    etfs = sorted(set(universe["SectorETF"]) - {""})
+    etf_rows = pd.DataFrame({
+        "Ticker": etfs + [BENCHMARK],
+        "StartDate": universe["StartDate"].min(),
+        "EndDate": universe["EndDate"].max(),
+        "SectorETF": etfs + [""],
+    })
+    universe = universe[~universe["Ticker"].isin(etf_rows["Ticker"])]
+    return pd.concat([universe, etf_rows], ignore_index=True)
+
+
+# Scatter long-format prices into aligned arrays in one pass. The store
+# names partitions by file stem, so universe symbols are matched through
+# store_ticker() (BRK.B -> BRK-B).
+def build_panel(universe, prices, dates, fields=FIELDS):
+    tickers = universe["Ticker"].tolist()
+    col = pd.Index([store_ticker(t) for t in tickers])
+
+    price_days = to_day_numbers(prices["date"])
+    rows = np.minimum(np.searchsorted(dates, price_days), len(dates) - 1)
+    cols = col.get_indexer(prices["ticker"])
+    ok = (dates[rows] == price_days) & (cols >= 0)
+    rows, cols = rows[ok], cols[ok]
+
+    # Membership window per ticker, as calendar row bounds
+    lo = np.searchsorted(dates, to_day_numbers(universe["StartDate"]))
+    hi = np.searchsorted(
+        dates, to_day_numbers(universe["EndDate"]), side="right"
+    )
+    row_ids = np.arange(len(dates))[:, None]
+    mask = (row_ids >= lo[None, :]) & (row_ids < hi[None, :])
+
+    values = {}
+    for name in fields:
+        arr = np.full((len(dates), len(tickers)), np.nan, dtype=np.float32)
+        arr[rows, cols] = prices[name].to_numpy(
+            np.float32, na_value=np.nan
+        )[ok]
+        arr[~mask] = np.nan
+        values[name] = arr
+
+    return Panel(dates, tickers, universe["SectorETF"].tolist(), values, mask)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the aligned date x ticker price panel."
+    )
+    parser.add_argument("--universe", default=str(UNIVERSE_FILE))
+    parser.add_argument("--store-dir", default=str(STORE_DIR))
+    parser.add_argument("--out", default=str(PANEL_DIR))
+    args = parser.parse_args(argv)
+
+    universe = load_universe(args.universe)
+    dates = nyse_days(universe["StartDate"].min(), universe["EndDate"].max())
+    prices = read_prices(
+        tickers=universe["Ticker"].map(store_ticker), columns=FIELDS,
+        start=universe["StartDate"].min(), end=universe["EndDate"].max(),
+        store_dir=args.store_dir,
+    )
+    panel = build_panel(universe, prices, dates)
+    panel.save(args.out)
+    print(
+        f"Saved panel {len(dates)} dates x {len(panel.tickers)} tickers "
+        f"x {len(FIELDS)} fields -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
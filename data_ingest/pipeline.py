@@ -0,0 +1,390 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+# Config
+STATE_FILE = Path("data/.pipeline_state.json")
+LOCAL_PACKAGES = ("data_ingest", "overlay", "db")
+
+
+def module_path(module):
+    return Path(*module.split(".")).with_suffix(".py")
+
+
+# Source files of a module and of every local module it imports, directly
+# or through other local modules
+def code_files(module):
+    seen, todo = set(), [module]
+    while todo:
+        path = module_path(todo.pop())
+        if path in seen or not path.is_file():
+            continue
+        seen.add(path)
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                # `from pkg import mod` may name a module, not an attribute
+                names = [node.module] + [
+                    f"{node.module}.{alias.name}" for alias in node.names
+                ]
+            else:
+                continue
+            todo += [n for n in names if n.split(".")[0] in LOCAL_PACKAGES]
+    return sorted(seen)
+
+
+# One ingest step: a module run as `python -m module args`. Stages that
+# download up to today set daily=True, so they go stale each new day even
+# when none of their inputs changed.
+@dataclass
+class Stage:
+    name: str
+    module: str
+    inputs: list
+    outputs: list
+    args: list = field(default_factory=list)
+    daily: bool = False
+
+    @property
+    def source(self):
+        return module_path(self.module)
+
+
+STAGES = [
+    Stage(
+        "parse_sp500_changes", "data_ingest.sp500.parse_sp500_changes",
+        inputs=["data/sp500/sp500_changes.txt"],
+        outputs=[
+            "data/sp500/sp500_changes_parsed.csv",
+            "data/sp500/sp500_changes_long.parquet",
+            "data/sp500/sp500_changes_rejects.csv",
+        ],
+    ),
+    Stage(
+        "parse_sp500_current", "data_ingest.sp500.parse_sp500_current",
+        inputs=["data/sp500/sp500_current.txt"],
+        outputs=[
+            "data/sp500/sp500_current_constituents.csv",
+            "data/sp500/sp500_constituents_list.txt",
+        ],
+    ),
+    Stage(
+        "sp500_tickers_post2017", "data_ingest.sp500.sp500_tickers_post2017",
+        inputs=[
+            "data/sp500/sp500_changes_parsed.csv",
+            "data/sp500/sp500_current_constituents.csv",
+        ],
+        outputs=["data/sp500/sp500_all_unique_post2017_tickers.txt"],
+    ),
+    Stage(
+        "sp500_membership", "data_ingest.sp500.membership",
+        inputs=[
+            "data/sp500/sp500_changes_parsed.csv",
+            "data/sp500/sp500_current_constituents.csv",
+        ],
+        outputs=["data/sp500/sp500_membership.npz"],
+    ),
+    Stage(
+        "tiingo_ticker_list", "data_ingest.create_tiingo_final_ticker_list",
+        inputs=["data/sp500/sp500_all_unique_post2017_tickers.txt"],
+        outputs=["data/tiingo/tiingo_all_tickers.txt"],
+    ),
+    Stage(
+        "tiingo_loader", "data_ingest.tiingo_loader",
+        inputs=["data/tiingo/tiingo_all_tickers.txt"],
+        outputs=["data/tiingo/ohlcv"],
+        args=["--incremental"],
+        daily=True,
+    ),
+    Stage(
+        "yfinance_stock_loader", "data_ingest.yfinance_stock_loader",
+        inputs=[],
+        outputs=["data/yfinance/ohlcv"],
+        args=["--incremental"],
+        daily=True,
+    ),
+    Stage(
+        "yfinance_macro_loader", "data_ingest.yfinance_macro_loader",
+        inputs=[],
+        outputs=["data/yfinance/macro"],
+        daily=True,
+    ),
+    Stage(
+        "macro", "data_ingest.macro",
+        inputs=["data/yfinance/macro"],
+        outputs=["data/macro"],
+    ),
+    Stage(
+        "validate_data", "data_ingest.validate_data",
+        inputs=[
+            "data/sp500/sp500_changes_parsed.csv",
+            "data/sp500/sp500_current_constituents.csv",
+            "data/sp500/sp500_all_unique_post2017_tickers.txt",
+            "data/tiingo/tiingo_ignore_tickers.txt",
+            "data/tiingo/tiingo_new_date_ranges.csv",
+            "data/tiingo/ohlcv",
+            "data/yfinance/ohlcv",
+        ],
+        outputs=[
+            "data_ingest/validation_results.csv",
+            "data_ingest/validation_gaps.csv",
+        ],
+    ),
+    Stage(
+        "sectors", "data_ingest.sectors",
+        inputs=[
+            "data/sp500/sp500_current_constituents.csv",
+            "data/sp500/sector_snapshots",
+            "data/sp500/sector_overrides.csv",
+            "data_ingest/sp500_removed_sectors.csv",
+        ],
+        outputs=["data/sp500/sector_history.csv"],
+    ),
+    Stage(
+        "tickers_dates_sectors", "data_ingest.tickers_dates_sectors",
+        inputs=[
+            "data/sp500/sector_history.csv",
+            "data_ingest/validation_results.csv",
+        ],
+        outputs=["data_ingest/final_tickers_dates_sectors.csv"],
+    ),
+    Stage(
+        "xlc_backfill", "data_ingest.xlc_backfill_estimate",
+        inputs=[
+            "data_ingest/index_holdings_xlc.csv",
+            "data/tiingo/ohlcv",
+            "data/yfinance/ohlcv",
+        ],
+        outputs=[
+            "data_ingest/xlc_backfilled_raw.csv",
+            "data_ingest/xlc_backfilled_scaled.csv",
+            "data_ingest/XLC_merged.csv",
+        ],
+    ),
+    Stage(
+        "price_store", "data_ingest.price_store",
+        inputs=[
+            "data/tiingo/ohlcv",
+            "data/yfinance/ohlcv",
+            "data_ingest/XLC_merged.csv",
+            "data/tiingo/ohlcv_backfilled",
+        ],
+        outputs=["data/store"],
+    ),
+    Stage(
+        "panel", "data_ingest.panel",
+        inputs=["data_ingest/final_tickers_dates_sectors.csv", "data/store"],
+        outputs=["data/panel"],
+    ),
+    Stage(
+        "features", "overlay.features",
+        inputs=["data/panel", "data/sp500/sector_history.csv"],
+        outputs=["data/features/v2"],
+    ),
+    Stage(
+        "rolling", "overlay.rolling",
+        inputs=["data/features/v2"],
+        outputs=[
+            "data/features/rolling_state.npz",
+            "data/features/rolling_latest.csv",
+        ],
+    ),
+    Stage(
+        "overlay", "overlay.neutral",
+        inputs=["data/features/v2"],
+        outputs=["data/overlay"],
+    ),
+    Stage(
+        "backtest", "overlay.backtest",
+        inputs=["data/panel", "data/features/v2"],
+        outputs=["data/backtest"],
+    ),
+]
+
+
+# Content hashes, recomputed only when a file's (mtime, size) changes
+class Hasher:
+    def __init__(self, cache, today=None):
+        self.cache = cache
+        self.today = today or date.today()
+
+    def file(self, path):
+        stat = path.stat()
+        key = str(path)
+        entry = self.cache.get(key)
+        if entry and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return entry[2]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        self.cache[key] = [stat.st_mtime_ns, stat.st_size, digest]
+        return digest
+
+    def path(self, path):
+        path = Path(path)
+        if path.is_file():
+            return self.file(path)
+        if path.is_dir():
+            h = hashlib.blake2b(digest_size=16)
+            for child in sorted(p for p in path.rglob("*") if p.is_file()):
+                h.update(str(child.relative_to(path)).encode())
+                h.update(self.file(child).encode())
+            return h.hexdigest()
+        return "missing"
+
+    # Stage fingerprint: its inputs, the source of its module and of the
+    # local modules it imports, its arguments and, for daily stages, the
+    # date (their downloads end today)
+    def stage(self, stage):
+        h = hashlib.blake2b(digest_size=16)
+        for path in [*stage.inputs, *code_files(stage.module)]:
+            h.update(f"{path}={self.path(path)}".encode())
+        h.update(" ".join(stage.args).encode())
+        if stage.daily:
+            h.update(self.today.isoformat().encode())
+        return h.hexdigest()
+
+
+def load_state(state_file=STATE_FILE):
+    if state_file.exists():
+        return json.loads(state_file.read_text())
+    return {"stages": {}, "files": {}}
+
+
+def save_state(state, state_file=STATE_FILE):
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_file.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, state_file)
+
+
+def _produces(upstream, path):
+    path = Path(path)
+    return any(
+        path == Path(out) or Path(out) in path.parents
+        for out in upstream.outputs
+    )
+
+
+# Stage name -> names of stages producing any of its inputs
+def dependencies(stages):
+    return {
+        stage.name: {
+            other.name for other in stages
+            if other is not stage
+            and any(_produces(other, path) for path in stage.inputs)
+        }
+        for stage in stages
+    }
+
+
+def run_stage(stage):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", stage.module, *stage.args],
+        capture_output=True, text=True
+    )
+    return proc, time.perf_counter() - start
+
+
+# Run stages in dependency order, concurrently where independent;
+# a stage whose fingerprint matches the last successful run is skipped
+def run(stages=STAGES, force=(), workers=4, dry_run=False,
+        state_file=STATE_FILE):
+    state = load_state(state_file)
+    hasher = Hasher(state["files"])
+    deps = dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    pending = set(by_name)
+    done, failed = set(), set()
+
+    def ready():
+        return sorted(
+            name for name in pending
+            if deps[name] <= done and not deps[name] & failed
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while True:
+            # Skipping a stage can unblock others, so drain until stable
+            while names := ready():
+                for name in names:
+                    pending.discard(name)
+                    stage = by_name[name]
+                    fresh = (
+                        name not in force
+                        and state["stages"].get(name) == hasher.stage(stage)
+                        and all(Path(out).exists() for out in stage.outputs)
+                    )
+                    if fresh or dry_run:
+                        print(f"[{'SKIP' if fresh else 'WOULD RUN'}] {name}")
+                        done.add(name)
+                        continue
+                    print(f"[RUN] {name}")
+                    running[pool.submit(run_stage, stage)] = name
+
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                proc, elapsed = future.result()
+                if proc.returncode == 0:
+                    print(f"[DONE] {name} ({elapsed:.1f}s)")
+                    state["stages"][name] = hasher.stage(by_name[name])
+                    done.add(name)
+                else:
+                    print(f"[FAILED] {name} ({elapsed:.1f}s)")
+                    print(proc.stderr.strip()[-2000:])
+                    state["stages"].pop(name, None)
+                    failed.add(name)
+            save_state(state, state_file)
+
+            # Stages downstream of a failure never become ready
+            for name in list(pending):
+                if deps[name] & failed:
+                    pending.discard(name)
+                    failed.add(name)
+                    print(f"[BLOCKED] {name}")
+
+    save_state(state, state_file)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the ingest stages, skipping unchanged ones."
+    )
+    parser.add_argument("--force", nargs="*", default=[],
+                        help="Stage names to rerun regardless of hashes")
+    parser.add_argument("--only", nargs="*",
+                        help="Restrict the run to these stages")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    stages = STAGES
+    if args.only:
+        stages = [s for s in STAGES if s.name in set(args.only)]
+    start = time.perf_counter()
+    failed = run(stages, set(args.force), args.workers, args.dry_run)
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
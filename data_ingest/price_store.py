@@ -0,0 +1,228 @@
+import argparse
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from data_ingest.backfill import OUT_DIR as BACKFILL_OUT_DIR
+from data_ingest.prices import (
+    TIINGO_DIR, YFINANCE_DIR, get_file_path, load_file
+)
+
+# Config
+STORE_DIR = Path("data/store/ohlcv/")
+SNAPSHOT_FILE = Path("data/store/ohlcv_universe.arrow")
+# Where <ETF>_merged.csv backfills land: xlc_backfill_estimate writes to
+# data_ingest/, `python -m data_ingest.backfill` to its --out-dir default
+BACKFILL_DIRS = [Path("data_ingest/"), BACKFILL_OUT_DIR]
+
+# Typed schema for the loaders' 13 OHLCV columns
+SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("close", pa.float32()),
+    ("high", pa.float32()),
+    ("low", pa.float32()),
+    ("open", pa.float32()),
+    ("volume", pa.int64()),
+    ("adjClose", pa.float32()),
+    ("adjHigh", pa.float32()),
+    ("adjLow", pa.float32()),
+    ("adjOpen", pa.float32()),
+    ("adjVolume", pa.int64()),
+    ("divCash", pa.float32()),
+    ("splitFactor", pa.float32()),
+])
+COLUMNS = SCHEMA.names
+DEFAULTS = {"divCash": 0.0, "splitFactor": 1.0}
+PARTITIONING = ds.partitioning(
+    pa.schema([("ticker", pa.string())]), flavor="hive"
+)
+
+
+# Partition name of a ticker: its CSV file stem, so BRK.B -> BRK-B
+def store_ticker(ticker):
+    return get_file_path(ticker).stem
+
+
+# Parse ISO timestamps once and cast to the store schema
+def normalize_frame(df):
+    df = df.rename(columns={"Date": "date"})
+    dates = pd.to_datetime(df["date"], format="ISO8601", utc=True)
+    df = df.assign(date=dates.dt.tz_localize(None).dt.normalize())
+    df = (
+        df.dropna(subset=["date"])
+        .drop_duplicates(subset="date", keep="last")
+        .sort_values("date")
+    )
+
+    for col in COLUMNS[1:]:
+        if col not in df.columns:
+            df[col] = DEFAULTS.get(col, float("nan"))
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in ("volume", "adjVolume"):
+        df[col] = df[col].round().astype("Int64")
+
+    return pa.Table.from_pandas(
+        df[COLUMNS], schema=SCHEMA, preserve_index=False
+    )
+
+
+# Write (or replace) one ticker's partition
+def write_ticker(ticker, df, store_dir=STORE_DIR):
+    part_dir = Path(store_dir) / f"ticker={ticker}"
+    part_dir.mkdir(parents=True, exist_ok=True)
+    tmp = part_dir / ".part-0.parquet.tmp"
+    pq.write_table(
+        normalize_frame(df), tmp,
+        compression="zstd", row_group_size=512
+    )
+    os.replace(tmp, part_dir / "part-0.parquet")
+
+
+# Tickers present in the store
+def list_tickers(store_dir=STORE_DIR):
+    store_dir = Path(store_dir)
+    if not store_dir.exists():
+        return []
+    return sorted(
+        p.name.split("=", 1)[1]
+        for p in store_dir.iterdir()
+        if p.is_dir() and p.name.startswith("ticker=")
+    )
+
+
+def _filter(tickers=None, start=None, end=None):
+    expr = None
+    parts = []
+    if tickers is not None:
+        parts.append(pc.field("ticker").isin(list(tickers)))
+    if start is not None:
+        parts.append(pc.field("date") >= pd.Timestamp(start).date())
+    if end is not None:
+        parts.append(pc.field("date") <= pd.Timestamp(end).date())
+    for part in parts:
+        expr = part if expr is None else expr & part
+    return expr
+
+
+# Load selected tickers/columns/date range; filters are pushed into the scan
+def read_prices(tickers=None, columns=None, start=None, end=None,
+                store_dir=STORE_DIR, as_pandas=True):
+    dataset = ds.dataset(
+        store_dir, format="parquet", partitioning=PARTITIONING
+    )
+    columns = ["ticker", "date"] + [
+        c for c in (columns or COLUMNS[1:]) if c not in ("ticker", "date")
+    ]
+    table = dataset.to_table(
+        columns=columns, filter=_filter(tickers, start, end)
+    )
+    return table.to_pandas(date_as_object=False) if as_pandas else table
+
+
+# Persist the whole universe as one uncompressed Arrow IPC file
+def write_snapshot(store_dir=STORE_DIR, snapshot_file=SNAPSHOT_FILE):
+    table = read_prices(store_dir=store_dir, as_pandas=False)
+    table = table.sort_by([("ticker", "ascending"), ("date", "ascending")])
+    tmp = Path(str(snapshot_file) + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, snapshot_file)
+    return table.num_rows
+
+
+# Memory-mapped read of the snapshot; buffers stay on the page cache
+def read_snapshot(tickers=None, columns=None, start=None, end=None,
+                  snapshot_file=SNAPSHOT_FILE, as_pandas=False):
+    source = pa.memory_map(str(snapshot_file), "r")
+    table = ipc.open_file(source).read_all()
+    expr = _filter(tickers, start, end)
+    if expr is not None:
+        table = table.filter(expr)
+    if columns is not None:
+        table = table.select(["ticker", "date"] + list(columns))
+    return table.to_pandas(date_as_object=False) if as_pandas else table
+
+
+# Convert every per-ticker CSV into the store
+def convert_csv_dirs(source_dirs=(TIINGO_DIR, YFINANCE_DIR),
+                     store_dir=STORE_DIR):
+    count = 0
+    for source_dir in source_dirs:
+        for file_path in sorted(Path(source_dir).glob("*.csv")):
+            if file_path.stat().st_size == 0:
+                continue
+            try:
+                df = load_file(file_path).reset_index()
+            except pd.errors.EmptyDataError:
+                continue
+            except ValueError as e:
+                print(f"[SKIP] {e}")
+                continue
+            write_ticker(file_path.stem, df, store_dir)
+            count += 1
+    return count
+
+
+# Every <ETF>_merged.csv in the backfill directories; an ETF found in
+# more than one is spliced from the last
+def find_backfills(backfill_dirs=BACKFILL_DIRS):
+    return [
+        f for d in map(Path, backfill_dirs)
+        for f in sorted(d.glob("*_merged.csv"))
+    ]
+
+
+# Prepend backfilled history (<ETF>_merged.csv from data_ingest.backfill)
+# to each ETF's partition. Only rows before the ETF's first real bar are
+# taken, so a backfill run before the latest download never hides newer
+# real data. Missing backfill files are skipped.
+def add_backfills(backfill_files=None, store_dir=STORE_DIR):
+    if backfill_files is None:
+        backfill_files = find_backfills()
+    count = 0
+    for file_path in map(Path, backfill_files):
+        if not file_path.exists():
+            continue
+        ticker = file_path.stem.removesuffix("_merged")
+        backfill = load_file(file_path)
+        real_file = get_file_path(ticker)
+        if real_file.exists():
+            real = load_file(real_file)
+            backfill = pd.concat(
+                [backfill[backfill.index < real.index.min()], real]
+            )
+        write_ticker(ticker, backfill.reset_index(), store_dir)
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the Parquet OHLCV store from per-ticker CSVs."
+    )
+    parser.add_argument("--store-dir", default=str(STORE_DIR))
+    parser.add_argument("--snapshot", default=str(SNAPSHOT_FILE))
+    parser.add_argument("--backfill", nargs="*", default=None,
+                        help="<ETF>_merged.csv files to splice in; "
+                             "default all in "
+                             + ", ".join(map(str, BACKFILL_DIRS)))
+    args = parser.parse_args(argv)
+
+    count = convert_csv_dirs(store_dir=args.store_dir)
+    print(f"Wrote {count} tickers to {args.store_dir}")
+    spliced = add_backfills(args.backfill, args.store_dir)
+    if spliced:
+        print(f"Spliced {spliced} backfilled histories")
+    rows = write_snapshot(args.store_dir, args.snapshot)
+    print(f"Snapshot {args.snapshot} | Rows: {rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Config
+TIINGO_DIR = Path("data/tiingo/ohlcv/")
+YFINANCE_DIR = Path("data/yfinance/ohlcv/")
+CACHE_DIR = Path("data/cache/prices/")
+MAX_BYTES = int(os.environ.get("PRICE_CACHE_BYTES", 512 * 1024 ** 2))
+
+YFINANCE_TICKERS = {"VTRS", "LIN", "TKO"}
+
+
+# Get file path based on source
+def get_file_path(ticker: str):
+    if ticker in YFINANCE_TICKERS:
+        return YFINANCE_DIR / f"{ticker}.csv"
+    return TIINGO_DIR / f"{ticker.replace('.', '-')}.csv"
+
+
+# Parse one OHLCV CSV into a date-indexed frame (tz-naive dates)
+def parse_ohlcv(file_path):
+    df = pd.read_csv(file_path)
+    if "Date" in df.columns and "date" not in df.columns:
+        df = df.rename(columns={"Date": "date"})
+    if "date" not in df.columns:
+        raise ValueError(f"{Path(file_path).name} has no date column")
+    dates = pd.to_datetime(
+        df["date"], format="ISO8601", errors="coerce", utc=True
+    )
+    df["date"] = dates.dt.tz_localize(None)
+    return df.set_index("date")
+
+
+# Frame size from its dtypes; DataFrame.memory_usage costs more than a
+# cache hit saves. Non-numeric columns count a rough 64 bytes per value.
+def frame_nbytes(df):
+    width = sum(getattr(dtype, "itemsize", 64) for dtype in df.dtypes)
+    return int(df.index.nbytes + len(df) * width)
+
+
+# Parsed frames keyed by source path and (mtime, size), held in a
+# byte-bounded LRU and mirrored to Parquet so later runs skip the CSV parse
+class PriceCache:
+    def __init__(self, max_bytes=MAX_BYTES, cache_dir=CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.frames = OrderedDict()
+        self.nbytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "parses": 0}
+        self.lock = threading.Lock()
+
+    def get(self, file_path):
+        file_path = Path(file_path)
+        st = file_path.stat()
+        version = f"{st.st_mtime_ns}:{st.st_size}"
+        key = str(file_path.resolve())
+
+        with self.lock:
+            entry = self.frames.get(key)
+            if entry is not None and entry[0] == version:
+                self.frames.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+
+        df = self._read_disk(key, version)
+        hit = df is not None
+        if not hit:
+            df = parse_ohlcv(file_path)
+            self._write_disk(key, version, df)
+        self._put(key, version, df, "disk_hits" if hit else "parses")
+        return df
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.nbytes = 0
+
+    def _put(self, key, version, df, source):
+        size = frame_nbytes(df)
+        with self.lock:
+            self.stats[source] += 1
+            old = self.frames.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[2]
+            if size > self.max_bytes:
+                return
+            self.frames[key] = (version, df, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, _, evicted) = self.frames.popitem(last=False)
+                self.nbytes -= evicted
+
+    def _disk_path(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return self.cache_dir / f"{Path(key).stem}-{digest}.parquet"
+
+    def _read_disk(self, key, version):
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            meta = pq.read_schema(path).metadata or {}
+            if meta.get(b"source_version") != version.encode():
+                return None
+            return pq.read_table(path).to_pandas()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+
+    def _write_disk(self, key, version, df):
+        if self.cache_dir is None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._disk_path(key)
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b"source_version": version.encode(),
+        })
+        tmp = path.with_name(
+            f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+
+CACHE = PriceCache()
+
+
+# Rows in [start, end] and the requested fields of one parsed file; the
+# cached frame is shared, so callers always get a new object
+def load_file(file_path, fields=None, start=None, end=None, cache=None):
+    df = (cache or CACHE).get(file_path)
+    if start is not None or end is not None:
+        keep = np.ones(len(df), dtype=bool)
+        if start is not None:
+            keep &= df.index >= pd.Timestamp(start)
+        if end is not None:
+            keep &= df.index <= pd.Timestamp(end)
+        df = df[keep]
+    if fields is not None:
+        return df.reindex(columns=list(fields))
+    return df.copy(deep=False)
+
+
+# Date-indexed OHLCV of one ticker from its Tiingo or yfinance CSV
+def get_prices(ticker, fields=None, start=None, end=None, cache=None):
+    return load_file(get_file_path(ticker), fields, start, end, cache)
@@ -0,0 +1,261 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Config
+CUR_CONSTIT = Path("data/sp500/sp500_current_constituents.csv")
+SNAPSHOT_DIR = Path("data/sp500/sector_snapshots/")
+OVERRIDES_FILE = Path("data/sp500/sector_overrides.csv")
+REMOVED_FILE = Path("data_ingest/sp500_removed_sectors.csv")
+SECTOR_FILE = Path("data/sp500/sector_history.csv")
+
+MIN_DATE = np.datetime64("1900-01-01")
+MAX_DATE = np.datetime64("9999-12-31")
+
+# Sector ETF dictionary
+ETF_MAP = {
+    "Communication Services": "XLC",
+    "Consumer Discretionary": "XLY",
+    "Consumer Staples": "XLP",
+    "Energy": "XLE",
+    "Financials": "XLF",
+    "Health Care": "XLV",
+    "Industrials": "XLI",
+    "Information Technology": "XLK",
+    "Materials": "XLB",
+    "Real Estate": "XLRE",
+    "Utilities": "XLU"
+}
+
+# GICS moves of current and former members: (first day in the new sector,
+# old sector, new sector, tickers). The March 2023 changes took effect
+# after the close on 2023-03-17; renamed symbols are listed under both.
+RECLASSIFICATIONS = [
+    ("2023-03-20", "Information Technology", "Financials", [
+        "V", "MA", "PYPL", "FIS", "FI", "FISV", "GPN", "JKHY", "FLT",
+        "CPAY",
+    ]),
+    ("2023-03-20", "Information Technology", "Industrials", [
+        "ADP", "PAYX", "BR", "CDAY", "DAY", "PAYC",
+    ]),
+    ("2023-03-20", "Consumer Discretionary", "Consumer Staples", [
+        "TGT", "DG", "DLTR",
+    ]),
+]
+
+COLUMNS = ["Ticker", "ValidFrom", "ValidTo", "Sector", "SectorETF", "Source"]
+
+
+# Dated (Ticker, Date, Sector, Source) observations from every source.
+# `removed` holds names no longer in the index with their GICS sector on
+# their last day as a member (Symbol, Date, GICS Sector).
+def observations(current, as_of, snapshots=(), reclassifications=None,
+                 removed=None):
+    parts = [pd.DataFrame({
+        "Ticker": current["Symbol"],
+        "Date": as_of,
+        "Sector": current["GICS Sector"],
+        "Source": "current",
+    })]
+    if removed is not None:
+        parts.append(pd.DataFrame({
+            "Ticker": removed["Symbol"],
+            "Date": removed["Date"],
+            "Sector": removed["GICS Sector"],
+            "Source": "removed",
+        }))
+    for date, snap in snapshots:
+        parts.append(pd.DataFrame({
+            "Ticker": snap["Symbol"],
+            "Date": date,
+            "Sector": snap["GICS Sector"],
+            "Source": "snapshot",
+        }))
+
+    # A move is the old sector on the day before and the new one on the day
+    for date, old, new, tickers in reclassifications or RECLASSIFICATIONS:
+        day = np.datetime64(date, "D")
+        for when, sector in ((day - 1, old), (day, new)):
+            parts.append(pd.DataFrame({
+                "Ticker": tickers,
+                "Date": when,
+                "Sector": sector,
+                "Source": f"gics_{date}",
+            }))
+
+    obs = pd.concat(parts, ignore_index=True)
+    obs["Date"] = obs["Date"].to_numpy("datetime64[D]")
+    obs["Ticker"] = obs["Ticker"].astype(str)
+    return obs.sort_values(["Ticker", "Date"], kind="stable",
+                           ignore_index=True)
+
+
+# Observations -> one row per run of equal sectors. A run holds from its
+# first observation until the next run starts; the first run of a ticker
+# reaches back to MIN_DATE and the last one forward to MAX_DATE. A change
+# seen only between two observations is dated at the later one (for a
+# snapshot vs the current file, as_of), so the old sector is kept until
+# the new one was observed; RECLASSIFICATIONS supplies exact dates.
+def to_intervals(obs):
+    ticker = obs["Ticker"].to_numpy()
+    sector = obs["Sector"].to_numpy()
+    first_of_ticker = np.r_[True, ticker[1:] != ticker[:-1]]
+    starts = first_of_ticker | np.r_[True, sector[1:] != sector[:-1]]
+    runs = obs[starts].reset_index(drop=True)
+
+    new_ticker = first_of_ticker[starts]
+    last_of_ticker = np.r_[new_ticker[1:], True]
+    valid_from = runs["Date"].to_numpy("datetime64[D]").copy()
+    valid_from[new_ticker] = MIN_DATE
+    valid_to = np.r_[valid_from[1:] - 1, MAX_DATE]
+    valid_to[last_of_ticker] = MAX_DATE
+    return pd.DataFrame({
+        "Ticker": runs["Ticker"],
+        "ValidFrom": valid_from,
+        "ValidTo": valid_to,
+        "Sector": runs["Sector"],
+        "SectorETF": runs["Sector"].map(ETF_MAP).fillna(""),
+        "Source": runs["Source"],
+    })
+
+
+# Sector intervals for every ticker any source knows about. Tickers in
+# the overrides file take their intervals from there instead.
+def build_table(current, as_of, snapshots=(), overrides=None,
+                reclassifications=None, removed=None):
+    table = to_intervals(
+        observations(current, as_of, snapshots, reclassifications, removed)
+    )
+    if overrides is not None and len(overrides):
+        manual = pd.DataFrame({
+            "Ticker": overrides["Ticker"].astype(str),
+            "ValidFrom": overrides["ValidFrom"].fillna(str(MIN_DATE))
+            .to_numpy("datetime64[D]"),
+            "ValidTo": overrides["ValidTo"].fillna(str(MAX_DATE))
+            .to_numpy("datetime64[D]"),
+            "Sector": overrides["Sector"],
+            "SectorETF": overrides["Sector"].map(ETF_MAP).fillna(""),
+            "Source": "override",
+        })
+        table = pd.concat(
+            [table[~table["Ticker"].isin(manual["Ticker"])], manual],
+            ignore_index=True,
+        )
+    return table.sort_values(["Ticker", "ValidFrom"], ignore_index=True)
+
+
+# Interval index over the table: rows are sorted by (ticker code,
+# ValidFrom), so one searchsorted on a combined key finds the interval
+# that starts at or before each (ticker, day) query
+class SectorTable:
+    def __init__(self, table):
+        self.table = table.sort_values(
+            ["Ticker", "ValidFrom"], ignore_index=True
+        )
+        self.tickers = pd.Index(self.table["Ticker"].unique())
+        self.etfs = self.table["SectorETF"].fillna("").to_numpy(str)
+        self.code = self.tickers.get_indexer(self.table["Ticker"])
+        self.start = self._days(self.table["ValidFrom"])
+        self.end = self._days(self.table["ValidTo"])
+        self.keys = self._key(self.code, self.start)
+
+    @staticmethod
+    def _days(values):
+        return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+    @staticmethod
+    def _key(code, days):
+        span = int(MAX_DATE.astype(np.int64) - MIN_DATE.astype(np.int64))
+        return code * (span + 1) + (days - MIN_DATE.astype(np.int64))
+
+    # Table row covering each (ticker, day) pair, or -1. Inputs broadcast
+    # against each other; days are datetime64 values or day numbers.
+    def lookup(self, tickers, days):
+        days = np.asarray(days)
+        if days.dtype.kind == "M":
+            days = days.astype("datetime64[D]").astype(np.int64)
+        tickers = np.asarray(tickers, dtype=object)
+        code = self.tickers.get_indexer(tickers.ravel()).reshape(
+            tickers.shape
+        )
+        code, days = np.broadcast_arrays(code, days)
+        if not len(self.keys):
+            return np.full(code.shape, -1)
+        row = np.searchsorted(
+            self.keys, self._key(np.maximum(code, 0), days), side="right"
+        ) - 1
+        row = np.maximum(row, 0)
+        hit = (
+            (code >= 0) & (self.code[row] == code)
+            & (self.start[row] <= days) & (days <= self.end[row])
+        )
+        return np.where(hit, row, -1)
+
+    # Sector ETF per (ticker, day); "" where no interval covers it
+    def etf(self, tickers, days):
+        row = self.lookup(tickers, days)
+        return np.where(row >= 0, self.etfs[np.maximum(row, 0)], "")
+
+    def save(self, sector_file=SECTOR_FILE):
+        self.table[COLUMNS].to_csv(sector_file, index=False)
+
+    @classmethod
+    def load(cls, sector_file=SECTOR_FILE):
+        table = pd.read_csv(sector_file, keep_default_na=False)
+        for col in ("ValidFrom", "ValidTo"):
+            table[col] = table[col].to_numpy("datetime64[D]")
+        return cls(table)
+
+
+# (dates x tickers) sector ETFs for a panel's day numbers; cells with no
+# interval keep the ticker's static SectorETF from `fallback`
+def sector_matrix(table, tickers, days, fallback):
+    etf = table.etf(np.asarray(tickers, dtype=object)[None, :],
+                    np.asarray(days)[:, None])
+    return np.where(etf == "", np.asarray(fallback, dtype=str)[None, :],
+                    etf)
+
+
+# Historical constituent snapshots named YYYY-MM-DD.csv, each with the
+# same Symbol and GICS Sector columns as the current constituents file
+def load_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    return [
+        (np.datetime64(path.stem, "D"),
+         pd.read_csv(path, usecols=["Symbol", "GICS Sector"]))
+        for path in sorted(Path(snapshot_dir).glob("*.csv"))
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the point-in-time sector table."
+    )
+    parser.add_argument("--as-of", default=None,
+                        help="Date of the current constituents file")
+    parser.add_argument("--out", default=str(SECTOR_FILE))
+    args = parser.parse_args(argv)
+
+    current = pd.read_csv(CUR_CONSTIT, usecols=["Symbol", "GICS Sector"])
+    as_of = np.datetime64(args.as_of or pd.Timestamp.today().date(), "D")
+    snapshots = load_snapshots()
+    overrides = (
+        pd.read_csv(OVERRIDES_FILE) if OVERRIDES_FILE.exists() else None
+    )
+    removed = pd.read_csv(REMOVED_FILE)
+
+    table = SectorTable(
+        build_table(current, as_of, snapshots, overrides, removed=removed)
+    )
+    table.save(args.out)
+    moved = table.table["Ticker"].duplicated().sum()
+    print(
+        f"Saved {len(table.table)} sector intervals for "
+        f"{len(table.tickers)} tickers ({moved} sector changes, "
+        f"{len(snapshots)} snapshots) -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Config
+CHANGES_FILE = Path("data/sp500/sp500_changes_parsed.csv")
+CURRENT_FILE = Path("data/sp500/sp500_current_constituents.csv")
+INDEX_FILE = Path("data/sp500/sp500_membership.npz")
+
+# Open-ended intervals end at the largest representable day number
+OPEN_END = np.iinfo(np.int64).max
+EARLIEST = np.datetime64("1957-03-04", "D").astype(np.int64)
+
+
+def day_number(date):
+    return np.datetime64(pd.Timestamp(date).date(), "D").astype(np.int64)
+
+
+def day_numbers(dates):
+    return pd.DatetimeIndex(dates).values.astype("datetime64[D]").astype(
+        np.int64
+    )
+
+
+# Rebuild [start, end) membership intervals by walking the change
+# history backwards from today's constituents
+def build_intervals(changes_df, current_df):
+    open_end = {t: OPEN_END for t in current_df["Symbol"].str.strip()}
+    intervals = []
+
+    changes = changes_df.dropna(subset=["Date"]).sort_values(
+        "Date", ascending=False, kind="stable"
+    )
+    for date, group in changes.groupby("Date", sort=False):
+        day = day_number(date)
+        for ticker in group["AddTicker"].dropna().str.strip():
+            if ticker in open_end:
+                intervals.append((ticker, day, open_end.pop(ticker)))
+        for ticker in group["RemoveTicker"].dropna().str.strip():
+            if ticker and ticker not in open_end:
+                open_end[ticker] = day
+
+    # Members since before the recorded history
+    added = {}
+    if "Date added" in current_df.columns:
+        added = dict(zip(
+            current_df["Symbol"].str.strip(),
+            pd.to_datetime(current_df["Date added"], errors="coerce")
+        ))
+    for ticker, end in open_end.items():
+        start = added.get(ticker) if end == OPEN_END else None
+        start = day_number(start) if pd.notna(start) else EARLIEST
+        intervals.append((ticker, start, end))
+
+    return pd.DataFrame(intervals, columns=["Ticker", "Start", "End"])
+
+
+# Interval index over S&P 500 membership, grouped by ticker
+class MembershipIndex:
+    def __init__(self, tickers, starts, ends):
+        order = np.lexsort((starts, tickers))
+        self.tickers = np.asarray(tickers)[order]
+        self.starts = np.asarray(starts, dtype=np.int64)[order]
+        self.ends = np.asarray(ends, dtype=np.int64)[order]
+
+        # CSR offsets: intervals of symbols[i] are offsets[i]:offsets[i+1]
+        self.symbols, first = np.unique(self.tickers, return_index=True)
+        self.offsets = np.append(first, len(self.tickers))
+
+    @classmethod
+    def from_csv(cls, changes_file=CHANGES_FILE, current_file=CURRENT_FILE):
+        changes_df = pd.read_csv(changes_file, parse_dates=["Date"])
+        current_df = pd.read_csv(current_file)
+        df = build_intervals(changes_df, current_df)
+        return cls(
+            df["Ticker"].to_numpy(str), df["Start"].to_numpy(),
+            df["End"].to_numpy()
+        )
+
+    @classmethod
+    def load(cls, index_file=INDEX_FILE):
+        with np.load(index_file) as data:
+            return cls(data["tickers"], data["starts"], data["ends"])
+
+    def save(self, index_file=INDEX_FILE):
+        np.savez(
+            index_file, tickers=self.tickers,
+            starts=self.starts, ends=self.ends
+        )
+
+    def _slice(self, ticker):
+        i = np.searchsorted(self.symbols, ticker)
+        if i == len(self.symbols) or self.symbols[i] != ticker:
+            return slice(0, 0)
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    # Membership intervals of one ticker as (start, end-exclusive) dates
+    def intervals(self, ticker):
+        s = self._slice(ticker)
+        return [
+            (np.datetime64(int(a), "D"),
+             None if b == OPEN_END else np.datetime64(int(b), "D"))
+            for a, b in zip(self.starts[s], self.ends[s])
+        ]
+
+    # O(log k) point lookup within the ticker's own intervals
+    def is_member(self, ticker, date):
+        s = self._slice(ticker)
+        day = day_number(date)
+        k = np.searchsorted(self.starts[s], day, side="right") - 1
+        return bool(k >= 0 and self.ends[s][k] > day)
+
+    # Tickers in the index on `date`
+    def universe_on(self, date):
+        day = day_number(date)
+        hit = (self.starts <= day) & (self.ends > day)
+        return sorted(set(self.tickers[hit].tolist()))
+
+    # Tickers that were members at any point in [start, end]
+    def members_between(self, start, end):
+        hit = (
+            (self.starts <= day_number(end))
+            & (self.ends > day_number(start))
+        )
+        return sorted(set(self.tickers[hit].tolist()))
+
+    # Boolean (date x ticker) membership mask for a whole backtest
+    def mask(self, dates, tickers=None):
+        tickers = self.symbols if tickers is None else np.asarray(tickers)
+        days = day_numbers(dates)
+
+        col = {t: j for j, t in enumerate(tickers)}
+        keep = np.array([t in col for t in self.tickers], dtype=bool)
+        cols = np.array([col[t] for t in self.tickers[keep]], dtype=np.int64)
+        lo = np.searchsorted(days, self.starts[keep])
+        hi = np.searchsorted(days, self.ends[keep])
+
+        # Difference array over dates, one column per ticker
+        diff = np.zeros((len(days) + 1, len(tickers)), dtype=np.int32)
+        np.add.at(diff, (lo, cols), 1)
+        np.add.at(diff, (hi, cols), -1)
+        return np.cumsum(diff[:-1], axis=0) > 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the point-in-time S&P 500 membership index."
+    )
+    parser.add_argument("--out", default=str(INDEX_FILE))
+    args = parser.parse_args(argv)
+
+    index = MembershipIndex.from_csv()
+    index.save(args.out)
+    print(
+        f"Saved {len(index.tickers)} intervals for "
+        f"{len(index.symbols)} tickers -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,145 @@
+import argparse
 import re
-import pandas as pd
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+# Config
 INPUT_FILE = Path("data/sp500/sp500_changes.txt")
 OUTPUT_FILE = Path("data/sp500/sp500_changes_parsed.csv")
+LONG_FILE = Path("data/sp500/sp500_changes_long.parquet")
+REJECTS_FILE = Path("data/sp500/sp500_changes_rejects.csv")
+HEADER_LINES = 2
+
+WIDE_COLUMNS = [
+    "Date", "AddTicker", "AddSecurity", "RemoveTicker", "RemoveSecurity",
+    "Reason"
+]
+LONG_COLUMNS = ["Ticker", "Date", "Action", "Security", "Reason", "Line"]
+
+# One table row, tab-separated. Rows sharing the previous row's date
+# (a rowspan on the Wikipedia page) have no date cell or an empty one,
+# and a trailing Reason cell can be missing the same way.
+DATE = r"[A-Z][a-z]+ \d{1,2}, \d{4}|\d{4}-\d{2}-\d{2}"
+TICKER = r"[A-Z0-9][A-Z0-9.\-]*|"
+ROW = re.compile(
+    rf"^(?:(?P<Date>{DATE})?\t)?"
+    rf"(?P<AddTicker>{TICKER})\t(?P<AddSecurity>[^\t]*)\t"
+    rf"(?P<RemoveTicker>{TICKER})\t(?P<RemoveSecurity>[^\t]*)"
+    r"(?:\t(?P<Reason>[^\t]*))?$"
+)
+FOOTNOTE = re.compile(r"\[\d+\]")
+MULTI_SPACE = re.compile(r" {2,}")
+
 
-# Load the S&P 500 changes history text file
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    history_text = f.read()
-
-# Parse the S&P 500 changes history from Wikipedia
-rows = []
-for line in history_text.strip().splitlines()[2:]:
-    clean = re.sub(r' {2,}', '\t', line)
-    parts = clean.split('\t')
-    parts += [''] * (6 - len(parts))
-    date, add_tkr, add_sec, rem_tkr, rem_sec, reason = parts[:6]
-    rows.append({
-        "Date": date.strip(),
-        "AddTicker": add_tkr.strip(),
-        "AddSecurity": add_sec.strip(),
-        "RemoveTicker": rem_tkr.strip(),
-        "RemoveSecurity": rem_sec.strip(),
-        "Reason": re.sub(r'\[\d+]', '', reason).strip()
+# Raw lines -> (wide frame in source order, rejected lines)
+def parse_lines(lines, first_line=1):
+    raw = pd.Series(lines, dtype=object).str.rstrip("\r\n")
+    line_no = pd.RangeIndex(first_line, first_line + len(raw))
+    raw.index = line_no
+
+    # Lines without tabs fall back to runs of spaces as the separator
+    text = raw.where(
+        raw.str.contains("\t", regex=False),
+        raw.str.replace(MULTI_SPACE, "\t", regex=True),
+    )
+    blank = text.str.strip() == ""
+    fields = text[~blank].str.extract(ROW)
+    matched = fields["AddSecurity"].notna()
+
+    for col in WIDE_COLUMNS[1:]:
+        fields[col] = (
+            fields[col].fillna("")
+            .str.replace(FOOTNOTE, "", regex=True)
+            .str.strip()
+        )
+    dates = fields["Date"].where(matched).ffill()
+    parsed = pd.to_datetime(dates, format="%B %d, %Y", errors="coerce")
+    iso = dates.str.match(r"\d{4}-", na=False)
+    parsed[iso] = pd.to_datetime(dates[iso], format="%Y-%m-%d",
+                                 errors="coerce")
+    fields["Date"] = parsed
+
+    no_ticker = (fields["AddTicker"] == "") & (fields["RemoveTicker"] == "")
+    problem = pd.Series("", index=fields.index, dtype=object)
+    problem[no_ticker] = "no ticker"
+    problem[fields["Date"].isna()] = "invalid date"
+    problem[dates.isna()] = "no date"
+    problem[~matched] = "unparseable row"
+
+    ok = problem == ""
+    rejects = pd.DataFrame({
+        "Line": fields.index[~ok],
+        "Problem": problem[~ok].to_numpy(),
+        "Text": raw[fields.index[~ok]].to_numpy(),
     })
+    wide = fields.loc[ok, WIDE_COLUMNS]
+    return wide, rejects
+
+
+# Wide rows -> one row per add/remove, sorted by (Ticker, Date)
+def to_long(wide):
+    parts = []
+    for action, prefix in (("add", "Add"), ("remove", "Remove")):
+        part = wide[wide[f"{prefix}Ticker"] != ""]
+        parts.append(pd.DataFrame({
+            "Ticker": part[f"{prefix}Ticker"].to_numpy(),
+            "Date": part["Date"].to_numpy(),
+            "Action": action,
+            "Security": part[f"{prefix}Security"].to_numpy(),
+            "Reason": part["Reason"].to_numpy(),
+            "Line": part.index.to_numpy(np.int32),
+        }))
+    long = pd.concat(parts, ignore_index=True)
+    long["Ticker"] = long["Ticker"].astype(str)
+    long["Action"] = pd.Categorical(
+        long["Action"], categories=["add", "remove"]
+    )
+    return long.sort_values(
+        ["Ticker", "Date", "Action"], kind="stable", ignore_index=True
+    )[LONG_COLUMNS]
+
+
+# Long table as written by main(), ready for changes_for()
+def load_changes(long_file=LONG_FILE):
+    return pd.read_parquet(long_file)
+
+
+# Rows of one ticker via binary search on the sorted Ticker column
+def changes_for(long, ticker):
+    tickers = long["Ticker"].to_numpy()
+    lo = np.searchsorted(tickers, ticker, side="left")
+    hi = np.searchsorted(tickers, ticker, side="right")
+    return long.iloc[lo:hi]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Parse the S&P 500 change history table."
+    )
+    parser.add_argument("--input", default=str(INPUT_FILE))
+    args = parser.parse_args(argv)
+
+    # Load the S&P 500 changes history text file (two header lines)
+    with open(args.input, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()[HEADER_LINES:]
+
+    wide, rejects = parse_lines(lines, first_line=HEADER_LINES + 1)
+    long = to_long(wide)
+
+    # Wide file keeps the original layout for existing readers
+    wide.to_csv(OUTPUT_FILE, index=False, date_format="%Y-%m-%d")
+    long.to_parquet(LONG_FILE, index=False)
+    rejects.to_csv(REJECTS_FILE, index=False)
+
+    print(f"Saved {len(wide):,} rows -> {OUTPUT_FILE}")
+    print(f"Saved {len(long):,} add/remove events -> {LONG_FILE}")
+    if len(rejects):
+        print(f"{len(rejects)} lines could not be parsed -> {REJECTS_FILE}")
+        for line, problem, text in rejects.head(10).itertuples(index=False):
+            print(f"  line {line}: {problem}: {text[:60]}")
 
-df = pd.DataFrame(rows)
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-print(df)
 
-# Save as CSV
-df.to_csv(OUTPUT_FILE, index=False)
-print(f"Saved {len(df):,} rows -> {OUTPUT_FILE}")
+if __name__ == "__main__":
+    main()
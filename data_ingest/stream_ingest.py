@@ -0,0 +1,222 @@
+import argparse
+import os
+from pathlib import Path
+
+import pandas as pd
+import psycopg2
+import pyarrow.parquet as pq
+
+from db.bulk_loader import (
+    DATA_DIR, PRICE_TABLES, TABLES, copy_upsert, dsn_from_credentials,
+    ensure_partitions, prepare_ohlcv, refresh_sector_members, route_files
+)
+from data_ingest.instrument import span, write_report
+from data_ingest.price_store import (
+    COLUMNS as STORE_COLUMNS, SCHEMA, STORE_DIR, normalize_frame
+)
+
+# Config
+SOURCE_DIRS = [Path("data/tiingo/ohlcv/"), Path("data/yfinance/ohlcv/")]
+CHUNK_ROWS = 50_000
+
+# Lower-case column name -> store column name
+STORE_NAMES = {col.lower(): col for col in STORE_COLUMNS}
+
+
+# Yield (ticker, chunk) pairs; at most one chunk is in memory at a time
+def iter_chunks(files, chunksize=CHUNK_ROWS):
+    for file_path in files:
+        file_path = Path(file_path)
+        if file_path.stat().st_size == 0:
+            continue
+        try:
+            reader = pd.read_csv(file_path, chunksize=chunksize)
+            for chunk in reader:
+                yield file_path.stem, chunk
+        except pd.errors.EmptyDataError:
+            continue
+
+
+# Lower-case columns, parse dates, drop rows that fail basic checks
+def normalize_chunk(chunk, stats=None):
+    chunk = chunk.rename(columns=str.lower)
+    dates = pd.to_datetime(
+        chunk["date"], format="ISO8601", errors="coerce", utc=True
+    )
+    chunk = chunk.assign(date=dates.dt.tz_localize(None).dt.normalize())
+
+    close = pd.to_numeric(chunk.get("close"), errors="coerce")
+    high = pd.to_numeric(chunk.get("high"), errors="coerce")
+    low = pd.to_numeric(chunk.get("low"), errors="coerce")
+    bad = chunk["date"].isna() | close.isna() | (high < low)
+
+    if stats is not None:
+        stats["rows"] = stats.get("rows", 0) + len(chunk)
+        stats["rejected"] = stats.get("rejected", 0) + int(bad.sum())
+    return chunk[~bad]
+
+
+# Appends each ticker's chunks to its store partition via a ParquetWriter.
+# Each ticker's partition is rewritten from its file, so only rows within
+# the stream need deduping: normalize_frame() handles repeats inside a
+# chunk, and rows dated at or before the last one written (a repeat across
+# a chunk boundary, or out of order) are dropped. A partition is only
+# replaced once its ticker is complete: commit() publishes the temp file,
+# abort() discards it and leaves the old partition in place.
+class StoreSink:
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self.ticker = None
+        self.writer = None
+        self.last_date = None
+
+    def write(self, ticker, chunk):
+        if ticker != self.ticker:
+            self.commit()
+            part_dir = self.store_dir / f"ticker={ticker}"
+            part_dir.mkdir(parents=True, exist_ok=True)
+            self.ticker = ticker
+            self.tmp = part_dir / ".part-0.parquet.tmp"
+            self.writer = pq.ParquetWriter(
+                self.tmp, SCHEMA, compression="zstd"
+            )
+        if self.last_date is not None:
+            chunk = chunk[chunk["date"] > self.last_date]
+        if chunk.empty:
+            return
+        self.last_date = chunk["date"].max()
+        chunk = chunk.rename(columns=STORE_NAMES)
+        self.writer.write_table(normalize_frame(chunk), row_group_size=512)
+
+    def commit(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp, self.tmp.parent / "part-0.parquet")
+        self._reset()
+
+    def abort(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.tmp.unlink(missing_ok=True)
+        self._reset()
+
+    def _reset(self):
+        self.ticker = None
+        self.writer = None
+        self.last_date = None
+
+
+# COPY + upsert one ticker at a time through the bulk loader's staging
+# path. `routes` maps each ticker to its table as the bulk loader routes
+# files (route_files); other tickers are skipped. On close,
+# sector_member_prices is refreshed from the earliest changed date. Each
+# chunk's upsert commits on its own, so abort() also refreshes for the
+# rows that landed before the failure.
+class PostgresSink:
+    def __init__(self, dsn, routes, schema="quant"):
+        self.conn = psycopg2.connect(dsn)
+        self.routes = routes
+        self.schema = schema
+        self.years = {}
+        self.since = None
+
+    def write(self, ticker, chunk):
+        table = self.routes.get(ticker)
+        if table is None:
+            return
+        key, columns = TABLES[table]
+        chunk = chunk.assign(**{key: ticker})
+        chunk["date"] = chunk["date"].dt.date
+        for col in ("volume", "adjvolume"):
+            if col in chunk.columns:
+                chunk[col] = chunk[col].round().astype("Int64")
+        first, last = chunk["date"].min(), chunk["date"].max()
+        coded = table in PRICE_TABLES
+        years = self.years.setdefault(table, set())
+        if coded and not {first.year, last.year} <= years:
+            ensure_partitions(self.conn, table, first, last, self.schema)
+            years.update(range(first.year, last.year + 1))
+        _, changed = copy_upsert(
+            self.conn, table, [chunk.reindex(columns=columns)], self.schema
+        )
+        if coded and changed is not None:
+            self.since = changed if self.since is None else min(
+                self.since, changed
+            )
+
+    def commit(self):
+        try:
+            if self.since is not None:
+                refresh_sector_members(self.conn, self.since, self.schema)
+        finally:
+            self.conn.close()
+
+    def abort(self):
+        self.commit()
+
+
+# Ticker -> table and the files to stream for the OHLCV tables, as
+# routed by the bulk loader
+def postgres_routes(data_dir=DATA_DIR):
+    routes, files = {}, []
+    for table, prepare, table_files in route_files(data_dir):
+        if prepare is not prepare_ohlcv:
+            continue
+        for f in table_files:
+            routes[f.stem] = table
+        files += table_files
+    return routes, files
+
+
+# Stream every file through normalize/validate into the sink; the sink
+# commits on success and aborts the ticker in progress on any error
+def ingest(files, sink, chunksize=CHUNK_ROWS):
+    stats = {}
+    try:
+        for ticker, chunk in iter_chunks(files, chunksize):
+            chunk = normalize_chunk(chunk, stats)
+            if not chunk.empty:
+                sink.write(ticker, chunk)
+    except BaseException:
+        sink.abort()
+        raise
+    sink.commit()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Stream OHLCV CSVs into the store or PostgreSQL."
+    )
+    parser.add_argument("--sink", choices=["store", "postgres"],
+                        default="store")
+    parser.add_argument("--source-dir", action="append")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--store-dir", default=str(STORE_DIR))
+    parser.add_argument("--dsn")
+    parser.add_argument("--data-dir", default=str(DATA_DIR),
+                        help="Postgres sink: route files under this dir")
+    args = parser.parse_args(argv)
+
+    if args.sink == "store":
+        source_dirs = [Path(d) for d in args.source_dir or SOURCE_DIRS]
+        files = [f for d in source_dirs for f in sorted(d.glob("*.csv"))]
+        sink = StoreSink(args.store_dir)
+    else:
+        routes, files = postgres_routes(args.data_dir)
+        sink = PostgresSink(args.dsn or dsn_from_credentials(), routes)
+
+    try:
+        with span(f"stream_ingest_{args.sink}") as s:
+            stats = ingest(files, sink, args.chunksize)
+            s.add_rows(stats.get("rows", 0))
+    finally:
+        write_report("stream_ingest")
+    print(
+        f"Streamed {stats.get('rows', 0)} rows from {len(files)} files, "
+        f"rejected {stats.get('rejected', 0)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_ingest.adjust import future_product
+from data_ingest.backfill import COLUMNS
+from data_ingest.prices import YFINANCE_TICKERS
+from data_ingest.sectors import ETF_MAP
+
+# Config
+OUT_DIR = Path("data/synthetic/")
+START_DATE = "2017-01-03"
+
+# Per-bar event probabilities
+SPLIT_PROB = 1 / 2000
+DIV_PROB = 1 / 63
+GAP_TICKER_SHARE = 0.2
+DIV_YIELD = 0.005
+SPLIT_RATIOS = [2.0, 3.0, 0.5]
+
+# Share of tickers removed from (and added to) the index in the window
+CHANGE_SHARE = 0.1
+
+
+# A generated universe, held in memory; write_universe() puts it on disk
+@dataclass
+class Universe:
+    tickers: list
+    dates: pd.DatetimeIndex
+    sectors: dict
+    prices: dict
+    changes: pd.DataFrame
+    current: pd.DataFrame
+    holdings: dict
+
+    # Date-indexed frames as returned by prices.load_file()
+    def stock_data(self):
+        out = {}
+        for ticker, df in self.prices.items():
+            df = df.assign(
+                date=pd.to_datetime(df["date"]).dt.tz_localize(None)
+            )
+            out[ticker] = df.set_index("date")
+        return out
+
+
+# N distinct upper-case symbols; a few carry a share class suffix.
+# Real sector ETF and yfinance symbols are skipped, since loaders route
+# those to other directories and tables.
+def ticker_names(n):
+    reserved = set(ETF_MAP.values()) | YFINANCE_TICKERS
+    total = n + len(reserved)
+    width = max(3, int(np.ceil(np.log(max(total, 2)) / np.log(26))) + 1)
+    codes = np.arange(total) * 7919 % (26 ** width)
+    letters = np.empty((total, width), dtype="U1")
+    for k in range(width):
+        letters[:, width - 1 - k] = np.array(
+            list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        )[codes // 26 ** k % 26]
+    names = [t for t in ("".join(row) for row in letters)
+             if t not in reserved][:n]
+    return [f"{t}.B" if i % 97 == 96 else t for i, t in enumerate(names)]
+
+
+# (days x tickers) OHLCV matrices with splits and dividends, Tiingo style:
+# raw prices jump at splits, adj* columns are back-adjusted
+def price_matrices(n_days, n_tickers, rng):
+    shape = (n_days, n_tickers)
+    log_ret = rng.normal(0.0003, 0.02, shape)
+    adj_close = 50.0 * rng.lognormal(0.0, 0.5, n_tickers) * np.exp(
+        np.cumsum(log_ret, axis=0)
+    )
+
+    split = np.where(
+        rng.random(shape) < SPLIT_PROB,
+        rng.choice(SPLIT_RATIOS, shape),
+        1.0,
+    )
+    has_div = rng.random(shape) < DIV_PROB
+    split[0] = 1.0
+    has_div[0] = False
+
+    split_ratio = future_product(split)
+    ratio = split_ratio / future_product(np.where(has_div, 1 - DIV_YIELD, 1))
+    close = adj_close * ratio
+    spread = np.abs(rng.normal(0.0, 0.01, shape))
+    high = close * (1 + spread)
+    low = close * (1 - spread)
+    open_ = low + (high - low) * rng.random(shape)
+    volume = np.round(rng.lognormal(13.0, 1.0, shape))
+
+    prev_close = np.vstack([close[:1], close[:-1]])
+    return {
+        "close": close,
+        "high": high,
+        "low": low,
+        "open": open_,
+        "volume": volume,
+        "adjClose": adj_close,
+        "adjHigh": high / ratio,
+        "adjLow": low / ratio,
+        "adjOpen": open_ / ratio,
+        "adjVolume": np.round(volume * split_ratio),
+        "divCash": np.where(has_div, DIV_YIELD * prev_close, 0.0),
+        "splitFactor": split,
+    }
+
+
+# Random removals/additions -> changes frame, per-ticker first/last day
+# index, positions of removed tickers
+def index_changes(tickers, dates, rng):
+    n = len(tickers)
+    n_days = len(dates)
+    start = np.zeros(n, dtype=np.int64)
+    end = np.full(n, n_days - 1, dtype=np.int64)
+
+    k = min(int(n * CHANGE_SHARE), n // 2)
+    order = rng.permutation(n)
+    removed, added = order[:k], order[k:2 * k]
+    event_day = rng.integers(1, max(n_days - 1, 2), k)
+    end[removed] = event_day - 1
+    start[added] = event_day
+
+    names = np.array(tickers, dtype=object)
+    changes = pd.DataFrame({
+        "Date": dates[event_day],
+        "AddTicker": names[added],
+        "AddSecurity": [f"{t} Inc." for t in names[added]],
+        "RemoveTicker": names[removed],
+        "RemoveSecurity": [f"{t} Inc." for t in names[removed]],
+        "Reason": "Market capitalization change.",
+    }).sort_values("Date", ascending=False, ignore_index=True)
+    return changes, start, end, removed
+
+
+# Random 1-5 day holes in a share of the tickers
+def gap_mask(n_days, n_tickers, rng):
+    gaps = np.zeros((n_days, n_tickers), dtype=bool)
+    cols = np.flatnonzero(rng.random(n_tickers) < GAP_TICKER_SHARE)
+    first = rng.integers(0, n_days, len(cols))
+    length = rng.integers(1, 6, len(cols))
+    for j, s, n in zip(cols, first, length):
+        gaps[s:s + n, j] = True
+    return gaps
+
+
+# Long matrices -> one Tiingo-format frame per ticker
+def split_frames(tickers, dates, matrices, keep):
+    date_str = dates.strftime("%Y-%m-%dT00:00:00.000Z").to_numpy()
+    col, row = np.nonzero(keep.T)
+    long = pd.DataFrame({"date": date_str[row]})
+    for name in COLUMNS:
+        long[name] = matrices[name].T[keep.T]
+    for name in ("volume", "adjVolume"):
+        long[name] = long[name].astype(np.int64)
+
+    bounds = np.searchsorted(col, np.arange(len(tickers) + 1))
+    return {
+        ticker: long.iloc[bounds[j]:bounds[j + 1]].reset_index(drop=True)
+        for j, ticker in enumerate(tickers)
+        if bounds[j + 1] > bounds[j]
+    }
+
+
+# SPDR-style holdings of one sector, weighted by random market cap
+def holdings_frame(symbols, rng):
+    cap = rng.lognormal(0.0, 1.0, len(symbols))
+    weight = 100 * cap / cap.sum()
+    return pd.DataFrame({
+        "Symbol": symbols,
+        "Company Name": [f"{t} Inc." for t in symbols],
+        "Index Weight": [f"{w:.2f}%" for w in weight],
+    })
+
+
+def generate_universe(n_tickers, n_days=252, start=START_DATE, seed=0):
+    rng = np.random.default_rng(seed)
+    tickers = ticker_names(n_tickers)
+    dates = pd.bdate_range(start, periods=n_days)
+    sector_names = np.array(list(ETF_MAP))
+    sectors = dict(zip(
+        tickers, sector_names[rng.integers(0, len(sector_names), n_tickers)]
+    ))
+
+    changes, first, last, removed = index_changes(tickers, dates, rng)
+    day = np.arange(n_days)[:, None]
+    keep = (day >= first) & (day <= last)
+    keep &= ~gap_mask(n_days, n_tickers, rng)
+    matrices = price_matrices(n_days, n_tickers, rng)
+    prices = split_frames(tickers, dates, matrices, keep)
+
+    is_current = np.ones(n_tickers, dtype=bool)
+    is_current[removed] = False
+    listed = pd.to_datetime("1990-01-01") + pd.to_timedelta(
+        rng.integers(0, 9000, n_tickers), unit="D"
+    )
+    added = np.where(first > 0, dates[first], listed)
+    current = pd.DataFrame({
+        "Symbol": tickers,
+        "Security": [f"{t} Inc." for t in tickers],
+        "GICS Sector": [sectors[t] for t in tickers],
+        "Date added": pd.DatetimeIndex(added).strftime("%Y-%m-%d"),
+    })[is_current].reset_index(drop=True)
+
+    holdings = {
+        etf: holdings_frame(
+            current.loc[current["GICS Sector"] == sector, "Symbol"].tolist(),
+            rng,
+        )
+        for sector, etf in ETF_MAP.items()
+    }
+    return Universe(tickers, dates, sectors, prices, changes, current,
+                    holdings)
+
+
+# Same layout as data/: tiingo/ohlcv, sp500 change/constituent tables and
+# SPDR holdings files
+def write_universe(universe, out_dir=OUT_DIR):
+    out_dir = Path(out_dir)
+    ohlcv_dir = out_dir / "tiingo" / "ohlcv"
+    sp500_dir = out_dir / "sp500"
+    holdings_dir = out_dir / "holdings"
+    for folder in (ohlcv_dir, sp500_dir, holdings_dir):
+        folder.mkdir(parents=True, exist_ok=True)
+
+    for ticker, df in universe.prices.items():
+        name = ticker.replace(".", "-")
+        df.to_csv(ohlcv_dir / f"{name}.csv", index=False)
+
+    universe.changes.to_csv(
+        sp500_dir / "sp500_changes_parsed.csv", index=False
+    )
+    universe.current.to_csv(
+        sp500_dir / "sp500_current_constituents.csv", index=False
+    )
+    for etf, df in universe.holdings.items():
+        holdings_file = holdings_dir / f"index_holdings_{etf.lower()}.csv"
+        with open(holdings_file, "w", encoding="utf-8-sig") as f:
+            f.write(f"Index Holdings and weightings for {etf},,\n")
+            df.to_csv(f, index=False)
+    return out_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic Tiingo-format universe."
+    )
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--start", default=START_DATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default=str(OUT_DIR))
+    args = parser.parse_args(argv)
+
+    universe = generate_universe(
+        args.tickers, args.days, args.start, args.seed
+    )
+    out_dir = write_universe(universe, args.out_dir)
+    rows = sum(len(df) for df in universe.prices.values())
+    print(
+        f"Wrote {len(universe.prices)} tickers ({rows} bars), "
+        f"{len(universe.changes)} index changes -> {out_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,55 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from data_ingest.sectors import MAX_DATE, SECTOR_FILE, SectorTable
+
 # Paths
-CUR_CONSTIT = Path("data/sp500/sp500_current_constituents.csv")
 VALID_RESULTS = Path("data_ingest/validation_results.csv")
 OUT_FILE = Path("data_ingest/final_tickers_dates_sectors.csv")
 
-# Sector ETF dictionary
-ETF_MAP = {
-    "Communication Services": "XLC",
-    "Consumer Discretionary": "XLY",
-    "Consumer Staples": "XLP",
-    "Energy": "XLE",
-    "Financials": "XLF",
-    "Health Care": "XLV",
-    "Industrials": "XLI",
-    "Information Technology": "XLK",
-    "Materials": "XLB",
-    "Real Estate": "XLRE",
-    "Utilities": "XLU"
-}
 
-# Load current S&P-500 constituents & keep sector info
-cur = (
-    pd.read_csv(CUR_CONSTIT, usecols=["Symbol", "GICS Sector"])
-    .rename(columns={"Symbol": "Ticker", "GICS Sector": "Sector"})
-)
+# Validation results + point-in-time sector table -> Ticker, StartDate,
+# EndDate, SectorETF as of each ticker's last day in the window. Rows
+# without an EndDate (Error/Missing-File) take the ticker's latest
+# interval; tickers no source covers get a blank SectorETF.
+def map_sectors(base, table):
+    end = pd.to_datetime(base["EndDate"]).to_numpy("datetime64[D]")
+    end = np.where(np.isnat(end), MAX_DATE, end)
+    final = base.assign(SectorETF=table.etf(base["Ticker"].to_numpy(), end))
+    return final[["Ticker", "StartDate", "EndDate", "SectorETF"]]
 
-# Load validation results
-base = pd.read_csv(VALID_RESULTS)
 
-# Attach sector & map to ETF (left join)
-final = (
-    base.merge(cur, on="Ticker", how="left")
-    .assign(
-        SectorETF=lambda d: d["Sector"]
-        .map(ETF_MAP)
-        .fillna("")
-    )
-)
+def main():
+    # Load the point-in-time sector table (python -m data_ingest.sectors)
+    table = SectorTable.load(SECTOR_FILE)
+
+    # Load validation results
+    base = pd.read_csv(VALID_RESULTS)
 
-blanks = final.loc[final["SectorETF"] == "", "Ticker"]
-print(
-    f"{len(blanks)} tickers have no SectorETF "
-    "(no longer in current S&P 500)."
-)
+    # Sector ETF as of each ticker's end date (interval lookup)
+    final = map_sectors(base, table)
 
-# Save final results
-final[["Ticker", "StartDate", "EndDate", "SectorETF"]].to_csv(
-    OUT_FILE,
-    index=False
-)
-print(f"File written: {OUT_FILE}")
+    # Save final results
+    final.to_csv(OUT_FILE, index=False)
+    print(f"File written: {OUT_FILE}")
+
+    # Show blanks
+    blanks = final.loc[final["SectorETF"] == "", "Ticker"]
+
+    print(
+        f"{len(blanks)} tickers have no SectorETF "
+        "(not in any sector source)."
+    )
 
-# Show blanks
-blanks = final.loc[final["SectorETF"] == "", "Ticker"]
+    # List tickers
+    if len(blanks):
+        print("Tickers missing SectorETF:")
+        for t in sorted(blanks):
+            print("  •", t)
+    else:
+        print("Great! No blanks")
 
-print(
-    f"{len(blanks)} tickers have no SectorETF "
-    "(no longer in current S&P 500)."
-)
 
-# List tickers
-if len(blanks):
-    print("Tickers missing SectorETF:")
-    for t in sorted(blanks):
-        print("  •", t)
-else:
-    print("Great! No blanks")
+if __name__ == "__main__":
+    main()
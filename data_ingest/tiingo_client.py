@@ -0,0 +1,205 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from data_ingest.incremental import (
+    append_atomic, last_stored_date, needs_full_refresh, rows_after,
+    write_atomic
+)
+
+# Config
+BASE_URL = "https://api.tiingo.com"
+START_DATE_DEFAULT = "2017-01-01"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# Replace '.' with '-' for Tiingo compatibility
+def tiingo_safe_ticker(tkr):
+    return tkr.replace('.', '-')
+
+
+# Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# Set of finished tickers persisted after every download. The set belongs
+# to one run, keyed by its request parameters and end date; a checkpoint
+# left by a different run (e.g. yesterday's) starts empty.
+class Checkpoint:
+    def __init__(self, path, run=""):
+        self.path = Path(path)
+        self.run = run
+        self.lock = threading.Lock()
+        self.done = set()
+        if self.path.exists():
+            saved = json.loads(self.path.read_text())
+            if saved.get("run", "") == run:
+                self.done = set(saved["done"])
+
+    def mark(self, ticker):
+        with self.lock:
+            self.done.add(ticker)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(
+                json.dumps({"run": self.run, "done": sorted(self.done)})
+            )
+            tmp.replace(self.path)
+
+    def clear(self):
+        self.done = set()
+        self.path.unlink(missing_ok=True)
+
+
+# Pooled session shared by all worker threads
+def make_session(api_key, pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Authorization": f"Token {api_key}"})
+    return session
+
+
+# Seconds to wait before retry `attempt`, honouring Retry-After
+def backoff_delay(attempt, resp=None, base=1.0, cap=60.0):
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return min(cap, base * 2 ** attempt) * (0.5 + random.random() / 2)
+
+
+# Fetch daily prices for one ticker, retrying 429/5xx with backoff
+def fetch_prices(session, bucket, ticker, start_date=START_DATE_DEFAULT,
+                 base_url=BASE_URL, max_retries=5, timeout=30):
+    url = f"{base_url}/tiingo/daily/{tiingo_safe_ticker(ticker)}/prices"
+    params = {"startDate": start_date}
+
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        try:
+            resp = session.get(url, params=params, timeout=timeout)
+        except requests.ConnectionError:
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        if resp.status_code in RETRY_STATUS and attempt < max_retries:
+            time.sleep(backoff_delay(attempt, resp))
+            continue
+        resp.raise_for_status()
+        return pd.DataFrame(resp.json())
+
+
+# Fetch only bars after the stored history; re-pull fully on a split/dividend
+def refresh_ticker(session, bucket, tkr, file_path,
+                   start_date=START_DATE_DEFAULT, base_url=BASE_URL):
+    last_date = last_stored_date(file_path)
+    if last_date is None:
+        df = fetch_prices(session, bucket, tkr, start_date, base_url)
+        write_atomic(file_path, df)
+        return "full", len(df)
+
+    next_day = (last_date + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    new_df = fetch_prices(session, bucket, tkr, next_day, base_url)
+    if new_df.empty:
+        return "current", 0
+    new_df = rows_after(new_df, last_date)
+    if new_df.empty:
+        return "current", 0
+
+    if needs_full_refresh(new_df):
+        df = fetch_prices(session, bucket, tkr, start_date, base_url)
+        write_atomic(file_path, df)
+        return "full", len(df)
+
+    append_atomic(file_path, new_df)
+    return "append", len(new_df)
+
+
+# Download every ticker concurrently, skipping those already done by an
+# interrupted run with the same parameters. Downloads end today, so the
+# checkpoint is also keyed by `today` (default: the current date).
+def download_all(tickers, api_key, out_dir, checkpoint_file,
+                 start_date=START_DATE_DEFAULT, base_url=BASE_URL,
+                 workers=8, requests_per_hour=10000, burst=None,
+                 resume=True, incremental=False, today=None):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    today = today or date.today()
+    run = json.dumps([start_date, base_url, incremental, today.isoformat()])
+    checkpoint = Checkpoint(checkpoint_file, run)
+    if not resume:
+        checkpoint.clear()
+    pending = [t for t in tickers if t not in checkpoint.done]
+    print(
+        f"{len(tickers) - len(pending)} tickers already downloaded, "
+        f"{len(pending)} to go"
+    )
+
+    bucket = TokenBucket(requests_per_hour / 3600.0, burst or workers)
+    session = make_session(api_key, workers)
+    failed = {}
+
+    def work(tkr):
+        file_path = out_dir / f"{tiingo_safe_ticker(tkr)}.csv"
+        if incremental:
+            mode, rows = refresh_ticker(
+                session, bucket, tkr, file_path, start_date, base_url
+            )
+        else:
+            df = fetch_prices(session, bucket, tkr, start_date, base_url)
+            write_atomic(file_path, df)
+            mode, rows = "full", len(df)
+        checkpoint.mark(tkr)
+        return mode, rows
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(work, tkr): tkr for tkr in pending}
+        for i, future in enumerate(as_completed(futures)):
+            tkr = futures[future]
+            try:
+                mode, rows = future.result()
+                print(
+                    f"[{i+1}/{len(pending)}] OHLCV ({mode}) -> {tkr} "
+                    f"| Rows: {rows}"
+                )
+            except Exception as e:
+                print(f"[{i+1}] Failed: {tkr} - {e}")
+                failed[tkr] = str(e)
+
+    session.close()
+    if not failed:
+        checkpoint.clear()
+    return failed
@@ -1,53 +1,54 @@
-import time
+import argparse
 import json
-import requests
-import pandas as pd
+import sys
 from pathlib import Path
 
-# Load Tiingo API key from config file
-with open("config/credentials.json", "r") as f:
-    api_key = json.load(f)["TIINGO_API_KEY"]
+from data_ingest.instrument import span, write_report
+from data_ingest.tiingo_client import BASE_URL, download_all
 
 # Input/output paths
-INPUT_FILE = "data/tiingo/tiingo_all_tickers.txt"
+CREDENTIALS_FILE = Path("config/credentials.json")
+INPUT_FILE = Path("data/tiingo/tiingo_all_tickers.txt")
 OHLCV_DIR = Path("data/tiingo/ohlcv/")
-OHLCV_DIR.mkdir(parents=True, exist_ok=True)
+CHECKPOINT_FILE = Path("data/tiingo/download_checkpoint.json")
 
-# Load tickers
-tickers = [line.strip() for line in open(INPUT_FILE) if line.strip()]
 
-# Set headers for Tiingo
-headers = {"Authorization": f"Token {api_key}"}
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download Tiingo OHLCV.")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--requests-per-hour", type=int, default=10000,
+                        help="Account rate limit")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--fresh", action="store_true",
+                        help="Ignore the checkpoint and download everything")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fetch only bars after each stored file's end")
+    args = parser.parse_args(argv)
 
+    # Load Tiingo API key from config file
+    with open(CREDENTIALS_FILE, "r") as f:
+        api_key = json.load(f)["TIINGO_API_KEY"]
 
-# Replace '.' with '-' for Tiingo compatibility
-def tiingo_safe_ticker(tkr):
-    return tkr.replace('.', '-')
+    # Load tickers
+    tickers = [line.strip() for line in open(INPUT_FILE) if line.strip()]
 
-
-# Loop through tickers and fetch OHLCV
-for i, tkr in enumerate(tickers):
     try:
-        safe_tkr = tiingo_safe_ticker(tkr)
-        ohlcv_url = (
-            f"https://api.tiingo.com/tiingo/daily/{safe_tkr}/prices"
-            f"?startDate=2017-01-01"
-        )
-        ohlcv_resp = requests.get(ohlcv_url, headers=headers)
-
-        if ohlcv_resp.ok:
-            df = pd.DataFrame(ohlcv_resp.json())
-            df.to_csv(OHLCV_DIR / f"{safe_tkr}.csv", index=False)
-            print(
-                f"[{i+1}/{len(tickers)}] OHLCV -> {safe_tkr} | Rows: {len(df)}"
-            )
-        else:
-            print(
-                f"[{i+1}] OHLCV Error: {safe_tkr} - "
-                f"{ohlcv_resp.status_code}"
+        with span("tiingo_download") as s:
+            failed = download_all(
+                tickers, api_key, OHLCV_DIR, CHECKPOINT_FILE,
+                base_url=args.base_url,
+                workers=args.workers,
+                requests_per_hour=args.requests_per_hour,
+                resume=not args.fresh,
+                incremental=args.incremental,
             )
+            s.add_rows(len(tickers) - len(failed))
+    finally:
+        write_report("tiingo_loader")
+    if failed:
+        print(f"{len(failed)} tickers failed; rerun to resume.")
+        sys.exit(1)
 
-        time.sleep(1)
 
-    except Exception as e:
-        print(f"[{i+1}] Failed: {safe_tkr} - {e}")
+if __name__ == "__main__":
+    main()
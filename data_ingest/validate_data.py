@@ -1,207 +1,337 @@
-import pandas as pd
-from pathlib import Path
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
 import pandas_market_calendars as mcal
 
+from data_ingest.coverage import coverage_report, issues_frame
+from data_ingest.instrument import span, write_report
+from data_ingest.prices import YFINANCE_TICKERS, get_file_path, load_file
+
 # Config
 CHANGES_FILE = Path("data/sp500/sp500_changes_parsed.csv")
 CURRENT_FILE = Path("data/sp500/sp500_current_constituents.csv")
 TICKERS_FILE = Path("data/sp500/sp500_all_unique_post2017_tickers.txt")
 IGNORE_FILE = Path("data/tiingo/tiingo_ignore_tickers.txt")
-TIINGO_DIR = Path("data/tiingo/ohlcv/")
 OVERRIDE_FILE = Path("data/tiingo/tiingo_new_date_ranges.csv")
-YFINANCE_DIR = Path("data/yfinance/ohlcv/")
+OUTPUT_FILE = Path("data_ingest/validation_results.csv")
+GAPS_FILE = Path("data_ingest/validation_gaps.csv")
+CACHE_FILE = Path("data_ingest/.validation_cache.json")
+CACHE_VERSION = 2
 START_DATE_DEFAULT = pd.to_datetime("2017-01-01")
 TODAY = pd.to_datetime("today").normalize()
 
-YFINANCE_TICKERS = {"VTRS", "LIN", "TKO"}
 
-# Load Tickers
-changes_df = pd.read_csv(CHANGES_FILE, parse_dates=["Date"])
-current_df = pd.read_csv(CURRENT_FILE)
-current_tickers = set(current_df["Symbol"].str.strip())
+# NYSE trading days for the whole validation window as int64 day numbers
+def load_trading_days(start=START_DATE_DEFAULT, end=TODAY):
+    nyse = mcal.get_calendar("NYSE")
+    days = nyse.valid_days(start_date=start, end_date=end)
+    return days.tz_localize(None).values.astype("datetime64[D]").astype(
+        np.int64
+    )
+
+
+# Per-ticker first add / last remove dates from the change history
+def build_change_index(changes_df):
+    adds = changes_df.groupby("AddTicker")["Date"].min().to_dict()
+    removes = changes_df.groupby("RemoveTicker")["Date"].max().to_dict()
+    return adds, removes
 
-with open(IGNORE_FILE, "r") as f:
-    IGNORED_TICKERS = {line.strip() for line in f if line.strip()}
 
-with open(TICKERS_FILE, "r") as f:
-    TICKERS = [
-        line.strip()
-        for line in f
-        if line.strip() and line.strip() not in IGNORED_TICKERS
-    ]
+# Ticker -> "Date added" for current constituents
+def build_added_index(current_df):
+    if "Date added" not in current_df.columns:
+        return {}
+    added = pd.to_datetime(current_df["Date added"], errors="coerce")
+    return dict(zip(current_df["Symbol"].str.strip(), added))
 
-# Select only Tiingo and YFinance tickers
-TICKERS = sorted(set(TICKERS).union(YFINANCE_TICKERS))
 
 # Override Date Ranges
-override_df = pd.read_csv(
-    OVERRIDE_FILE,
-    header=None,
-    names=["Ticker", "Start", "End"]
-)
-override_df["Start"] = pd.to_datetime(override_df["Start"])
-override_df["End"] = pd.to_datetime(override_df["End"]) - timedelta(days=1)
-OVERRIDE_MAP = {
-    row["Ticker"].strip(): (row["Start"], row["End"])
-    for _, row in override_df.iterrows()
-}
-
-
-# Get file path based on source
-def get_file_path(ticker: str):
-    if ticker in YFINANCE_TICKERS:
-        return YFINANCE_DIR / f"{ticker}.csv"
-    return TIINGO_DIR / f"{ticker.replace('.', '-')}.csv"
+def load_overrides(override_file=OVERRIDE_FILE):
+    override_df = pd.read_csv(
+        override_file,
+        header=None,
+        names=["Ticker", "Start", "End"]
+    )
+    override_df["Start"] = pd.to_datetime(override_df["Start"])
+    override_df["End"] = (
+        pd.to_datetime(override_df["End"]) - timedelta(days=1)
+    )
+    return {
+        ticker.strip(): (start, end)
+        for ticker, start, end in zip(
+            override_df["Ticker"], override_df["Start"], override_df["End"]
+        )
+    }
 
 
 # Get date range
-def get_date_range(ticker: str):
-    if ticker in OVERRIDE_MAP:
-        return OVERRIDE_MAP[ticker]
+def get_date_range(ticker, current_tickers, added_index, change_index,
+                   override_map):
+    if ticker in override_map:
+        return override_map[ticker]
 
-    adds = changes_df[changes_df["AddTicker"] == ticker]
-    removes = changes_df[changes_df["RemoveTicker"] == ticker]
+    adds, removes = change_index
     default_start = START_DATE_DEFAULT
 
     if ticker in current_tickers:
-        row = current_df[current_df["Symbol"].str.strip() == ticker]
-        if not row.empty and "Date added" in row.columns:
-            date_added_val = row.iloc[0]["Date added"]
-            added_date = pd.to_datetime(date_added_val, errors="coerce")
-            if pd.notna(added_date) and added_date > START_DATE_DEFAULT:
-                default_start = added_date
+        added_date = added_index.get(ticker)
+        if pd.notna(added_date) and added_date > START_DATE_DEFAULT:
+            default_start = added_date
 
     start_date = (
-        max(default_start, adds["Date"].min())
-        if not adds.empty else default_start
+        max(default_start, adds[ticker])
+        if pd.notna(adds.get(ticker)) else default_start
     )
     end_date = (
         TODAY if ticker in current_tickers
-        else removes["Date"].max() - timedelta(days=1)
-        if not removes.empty else TODAY
+        else removes[ticker] - timedelta(days=1)
+        if pd.notna(removes.get(ticker)) else TODAY
     )
     return start_date, end_date
 
 
+# Calendar window covering every ticker's range, so overrides reaching
+# outside [START_DATE_DEFAULT, TODAY] are not cut off
+def calendar_range(ranges):
+    starts = [start for start, _ in ranges.values()]
+    ends = [end for _, end in ranges.values()]
+    return min([START_DATE_DEFAULT, *starts]), max([TODAY, *ends])
+
+
+# Trading days inside [start, end] as a slice of the shared calendar
+def slice_trading_days(trading_days, start, end):
+    lo = np.searchsorted(trading_days, day_number(start))
+    hi = np.searchsorted(trading_days, day_number(end), side="right")
+    return trading_days[lo:hi]
+
+
+def day_number(ts):
+    return np.datetime64(ts.date(), "D").astype(np.int64)
+
+
 # Validation logic
-def is_valid_data(df, start, end, ticker):
+def is_valid_data(df, trading_days, ticker):
     if "Date" in df.columns and "date" not in df.columns:
         df = df.rename(columns={"Date": "date"})
     if "date" not in df.columns:
-        return False, "Missing 'date' column"
+        return False, "Missing 'date' column", {}, []
+    if len(trading_days) == 0:
+        return False, "Empty date range", {}, []
 
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"]).copy()
-    if df["date"].dt.tz is not None:
-        df["date"] = df["date"].dt.tz_localize(None)
-    df["date"] = df["date"].dt.normalize()
-
-    present_dates = df["date"].dt.date.unique()
-    present_dates_set = set(present_dates)
-
-    nyse = mcal.get_calendar("NYSE")
-    trading_days = nyse.valid_days(start_date=start, end_date=end).date
-    expected_dates_set = set(trading_days)
-
-    coverage_ratio = (
-        len(present_dates_set & expected_dates_set) / len(expected_dates_set)
-    )
-    start_ok = trading_days[0] in present_dates_set
-    end_ok = trading_days[-1] in present_dates_set
+    summary, issues = coverage_report(ticker, df, trading_days)
+    start_ok = summary["start_ok"]
+    end_ok = summary["end_ok"]
 
     print(
         f"[DEBUG] {ticker} | Start OK: {start_ok}, End OK: {end_ok}, "
-        f"Coverage: {coverage_ratio:.2%}"
+        f"Coverage: {summary['coverage_ratio']:.2%}, "
+        f"Issues: {summary['issue_count']}"
     )
 
     if not start_ok or not end_ok:
-        return False, "Missing bounds"
-    if coverage_ratio < 0.95:
-        return False, "Insufficient coverage"
-    return True, "Complete"
+        return False, "Missing bounds", summary, issues
+    if summary["coverage_ratio"] < 0.95:
+        return False, "Insufficient coverage", summary, issues
+    return True, "Complete", summary, issues
 
 
-# Validation execution
-results = {"valid": [], "invalid": [], "errors": [], "missing_file": []}
-
-for ticker in TICKERS:
-    file_path = get_file_path(ticker)
-    if not file_path.exists():
-        print(f"[MISSING FILE] {ticker} – {file_path.name}")
-        results["missing_file"].append((ticker, "Missing file"))
-        continue
-
+# Validate one file; runs in a worker process
+def validate_file(ticker, file_path, trading_days):
+    outcome = {"status": "errors", "reason": "", "missing_bound": "",
+               "issues": []}
     try:
-        df = pd.read_csv(file_path)
-
-        if "Date" in df.columns and "date" not in df.columns:
-            df = df.rename(columns={"Date": "date"})
+        try:
+            df = load_file(file_path).reset_index()
+        except (ValueError, pd.errors.EmptyDataError):
+            df = pd.DataFrame()
 
         if df.empty or "date" not in df.columns:
             print(f"[ERROR] {ticker} CSV malformed or empty.")
-            results["errors"].append((ticker, "Malformed or empty CSV"))
-            continue
-
-        start, end = get_date_range(ticker)
-        is_valid, reason = is_valid_data(df, start, end, ticker)
-
+            outcome["reason"] = "Malformed or empty CSV"
+            return outcome
+
+        is_valid, reason, summary, issues = is_valid_data(
+            df, trading_days, ticker
+        )
+        outcome.update(
+            status="valid" if is_valid else "invalid",
+            reason=reason,
+            missing_bound=summary.get("missing_bound", ""),
+            issues=[[str(v) for v in issue] for issue in issues],
+        )
         if is_valid:
             print(f"{ticker} data is complete and valid.")
-            results["valid"].append(ticker)
         else:
             print(f"{ticker} data is incomplete – {reason}.")
-            results["invalid"].append((ticker, reason))
+        return outcome
 
     except Exception as e:
         print(f"[ERROR] {ticker} – {e}")
-        results["errors"].append((ticker, str(e)))
-
-# Save summary
-output_rows = []
-
-for ticker in results["valid"]:
-    start, end = get_date_range(ticker)
-    output_rows.append({
-        "Ticker": ticker,
-        "Status": "Valid",
-        "Reason": "Complete",
-        "StartDate": start.date(),
-        "EndDate": end.date(),
-        "MissingBound": ""
-    })
-
-for ticker, reason in results["invalid"]:
-    start, end = get_date_range(ticker)
-    output_rows.append({
-        "Ticker": ticker,
-        "Status": "Invalid",
-        "Reason": reason,
-        "StartDate": start.date(),
-        "EndDate": end.date(),
-        "MissingBound": ""
-    })
-
-for ticker, error in results["errors"]:
-    output_rows.append({
-        "Ticker": ticker,
-        "Status": "Error",
-        "Reason": error,
-        "StartDate": None,
-        "EndDate": None,
-        "MissingBound": ""
-    })
-
-for ticker, msg in results["missing_file"]:
-    output_rows.append({
-        "Ticker": ticker,
-        "Status": "Missing File",
-        "Reason": msg,
-        "StartDate": None,
-        "EndDate": None,
-        "MissingBound": ""
-    })
-
-results_df = pd.DataFrame(output_rows)
-results_df.to_csv("data_ingest/validation_results.csv", index=False)
-print("\nSaved all results to 'validation_results.csv'")
+        outcome["reason"] = str(e)
+        return outcome
+
+
+def file_digest(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+# Results cache keyed by ticker; an entry is reused while the file's
+# mtime/size (or, failing that, content hash) and date range are unchanged
+def load_cache(cache_file=CACHE_FILE):
+    if cache_file.exists():
+        return json.loads(cache_file.read_text())
+    return {}
+
+
+def cache_lookup(cache, ticker, file_path, start, end):
+    entry = cache.get(ticker)
+    if not entry or entry.get("version") != CACHE_VERSION:
+        return None
+    if entry["range"] != [str(start), str(end)]:
+        return None
+    stat = os.stat(file_path)
+    if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return entry["result"]
+    if entry["digest"] == file_digest(file_path):
+        entry["mtime_ns"] = stat.st_mtime_ns
+        entry["size"] = stat.st_size
+        return entry["result"]
+    return None
+
+
+def cache_store(cache, ticker, file_path, start, end, result):
+    stat = os.stat(file_path)
+    cache[ticker] = {
+        "version": CACHE_VERSION,
+        "range": [str(start), str(end)],
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "digest": file_digest(file_path),
+        "result": result,
+    }
+
+
+def main():
+    # Load Tickers
+    changes_df = pd.read_csv(CHANGES_FILE, parse_dates=["Date"])
+    current_df = pd.read_csv(CURRENT_FILE)
+    current_tickers = set(current_df["Symbol"].str.strip())
+
+    with open(IGNORE_FILE, "r") as f:
+        ignored_tickers = {line.strip() for line in f if line.strip()}
+
+    with open(TICKERS_FILE, "r") as f:
+        tickers = [
+            line.strip()
+            for line in f
+            if line.strip() and line.strip() not in ignored_tickers
+        ]
+
+    # Select only Tiingo and YFinance tickers
+    tickers = sorted(set(tickers).union(YFINANCE_TICKERS))
+
+    with span("validate_date_ranges") as s:
+        override_map = load_overrides()
+        change_index = build_change_index(changes_df)
+        added_index = build_added_index(current_df)
+
+        ranges = {
+            ticker: get_date_range(
+                ticker, current_tickers, added_index, change_index,
+                override_map
+            )
+            for ticker in tickers
+        }
+        trading_days = load_trading_days(*calendar_range(ranges))
+        s.add_rows(len(tickers))
+
+    # Validation execution
+    cache = load_cache()
+    outcomes = {}
+    jobs = {}
+
+    for ticker in tickers:
+        file_path = get_file_path(ticker)
+        if not file_path.exists():
+            print(f"[MISSING FILE] {ticker} – {file_path.name}")
+            outcomes[ticker] = {
+                "status": "missing_file", "reason": "Missing file",
+                "missing_bound": "", "issues": []
+            }
+            continue
+
+        start, end = ranges[ticker]
+        cached = cache_lookup(cache, ticker, file_path, start, end)
+        if cached is not None:
+            outcomes[ticker] = cached
+            continue
+        jobs[ticker] = (
+            file_path, slice_trading_days(trading_days, start, end)
+        )
+
+    print(
+        f"{len(outcomes)} tickers cached or missing, "
+        f"{len(jobs)} to validate"
+    )
+    with span("validate_files") as s, ProcessPoolExecutor() as pool:
+        futures = {
+            ticker: pool.submit(validate_file, ticker, path, days)
+            for ticker, (path, days) in jobs.items()
+        }
+        for ticker, future in futures.items():
+            outcomes[ticker] = future.result()
+            start, end = ranges[ticker]
+            cache_store(
+                cache, ticker, jobs[ticker][0], start, end, outcomes[ticker]
+            )
+        s.add_rows(len(jobs))
+
+    CACHE_FILE.write_text(json.dumps(cache))
+
+    # Save summary
+    status_labels = {
+        "valid": "Valid",
+        "invalid": "Invalid",
+        "errors": "Error",
+        "missing_file": "Missing File",
+    }
+    output_rows = []
+
+    for kind in status_labels:
+        for ticker in tickers:
+            outcome = outcomes[ticker]
+            if outcome["status"] != kind:
+                continue
+            has_range = kind in ("valid", "invalid")
+            start, end = ranges[ticker]
+            output_rows.append({
+                "Ticker": ticker,
+                "Status": status_labels[kind],
+                "Reason": outcome["reason"],
+                "StartDate": start.date() if has_range else None,
+                "EndDate": end.date() if has_range else None,
+                "MissingBound": outcome["missing_bound"]
+            })
+
+    results_df = pd.DataFrame(output_rows)
+    results_df.to_csv(OUTPUT_FILE, index=False)
+    print("\nSaved all results to 'validation_results.csv'")
+
+    # Per-ticker missing runs, stale prices, zero volume, OHLC errors
+    gaps_df = issues_frame([
+        issue for ticker in tickers for issue in outcomes[ticker]["issues"]
+    ])
+    gaps_df.to_csv(GAPS_FILE, index=False)
+    print(f"Saved {len(gaps_df)} data issues to '{GAPS_FILE.name}'")
+    write_report("validate_data")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import pandas as pd
+
+from data_ingest.adjust import ADJ_FIELDS, adjust_frames, future_product
+
+# Config
+BATCH_SIZE = 50
+
+OHLCV_COLUMNS = [
+    "date", "close", "high", "low", "open", "volume",
+    "adjClose", "adjHigh", "adjLow", "adjOpen", "adjVolume",
+    "divCash", "splitFactor"
+]
+
+RENAME = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Adj Close": "adjClose",
+    "Volume": "volume",
+    "Dividends": "divCash",
+    "Stock Splits": "splitFactor",
+}
+
+
+# Network client; one grouped request per batch of tickers
+class YFinanceClient:
+    def download(self, tickers, start, end, auto_adjust=False,
+                 actions=True):
+        import yfinance as yf
+
+        return yf.download(
+            list(tickers),
+            start=start,
+            end=end,
+            auto_adjust=auto_adjust,
+            actions=actions,
+            group_by="ticker",
+            threads=True,
+            progress=False,
+        )
+
+    def actions(self, ticker):
+        import yfinance as yf
+
+        return yf.Ticker(ticker).actions
+
+
+# Offline client serving a preloaded (ticker, field) frame, e.g. in tests
+class FrameClient:
+    def __init__(self, frame, actions=None):
+        self.frame = frame
+        self.action_frames = actions or {}
+
+    def download(self, tickers, start, end, auto_adjust=False,
+                 actions=True):
+        cols = self.frame.columns.get_level_values(0).isin(list(tickers))
+        df = self.frame.loc[:, cols]
+        return df[(df.index >= start) & (df.index < end)]
+
+    def actions(self, ticker):
+        return self.action_frames.get(ticker, pd.DataFrame())
+
+
+# Grouped downloads in batches -> {ticker: single-level field frame}
+def download_batch(client, tickers, start, end, batch_size=BATCH_SIZE,
+                   **kwargs):
+    tickers = list(tickers)
+    frames = {}
+    for i in range(0, len(tickers), batch_size):
+        batch = tickers[i:i + batch_size]
+        df = client.download(batch, start, end, **kwargs)
+        if df.empty:
+            continue
+        if not isinstance(df.columns, pd.MultiIndex):
+            df.columns = pd.MultiIndex.from_product([batch, df.columns])
+        for ticker in batch:
+            if ticker not in df.columns.get_level_values(0):
+                continue
+            sub = df[ticker].dropna(how="all")
+            if not sub.empty:
+                frames[ticker] = sub
+    return frames
+
+
+# Dividends/splits onto bars by calendar date (vectorized merge)
+def join_actions(df, actions):
+    key = pd.DatetimeIndex(df.index)
+    if key.tz is not None:
+        key = key.tz_localize(None)
+    key = key.normalize()
+    if actions is None or actions.empty:
+        df["divCash"] = 0.0
+        df["splitFactor"] = 1.0
+        return df
+
+    actions = actions.rename(columns=RENAME).reindex(
+        columns=["divCash", "splitFactor"]
+    )
+    actions["divCash"] = actions["divCash"].fillna(0.0)
+    actions["splitFactor"] = (
+        actions["splitFactor"].replace(0.0, 1.0).fillna(1.0)
+    )
+    idx = pd.DatetimeIndex(actions.index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    actions = (
+        actions.set_axis(idx.normalize())
+        .groupby(level=0)
+        .agg({"divCash": "sum", "splitFactor": "prod"})
+    )
+    joined = pd.DataFrame(index=key).join(actions, how="left")
+    df["divCash"] = joined["divCash"].fillna(0.0).to_numpy()
+    df["splitFactor"] = joined["splitFactor"].fillna(1.0).to_numpy()
+    return df
+
+
+# One ticker's yfinance fields -> the Tiingo-style 13-column schema.
+# Yahoo's prices, volume and dividends already reflect later splits, so
+# they are turned back into raw values first. With adjust=False the adj*
+# columns are left empty for adjust_frames() to fill across tickers.
+def to_ohlcv(df, client=None, ticker=None, adjust=True):
+    df = df.rename(columns=RENAME).copy()
+
+    if "divCash" not in df.columns or "splitFactor" not in df.columns:
+        actions = client.actions(ticker) if client is not None else None
+        df = join_actions(df, actions)
+    df["divCash"] = df["divCash"].fillna(0.0)
+    # yfinance reports "no split" as 0
+    df["splitFactor"] = df["splitFactor"].replace(0.0, 1.0).fillna(1.0)
+
+    # Undo split adjustment: splits after each bar
+    later_splits = future_product(df["splitFactor"].to_numpy(float))
+    for name in [*ADJ_FIELDS, "divCash"]:
+        df[name] = df[name] * later_splits
+    df["volume"] = df["volume"] / later_splits
+    for name in [*ADJ_FIELDS.values(), "adjVolume"]:
+        df[name] = float("nan")
+
+    # UTC date
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    df.index = index.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    df.index.name = "date"
+    df = df.reset_index()[OHLCV_COLUMNS]
+    if adjust:
+        df = adjust_frames({ticker: df})[ticker]
+    return df
@@ -1,6 +1,9 @@
-import yfinance as yf
+import pandas as pd
 from pathlib import Path
 
+from data_ingest.instrument import span, write_report
+from data_ingest.yfinance_client import YFinanceClient, download_batch
+
 macro_tickers = {
     "DXY": "DX-Y.NYB",  # US Dollar Index
     "VIX": "^VIX",  # Volatility Index
@@ -10,11 +13,45 @@ macro_tickers = {
     "5Y": "^FVX",  # 5-Year Treasury Yield
     "3M": "^IRX"  # 3-Month Treasury Yield
 }
+MACRO_FIELDS = ["Close", "High", "Low", "Open", "Volume"]
 
 OUT_DIR = Path("data/yfinance/macro/")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-for label, yf_ticker in macro_tickers.items():
-    df = yf.download(yf_ticker, start="2016-01-01", progress=False)
-    df.to_csv(OUT_DIR / f"{label}.csv")
-    print(f"Saved {label} -> {OUT_DIR / f'{label}.csv'}")
+
+# Keep yfinance's (Price, Ticker) header layout that downstream readers skip
+def to_macro_csv(df, yf_ticker, out_file):
+    df = df.reindex(columns=MACRO_FIELDS)
+    df.columns = pd.MultiIndex.from_product(
+        [MACRO_FIELDS, [yf_ticker]], names=["Price", "Ticker"]
+    )
+    df.index.name = "Date"
+    df.to_csv(out_file)
+
+
+def main(client=None):
+    client = client or YFinanceClient()
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+
+    end = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    try:
+        with span("macro_download") as s:
+            frames = download_batch(
+                client, macro_tickers.values(), "2016-01-01", end,
+                auto_adjust=True, actions=False
+            )
+            s.add_rows(sum(len(df) for df in frames.values()))
+
+        with span("macro_save"):
+            for label, yf_ticker in macro_tickers.items():
+                if yf_ticker not in frames:
+                    print(f"No data found for {label} ({yf_ticker})")
+                    continue
+                out_file = OUT_DIR / f"{label}.csv"
+                to_macro_csv(frames[yf_ticker], yf_ticker, out_file)
+                print(f"Saved {label} -> {out_file}")
+    finally:
+        write_report("yfinance_macro_loader")
+
+
+if __name__ == "__main__":
+    main()
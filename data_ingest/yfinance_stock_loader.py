@@ -1,7 +1,20 @@
+import argparse
+from collections import defaultdict
+
 import pandas as pd
-import yfinance as yf
 from pathlib import Path
 
+from data_ingest.adjust import adjust_frames, extend_adjusted
+from data_ingest.incremental import (
+    append_atomic, last_stored_date, needs_full_refresh, rows_after,
+    write_atomic
+)
+from data_ingest.instrument import span, write_report
+from data_ingest.prices import load_file
+from data_ingest.yfinance_client import (
+    YFinanceClient, download_batch, to_ohlcv
+)
+
 # Config
 tickers_dates = {
     "LIN":  ("2017-01-01", "2025-06-22"),
@@ -10,72 +23,99 @@ tickers_dates = {
     "DOC":  ("2017-01-01", "2025-06-22")
 }
 OUTPUT_DIR = Path("data/yfinance/ohlcv")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-
-def download_and_save(ticker, start, end):
-    print(f"Downloading {ticker} from {start} to {end}")
-    df = yf.download(
-        ticker,
-        start=start,
-        end=end,
-        auto_adjust=False,
-        actions=True,
-        group_by="ticker"
-    )
-
-    if df.empty:
-        print(f"No data found for {ticker}")
-        return
-
-    # Flatten MultiIndex
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(1)
-
-    # Rename to lower-case
-    df.rename(columns={
-        "Open": "open",
-        "High": "high",
-        "Low": "low",
-        "Close": "close",
-        "Adj Close": "adjClose",
-        "Volume": "volume"
-    }, inplace=True)
-
-    # UTC date
-    df.index = (
-        df.index.tz_localize("UTC")
-        .strftime("%Y-%m-%dT%H:%M:%S.000Z")
-    )
-    df.index.name = "date"
-    df = df.reset_index()
-
-    # Placeholder adjusted OHLCV
-    df["adjHigh"] = df["high"]
-    df["adjLow"] = df["low"]
-    df["adjOpen"] = df["open"]
-    df["adjVolume"] = df["volume"]
-
-    # Dividends & splits
-    yt = yf.Ticker(ticker)
-    dividends = yt.dividends
-    splits = yt.splits
-
-    df["divCash"] = df["date"].map(dividends.to_dict()).fillna(0.0)
-    df["splitFactor"] = df["date"].map(splits.to_dict()).fillna(1.0)
-
-    # Column order
-    df = df[[
-        "date", "close", "high", "low", "open", "volume",
-        "adjClose", "adjHigh", "adjLow", "adjOpen", "adjVolume",
-        "divCash", "splitFactor"
-    ]]
-
-    out_file = OUTPUT_DIR / f"{ticker}.csv"
-    df.to_csv(out_file, index=False)
-    print(f"Saved {ticker} to {out_file}")
-
-
-# Main loop
-for ticker, (start, end) in tickers_dates.items():
-    download_and_save(ticker, start, end)
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+
+# One grouped request per distinct (start, end) window
+def download_all(client, windows):
+    groups = defaultdict(list)
+    for ticker, (start, end) in windows.items():
+        groups[(start, end)].append(ticker)
+
+    frames = {}
+    for (start, end), tickers in groups.items():
+        print(f"Downloading {', '.join(tickers)} from {start} to {end}")
+        with span("yfinance_download") as s:
+            raw = download_batch(client, tickers, start, end)
+            s.add_rows(sum(len(df) for df in raw.values()))
+        with span("yfinance_to_ohlcv"):
+            group = {}
+            for ticker in tickers:
+                if ticker not in raw:
+                    print(f"No data found for {ticker}")
+                    continue
+                group[ticker] = to_ohlcv(
+                    raw[ticker], client, ticker, adjust=False
+                )
+            frames.update(adjust_frames(group))
+    return frames
+
+
+def save_all(frames):
+    with span("yfinance_save") as s:
+        for ticker, df in frames.items():
+            out_file = OUTPUT_DIR / f"{ticker}.csv"
+            write_atomic(out_file, df)
+            s.add_rows(len(df))
+            print(f"Saved {ticker} to {out_file}")
+
+
+# Append bars after each stored end. A split or dividend among the new
+# bars rescales the stored adjusted columns in place instead of
+# re-pulling the history.
+def refresh_all(client, windows, end):
+    last_dates = {
+        ticker: last_stored_date(OUTPUT_DIR / f"{ticker}.csv")
+        for ticker in windows
+    }
+    full = {t: w for t, w in windows.items() if last_dates[t] is None}
+    delta = {}
+    for ticker, last_date in last_dates.items():
+        if last_date is None:
+            continue
+        next_day = (last_date + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        if next_day < end:
+            delta[ticker] = (next_day, end)
+        else:
+            print(f"{ticker} is up to date")
+
+    for ticker, df in download_all(client, delta).items():
+        new_df = rows_after(df, last_dates[ticker])
+        out_file = OUTPUT_DIR / f"{ticker}.csv"
+        if new_df.empty:
+            print(f"{ticker} is up to date")
+        elif needs_full_refresh(new_df):
+            stored = load_file(out_file).reset_index()
+            stored["date"] = stored["date"].dt.strftime(DATE_FORMAT)
+            history, new_df = extend_adjusted(stored, new_df)
+            write_atomic(out_file, pd.concat([history, new_df]))
+            print(f"{ticker} has a new corporate action, rescaled "
+                  f"{len(history)} stored rows and appended {len(new_df)}")
+        else:
+            append_atomic(out_file, new_df)
+            print(f"Appended {len(new_df)} rows to {out_file}")
+
+    save_all(download_all(client, full))
+
+
+def main(argv=None, client=None):
+    parser = argparse.ArgumentParser(description="Download yfinance OHLCV.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Fetch only bars after each stored file's end")
+    args = parser.parse_args(argv)
+
+    client = client or YFinanceClient()
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    today = (pd.Timestamp.today() + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+    try:
+        if args.incremental:
+            refresh_all(client, tickers_dates, today)
+        else:
+            save_all(download_all(client, tickers_dates))
+    finally:
+        write_report("yfinance_stock_loader")
+
+
+if __name__ == "__main__":
+    main()
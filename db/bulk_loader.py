@@ -0,0 +1,429 @@
+import argparse
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+from psycopg2 import sql
+from psycopg2.pool import ThreadedConnectionPool
+
+from data_ingest.instrument import timed, write_report
+from data_ingest.macro import read_macro_csv
+from data_ingest.prices import load_file
+from data_ingest.sectors import SECTOR_FILE, SectorTable
+
+# Config
+CREDENTIALS_FILE = Path("config/credentials.json")
+DATA_DIR = Path("data")
+UNIVERSE_FILE = Path("data_ingest/final_tickers_dates_sectors.csv")
+SCHEMA = "quant"
+FILES_PER_BATCH = 50
+
+SECTOR_ETFS = {
+    "XLB", "XLC", "XLE", "XLF", "XLI", "XLK",
+    "XLP", "XLRE", "XLU", "XLV", "XLY"
+}
+
+OHLCV_COLUMNS = [
+    "date", "close", "high", "low", "open", "volume",
+    "adjclose", "adjhigh", "adjlow", "adjopen", "adjvolume",
+    "divcash", "splitfactor"
+]
+
+# Target tables: (key column, full column list); primary key is (key, date)
+TABLES = {
+    "ohlcv_tiingo": ("ticker", ["ticker"] + OHLCV_COLUMNS),
+    "ohlcv_yfinance": ("ticker", ["ticker"] + OHLCV_COLUMNS),
+    "sector_etf_prices": ("etf", ["etf"] + OHLCV_COLUMNS),
+    "macro_indicators": (
+        "ticker",
+        ["ticker", "date", "close", "high", "low", "open", "volume"]
+    ),
+}
+
+# Tables partitioned by year whose key is stored as tickers.ticker_id
+# (db/migrations/001_partitioned_prices.sql)
+PRICE_TABLES = {"ohlcv_tiingo", "ohlcv_yfinance", "sector_etf_prices"}
+
+
+def dsn_from_credentials(credentials_file=CREDENTIALS_FILE):
+    with open(credentials_file) as f:
+        creds = json.load(f)
+    return (
+        f"host={creds['POSTGRES_HOST']} port={creds['POSTGRES_PORT']} "
+        f"dbname={creds['POSTGRES_DBNAME']} "
+        f"user={creds['POSTGRES_USERNAME']} "
+        f"password={creds['POSTGRES_PASSWORD']}"
+    )
+
+
+# Per-ticker OHLCV CSV -> frame in table column order
+def prepare_ohlcv(file_path, table):
+    key, columns = TABLES[table]
+    df = load_file(file_path).reset_index()
+    df.columns = [col.lower() for col in df.columns]
+    df[key] = Path(file_path).stem
+    df["date"] = df["date"].dt.date
+    df = df.dropna(subset=["date", "close"])
+    for col in ("volume", "adjvolume"):
+        if col in df.columns:
+            df[col] = df[col].round().astype("Int64")
+    return df[columns]
+
+
+# yfinance macro CSV (multi-row header) -> frame in table column order
+def prepare_macro(file_path, table="macro_indicators"):
+    _, columns = TABLES[table]
+    df = read_macro_csv(file_path).rename_axis("date").reset_index()
+    df["ticker"] = Path(file_path).stem
+    df["date"] = df["date"].dt.date
+    df["volume"] = df["volume"].round().astype("Int64")
+    return df[columns]
+
+
+# Universe (Ticker, StartDate, EndDate, SectorETF) -> sector membership
+# intervals: each ticker's window cut by its point-in-time sector
+# intervals, or its static SectorETF when the sector table lacks it
+def prepare_members(universe, table=None):
+    base = universe.assign(
+        ValidFrom=pd.to_datetime(universe["StartDate"]),
+        ValidTo=pd.to_datetime(universe["EndDate"]),
+        SectorETF=universe["SectorETF"].fillna(""),
+    )
+    parts = []
+    if table is not None:
+        history = table.table[["Ticker", "ValidFrom", "ValidTo", "SectorETF"]]
+        cut = base[["Ticker", "ValidFrom", "ValidTo"]].merge(
+            history.astype({"ValidFrom": "datetime64[s]",
+                            "ValidTo": "datetime64[s]"}),
+            on="Ticker", suffixes=("", "_sector"),
+        )
+        cut["ValidFrom"] = cut[["ValidFrom", "ValidFrom_sector"]].max(axis=1)
+        cut["ValidTo"] = cut[["ValidTo", "ValidTo_sector"]].min(axis=1)
+        parts.append(cut[cut["ValidFrom"] <= cut["ValidTo"]])
+        base = base[~base["Ticker"].isin(table.tickers)]
+    parts.append(base)
+
+    members = pd.concat(parts, ignore_index=True)
+    members = members[members["SectorETF"] != ""]
+    return pd.DataFrame({
+        "ticker": members["Ticker"].astype(str),
+        "etf": members["SectorETF"],
+        "valid_from": members["ValidFrom"].dt.date,
+        "valid_to": members["ValidTo"].dt.date,
+    })
+
+
+# Yearly partitions for [first, last] in their own short transaction, so
+# batches only serialize when a year is new
+def ensure_partitions(conn, table, first, last, schema=SCHEMA):
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("SELECT {}(%s, %s, %s)").format(
+                sql.Identifier(schema, "create_year_partitions")
+            ),
+            [table, first.year, last.year],
+        )
+    conn.commit()
+
+
+# COPY frames into a temp staging table, then upsert into the target.
+# Price tables stage the text key and store its tickers.ticker_id,
+# registering unseen tickers first. Rows whose values did not change are
+# left alone. Returns (rows staged, earliest date inserted or changed).
+def copy_upsert(conn, table, frames, schema=SCHEMA):
+    key, columns = TABLES[table]
+    target = sql.Identifier(schema, table)
+    coded = table in PRICE_TABLES
+    stored = ["ticker_id", *columns[1:]] if coded else columns
+    conflict = [stored[0], "date"]
+    values = [col for col in stored if col not in conflict]
+
+    def join(names, prefix=""):
+        return sql.SQL(", ").join(
+            sql.SQL(prefix) + sql.Identifier(name) for name in names
+        )
+
+    rows = 0
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                "CREATE TEMP TABLE stage (LIKE {} INCLUDING DEFAULTS) "
+                "ON COMMIT DROP"
+            ).format(target)
+        )
+        if coded:
+            cur.execute(
+                sql.SQL(
+                    "ALTER TABLE stage DROP COLUMN ticker_id, "
+                    "ADD COLUMN {} TEXT"
+                ).format(sql.Identifier(key))
+            )
+        copy = sql.SQL(
+            "COPY stage ({}) FROM STDIN WITH (FORMAT csv, NULL '')"
+        ).format(join(columns)).as_string(conn)
+
+        for df in frames:
+            buf = io.StringIO()
+            df.to_csv(buf, index=False, header=False)
+            buf.seek(0)
+            cur.copy_expert(copy, buf)
+            rows += len(df)
+
+        source = sql.SQL("stage s")
+        selected = join(stored, "s.")
+        conflict_keys = join([key, "date"], "s.")
+        if coded:
+            tickers = sql.Identifier(schema, "tickers")
+            # Sorted, so concurrent batches take row locks in one order
+            cur.execute(
+                sql.SQL(
+                    "INSERT INTO {tickers} (ticker) "
+                    "SELECT DISTINCT {key} FROM stage ORDER BY 1 "
+                    "ON CONFLICT (ticker) DO NOTHING"
+                ).format(tickers=tickers, key=sql.Identifier(key))
+            )
+            source = sql.SQL("stage s JOIN {} k ON k.ticker = s.{}").format(
+                tickers, sql.Identifier(key)
+            )
+            selected = sql.SQL("k.ticker_id, ") + join(stored[1:], "s.")
+            conflict_keys = sql.SQL("k.ticker_id, s.date")
+
+        # Last row wins when a key repeats inside the batch
+        cur.execute(
+            sql.SQL(
+                "WITH upserted AS ("
+                "INSERT INTO {target} AS t ({cols}) "
+                "SELECT DISTINCT ON ({conflict}) {selected} FROM {source} "
+                "ORDER BY {conflict}, s.ctid DESC "
+                "ON CONFLICT ({conflict_cols}) DO UPDATE SET {updates} "
+                "WHERE ({old}) IS DISTINCT FROM ({new}) "
+                "RETURNING t.date) "
+                "SELECT min(date) FROM upserted"
+            ).format(
+                target=target,
+                cols=join(stored),
+                conflict=conflict_keys,
+                selected=selected,
+                source=source,
+                conflict_cols=join(conflict),
+                updates=sql.SQL(", ").join(
+                    sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(col))
+                    for col in values
+                ),
+                old=join(values, "t."),
+                new=join(values, "EXCLUDED."),
+            )
+        )
+        first_changed = cur.fetchone()[0]
+    conn.commit()
+    return rows, first_changed
+
+
+# Replace the sector membership intervals. Returns the earliest
+# valid_from among intervals added or removed, or None if unchanged.
+def replace_members(conn, members, schema=SCHEMA):
+    tickers = sql.Identifier(schema, "tickers")
+    target = sql.Identifier(schema, "sector_members")
+    with conn.cursor() as cur:
+        cur.execute(
+            "CREATE TEMP TABLE members_stage (ticker TEXT, etf TEXT, "
+            "valid_from DATE, valid_to DATE) ON COMMIT DROP"
+        )
+        buf = io.StringIO()
+        members.to_csv(buf, index=False, header=False)
+        buf.seek(0)
+        cur.copy_expert(
+            "COPY members_stage FROM STDIN WITH (FORMAT csv)", buf
+        )
+        cur.execute(
+            sql.SQL(
+                "INSERT INTO {} (ticker) "
+                "SELECT ticker FROM members_stage "
+                "UNION SELECT etf FROM members_stage ORDER BY 1 "
+                "ON CONFLICT (ticker) DO NOTHING"
+            ).format(tickers)
+        )
+        cur.execute(
+            sql.SQL(
+                "CREATE TEMP TABLE members_new ON COMMIT DROP AS "
+                "SELECT DISTINCT ON (k.ticker_id, s.valid_from) "
+                "k.ticker_id, e.ticker_id AS etf_id, s.valid_from, "
+                "s.valid_to "
+                "FROM members_stage s "
+                "JOIN {0} k ON k.ticker = s.ticker "
+                "JOIN {0} e ON e.ticker = s.etf "
+                "ORDER BY k.ticker_id, s.valid_from"
+            ).format(tickers)
+        )
+        cur.execute(
+            sql.SQL(
+                "SELECT min(valid_from) FROM ("
+                "(TABLE {0} EXCEPT TABLE members_new) UNION ALL "
+                "(TABLE members_new EXCEPT TABLE {0})) changed"
+            ).format(target)
+        )
+        first_changed = cur.fetchone()[0]
+        if first_changed is not None:
+            cur.execute(sql.SQL("DELETE FROM {}").format(target))
+            cur.execute(
+                sql.SQL("INSERT INTO {} TABLE members_new").format(target)
+            )
+    conn.commit()
+    return first_changed
+
+
+# Recompute sector_member_prices from `since` on (everything when None)
+def refresh_sector_members(conn, since=None, schema=SCHEMA):
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL("SELECT {}(%s)").format(
+                sql.Identifier(schema, "refresh_sector_member_prices")
+            ),
+            [since],
+        )
+        rows = cur.fetchone()[0]
+    conn.commit()
+    return rows
+
+
+# Load one batch of files on a pooled connection
+def load_batch(pool, table, files, prepare, schema=SCHEMA):
+    conn = pool.getconn()
+    try:
+        frames = [prepare(f, table) for f in files]
+        dates = [df["date"] for df in frames if len(df)]
+        if table in PRICE_TABLES and dates:
+            ensure_partitions(
+                conn, table,
+                min(d.min() for d in dates), max(d.max() for d in dates),
+                schema,
+            )
+        return copy_upsert(conn, table, frames, schema)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+def non_empty_csvs(folder, keep=lambda name: True):
+    return [
+        f for f in sorted(Path(folder).glob("*.csv"))
+        if f.stat().st_size > 0 and keep(f.stem)
+    ]
+
+
+# (table, prepare, files) per source, mirroring the notebook's upload
+# rules: sector ETFs and ignored tickers are kept out of ohlcv_tiingo
+def route_files(data_dir=DATA_DIR):
+    data_dir = Path(data_dir)
+    tiingo_dir = data_dir / "tiingo" / "ohlcv"
+    ignore_file = data_dir / "tiingo" / "tiingo_ignore_tickers.txt"
+    ignored = set()
+    if ignore_file.exists():
+        ignored = {
+            line.strip() for line in ignore_file.read_text().splitlines()
+            if line.strip()
+        }
+    excluded = SECTOR_ETFS | ignored
+
+    return [
+        ("sector_etf_prices", prepare_ohlcv,
+         non_empty_csvs(tiingo_dir, lambda t: t in SECTOR_ETFS)),
+        ("ohlcv_tiingo", prepare_ohlcv,
+         non_empty_csvs(tiingo_dir, lambda t: t not in excluded)),
+        ("ohlcv_yfinance", prepare_ohlcv,
+         non_empty_csvs(data_dir / "yfinance" / "ohlcv")),
+        ("macro_indicators", prepare_macro,
+         non_empty_csvs(data_dir / "yfinance" / "macro")),
+    ]
+
+
+# File batches per table
+def build_jobs(data_dir=DATA_DIR):
+    jobs = []
+    for table, prepare, files in route_files(data_dir):
+        for i in range(0, len(files), FILES_PER_BATCH):
+            jobs.append((table, files[i:i + FILES_PER_BATCH], prepare))
+    return jobs
+
+
+# Run all batches concurrently, then bring sector_member_prices up to
+# date from the earliest day whose prices or membership changed. Returns
+# rows upserted per table.
+@timed("db_load_all", rows=lambda totals: sum(totals.values()))
+def load_all(dsn, data_dir=DATA_DIR, schema=SCHEMA, workers=4,
+             universe_file=UNIVERSE_FILE, sector_file=SECTOR_FILE):
+    jobs = build_jobs(data_dir)
+    pool = ThreadedConnectionPool(1, workers, dsn)
+    totals = {}
+    changed = []
+    try:
+        if universe_file and Path(universe_file).exists():
+            table = None
+            if sector_file and Path(sector_file).exists():
+                table = SectorTable.load(sector_file)
+            members = prepare_members(pd.read_csv(universe_file), table)
+            conn = pool.getconn()
+            try:
+                changed.append(replace_members(conn, members, schema))
+            finally:
+                pool.putconn(conn)
+            print(f"Replaced {len(members)} sector membership intervals")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    load_batch, pool, table, files, prepare, schema
+                ): table
+                for table, files, prepare in jobs
+            }
+            for future in as_completed(futures):
+                table = futures[future]
+                rows, first_changed = future.result()
+                totals[table] = totals.get(table, 0) + rows
+                if table in PRICE_TABLES:
+                    changed.append(first_changed)
+
+        changed = [day for day in changed if day is not None]
+        if changed:
+            conn = pool.getconn()
+            try:
+                since = min(changed)
+                rows = refresh_sector_members(conn, since, schema)
+            finally:
+                pool.putconn(conn)
+            print(f"Refreshed {rows} sector_member_prices rows from {since}")
+    finally:
+        pool.closeall()
+
+    for table, rows in sorted(totals.items()):
+        print(f"Upserted {rows} rows into {schema}.{table}")
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Bulk load OHLCV and macro CSVs into PostgreSQL."
+    )
+    parser.add_argument("--dsn", help="libpq DSN; default from credentials")
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--schema", default=SCHEMA)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--universe", default=str(UNIVERSE_FILE),
+                        help="Ticker/date/sector file for sector_members")
+    parser.add_argument("--sectors", default=str(SECTOR_FILE))
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn or dsn_from_credentials()
+    try:
+        load_all(dsn, args.data_dir, args.schema, args.workers,
+                 args.universe, args.sectors)
+    finally:
+        write_report("bulk_loader")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+from pathlib import Path
+
+import psycopg2
+from psycopg2 import sql
+
+from db.bulk_loader import SCHEMA, dsn_from_credentials
+
+# Config
+MIGRATION_DIR = Path("db/migrations/")
+SCHEMA_FILE = Path("db/schema.sql")
+
+
+# Create the schema and the base tables from db/schema.sql
+def create_schema(dsn, schema=SCHEMA, schema_file=SCHEMA_FILE):
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                sql.SQL("CREATE SCHEMA {0}; SET search_path TO {0}").format(
+                    sql.Identifier(schema)
+                )
+            )
+            cur.execute(Path(schema_file).read_text())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# Apply db/migrations/*.sql in name order, each once, inside the schema;
+# applied names are recorded in <schema>.schema_migrations
+def migrate(dsn, schema=SCHEMA, migration_dir=MIGRATION_DIR):
+    conn = psycopg2.connect(dsn)
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                sql.SQL("SET search_path TO {}").format(
+                    sql.Identifier(schema)
+                )
+            )
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "name TEXT PRIMARY KEY, "
+                "applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+            )
+            cur.execute("SELECT name FROM schema_migrations")
+            done = {name for (name,) in cur.fetchall()}
+            conn.commit()
+
+            for path in sorted(Path(migration_dir).glob("*.sql")):
+                if path.name in done:
+                    continue
+                cur.execute(path.read_text())
+                cur.execute(
+                    "INSERT INTO schema_migrations (name) VALUES (%s)",
+                    [path.name],
+                )
+                conn.commit()
+                applied.append(path.name)
+                print(f"Applied {path.name}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return applied
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Apply pending schema migrations."
+    )
+    parser.add_argument("--dsn", help="libpq DSN; default from credentials")
+    parser.add_argument("--schema", default=SCHEMA)
+    parser.add_argument("--init", action="store_true",
+                        help=f"Create the schema from {SCHEMA_FILE} first")
+    args = parser.parse_args(argv)
+
+    dsn = args.dsn or dsn_from_credentials()
+    if args.init:
+        create_schema(dsn, args.schema)
+    applied = migrate(dsn, args.schema)
+    print(f"{len(applied)} migrations applied")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+-- Query-optimized price layout. Applied by `python -m db.migrate`, which
+-- sets search_path to the target schema first.
+
+-- Integer codes for tickers and sector ETFs
+CREATE TABLE tickers (
+    ticker_id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    ticker TEXT NOT NULL UNIQUE
+);
+
+-- Yearly range partitions of a date-partitioned table, [Jan 1, Jan 1),
+-- created when missing. Concurrent loaders serialize on an advisory lock.
+CREATE FUNCTION create_year_partitions(
+    parent TEXT, first_year INTEGER, last_year INTEGER
+) RETURNS INTEGER LANGUAGE plpgsql SET search_path FROM CURRENT AS $$
+DECLARE
+    nsp TEXT;
+    part TEXT;
+    y INTEGER;
+    created INTEGER := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(parent));
+    SELECT relnamespace::regnamespace::text INTO nsp
+    FROM pg_class WHERE oid = parent::regclass;
+    FOR y IN first_year..last_year LOOP
+        part := parent || '_' || y;
+        IF to_regclass(format('%I.%I', nsp, part)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I.%I PARTITION OF %I.%I '
+                'FOR VALUES FROM (%L) TO (%L)',
+                nsp, part, nsp, parent,
+                make_date(y, 1, 1), make_date(y + 1, 1, 1)
+            );
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END $$;
+
+-- Price tables: TEXT keys -> INTEGER codes, FLOAT -> REAL, partitioned by
+-- year. The primary key serves per-ticker history; the date-leading index
+-- (covering adjclose) and BRIN serve date-range scans across tickers.
+DO $$
+DECLARE
+    t RECORD;
+    first_year INTEGER;
+    this_year INTEGER := extract(year FROM current_date)::int;
+BEGIN
+    FOR t IN SELECT * FROM (VALUES
+        ('ohlcv_tiingo', 'ticker'),
+        ('ohlcv_yfinance', 'ticker'),
+        ('sector_etf_prices', 'etf')
+    ) AS v (name, key) LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I',
+                       t.name, t.name || '_legacy');
+        EXECUTE format('ALTER INDEX IF EXISTS %I RENAME TO %I',
+                       t.name || '_pkey', t.name || '_legacy_pkey');
+        EXECUTE format(
+            'INSERT INTO tickers (ticker) '
+            'SELECT DISTINCT %I FROM %I ORDER BY 1 '
+            'ON CONFLICT (ticker) DO NOTHING',
+            t.key, t.name || '_legacy'
+        );
+
+        EXECUTE format($sql$
+            CREATE TABLE %I (
+                ticker_id INTEGER NOT NULL,
+                date DATE NOT NULL,
+                close REAL,
+                high REAL,
+                low REAL,
+                open REAL,
+                volume BIGINT,
+                adjclose REAL,
+                adjhigh REAL,
+                adjlow REAL,
+                adjopen REAL,
+                adjvolume BIGINT,
+                divcash REAL,
+                splitfactor REAL,
+                PRIMARY KEY (ticker_id, date)
+            ) PARTITION BY RANGE (date)
+        $sql$, t.name);
+
+        EXECUTE format(
+            'SELECT extract(year FROM min(date))::int FROM %I',
+            t.name || '_legacy'
+        ) INTO first_year;
+        PERFORM create_year_partitions(
+            t.name, coalesce(first_year, this_year), this_year + 1
+        );
+
+        EXECUTE format($sql$
+            INSERT INTO %I
+            SELECT k.ticker_id, l.date, l.close, l.high, l.low, l.open,
+                   l.volume, l.adjclose, l.adjhigh, l.adjlow, l.adjopen,
+                   l.adjvolume, l.divcash, l.splitfactor
+            FROM %I l JOIN tickers k ON k.ticker = l.%I
+        $sql$, t.name, t.name || '_legacy', t.key);
+
+        -- Indexes after the copy, so it runs without index maintenance
+        EXECUTE format('CREATE INDEX ON %I USING brin (date)', t.name);
+        EXECUTE format(
+            'CREATE INDEX ON %I (date, ticker_id) INCLUDE (adjclose)',
+            t.name
+        );
+        EXECUTE format('DROP TABLE %I', t.name || '_legacy');
+        EXECUTE format('ANALYZE %I', t.name);
+    END LOOP;
+END $$;
+
+-- Point-in-time sector membership: ticker in the ETF's sector on
+-- [valid_from, valid_to]. Replaced as a whole by the bulk loader.
+CREATE TABLE sector_members (
+    ticker_id INTEGER NOT NULL,
+    etf_id INTEGER NOT NULL,
+    valid_from DATE NOT NULL,
+    valid_to DATE NOT NULL,
+    PRIMARY KEY (ticker_id, valid_from)
+);
+CREATE INDEX ON sector_members (etf_id);
+
+-- Summary table for "sector ETF + members adjclose on a date range":
+-- one row per (ETF, day, member), clustered by the primary key. Kept
+-- current by refresh_sector_member_prices() rather than a materialized
+-- view, whose REFRESH always recomputes the whole history.
+CREATE TABLE sector_member_prices (
+    etf_id INTEGER NOT NULL,
+    date DATE NOT NULL,
+    ticker_id INTEGER NOT NULL,
+    adjclose REAL,
+    etf_adjclose REAL,
+    PRIMARY KEY (etf_id, date, ticker_id)
+) PARTITION BY RANGE (date);
+CREATE INDEX ON sector_member_prices USING brin (date);
+
+-- Recompute the summary rows dated on or after `since` (all rows when
+-- NULL). Tiingo bars win over yfinance bars for the same ticker and day.
+-- Returns the number of rows written.
+CREATE FUNCTION refresh_sector_member_prices(since DATE DEFAULT NULL)
+RETURNS BIGINT LANGUAGE plpgsql SET search_path FROM CURRENT AS $$
+DECLARE
+    first_day DATE;
+    last_day DATE;
+    written BIGINT;
+BEGIN
+    since := coalesce(since, '-infinity'::date);
+    DELETE FROM sector_member_prices WHERE date >= since;
+
+    SELECT min(date), max(date) INTO first_day, last_day
+    FROM sector_etf_prices WHERE date >= since;
+    IF first_day IS NULL THEN
+        RETURN 0;
+    END IF;
+    PERFORM create_year_partitions(
+        'sector_member_prices',
+        extract(year FROM first_day)::int,
+        extract(year FROM last_day)::int
+    );
+
+    INSERT INTO sector_member_prices
+    SELECT DISTINCT ON (m.etf_id, p.date, p.ticker_id)
+           m.etf_id, p.date, p.ticker_id, p.adjclose, e.adjclose
+    FROM (
+        SELECT 0 AS src, ticker_id, date, adjclose
+        FROM ohlcv_tiingo WHERE date >= first_day
+        UNION ALL
+        SELECT 1 AS src, ticker_id, date, adjclose
+        FROM ohlcv_yfinance WHERE date >= first_day
+    ) p
+    JOIN sector_members m
+      ON m.ticker_id = p.ticker_id
+     AND p.date BETWEEN m.valid_from AND m.valid_to
+    JOIN sector_etf_prices e
+      ON e.ticker_id = m.etf_id AND e.date = p.date
+    ORDER BY m.etf_id, p.date, p.ticker_id, p.src;
+    GET DIAGNOSTICS written = ROW_COUNT;
+    RETURN written;
+END $$;
@@ -0,0 +1,173 @@
+import argparse
+import io
+
+import pandas as pd
+import psycopg2
+from psycopg2 import sql
+
+from db.bulk_loader import (
+    SCHEMA, dsn_from_credentials, refresh_sector_members
+)
+
+# Price tables in order of preference when a ticker is in several
+SOURCES = ["ohlcv_tiingo", "ohlcv_yfinance", "sector_etf_prices"]
+FIELDS = [
+    "close", "high", "low", "open", "volume",
+    "adjclose", "adjhigh", "adjlow", "adjopen", "adjvolume",
+    "divcash", "splitfactor"
+]
+
+
+# Run a query through COPY ... TO STDOUT, which streams CSV far faster
+# than row-by-row fetches, and parse it into a frame
+def read_frame(conn, query, params=None):
+    with conn.cursor() as cur:
+        text = cur.mogrify(query, params).decode()
+        buf = io.StringIO()
+        cur.copy_expert(f"COPY ({text}) TO STDOUT WITH (FORMAT csv, HEADER)",
+                        buf)
+    buf.seek(0)
+    return pd.read_csv(buf, parse_dates=["date"])
+
+
+# Ticker -> tickers.ticker_id for the known ones among `tickers`
+def ticker_codes(conn, tickers, schema=SCHEMA):
+    with conn.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                "SELECT ticker, ticker_id FROM {} WHERE ticker = ANY(%s)"
+            ).format(sql.Identifier(schema, "tickers")),
+            [list(tickers)],
+        )
+        return dict(cur.fetchall())
+
+
+# Long rows (ticker, date, value) -> dates x tickers
+def to_wide(df, field, columns=None):
+    wide = df.pivot(index="date", columns="ticker", values=field)
+    wide.columns.name = None
+    if columns is not None:
+        wide = wide.reindex(columns=columns)
+    return wide
+
+
+# One field for `tickers` (all tickers when None) on [start, end], dates
+# x tickers. Every source is range-pruned to the partitions holding the
+# dates; the date-leading index serves the all-ticker scan.
+def get_prices(conn, tickers, start, end, field="adjclose", schema=SCHEMA):
+    if field not in FIELDS:
+        raise ValueError(f"Unknown field {field!r}")
+    params = {"start": start, "end": end}
+    where = sql.SQL("date BETWEEN %(start)s AND %(end)s")
+    if tickers is not None:
+        tickers = list(tickers)
+        params["ids"] = list(ticker_codes(conn, tickers, schema).values())
+        where += sql.SQL(" AND ticker_id = ANY(%(ids)s)")
+
+    union = sql.SQL(" UNION ALL ").join(
+        sql.SQL(
+            "SELECT {src} AS src, ticker_id, date, {field} FROM {table} "
+            "WHERE {where}"
+        ).format(
+            src=sql.Literal(i), field=sql.Identifier(field),
+            table=sql.Identifier(schema, table), where=where,
+        )
+        for i, table in enumerate(SOURCES)
+    )
+    query = sql.SQL(
+        "SELECT DISTINCT ON (p.ticker_id, p.date) "
+        "k.ticker, p.date, p.{field} "
+        "FROM ({union}) p JOIN {tickers} k USING (ticker_id) "
+        "ORDER BY p.ticker_id, p.date, p.src"
+    ).format(
+        field=sql.Identifier(field), union=union,
+        tickers=sql.Identifier(schema, "tickers"),
+    )
+    return to_wide(read_frame(conn, query, params), field, tickers)
+
+
+# The ETF's adjclose (first column) and its members' adjclose on [start,
+# end], dates x tickers, membership taken day by day. Reads the
+# sector_member_prices summary table; use_summary=False computes the same
+# from the price tables and sector_members directly.
+def sector_prices(conn, etf, start, end, use_summary=True, schema=SCHEMA):
+    etf_id = ticker_codes(conn, [etf], schema).get(etf)
+    if etf_id is None:
+        return pd.DataFrame(columns=[etf])
+
+    params = {"etf": etf_id, "start": start, "end": end}
+    ids = dict(
+        tickers=sql.Identifier(schema, "tickers"),
+        summary=sql.Identifier(schema, "sector_member_prices"),
+        members=sql.Identifier(schema, "sector_members"),
+        tiingo=sql.Identifier(schema, "ohlcv_tiingo"),
+        yfinance=sql.Identifier(schema, "ohlcv_yfinance"),
+        etfs=sql.Identifier(schema, "sector_etf_prices"),
+    )
+    if use_summary:
+        query = sql.SQL(
+            "SELECT k.ticker, s.date, s.adjclose, s.etf_adjclose "
+            "FROM {summary} s JOIN {tickers} k USING (ticker_id) "
+            "WHERE s.etf_id = %(etf)s "
+            "AND s.date BETWEEN %(start)s AND %(end)s"
+        ).format(**ids)
+    else:
+        query = sql.SQL(
+            "SELECT DISTINCT ON (p.date, p.ticker_id) "
+            "k.ticker, p.date, p.adjclose, e.adjclose AS etf_adjclose "
+            "FROM ("
+            "SELECT 0 AS src, ticker_id, date, adjclose FROM {tiingo} "
+            "WHERE date BETWEEN %(start)s AND %(end)s "
+            "UNION ALL "
+            "SELECT 1 AS src, ticker_id, date, adjclose FROM {yfinance} "
+            "WHERE date BETWEEN %(start)s AND %(end)s) p "
+            "JOIN {members} m ON m.ticker_id = p.ticker_id "
+            "AND p.date BETWEEN m.valid_from AND m.valid_to "
+            "JOIN {etfs} e ON e.ticker_id = m.etf_id AND e.date = p.date "
+            "JOIN {tickers} k ON k.ticker_id = p.ticker_id "
+            "WHERE m.etf_id = %(etf)s "
+            "ORDER BY p.date, p.ticker_id, p.src"
+        ).format(**ids)
+
+    df = read_frame(conn, query, params)
+    members = to_wide(df, "adjclose")
+    etf_close = df.groupby("date")["etf_adjclose"].first().rename(etf)
+    return pd.concat(
+        [etf_close, members[sorted(members.columns)]], axis=1
+    ).rename_axis("date")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Sector ETF and member adjClose from PostgreSQL."
+    )
+    parser.add_argument("etf")
+    parser.add_argument("--start", required=True)
+    parser.add_argument("--end", required=True)
+    parser.add_argument("--dsn", help="libpq DSN; default from credentials")
+    parser.add_argument("--schema", default=SCHEMA)
+    parser.add_argument("--refresh", action="store_true",
+                        help="Rebuild sector_member_prices first")
+    parser.add_argument("--out", help="CSV path; default prints a summary")
+    args = parser.parse_args(argv)
+
+    conn = psycopg2.connect(args.dsn or dsn_from_credentials())
+    try:
+        if args.refresh:
+            rows = refresh_sector_members(conn, None, args.schema)
+            print(f"Rebuilt sector_member_prices: {rows} rows")
+        prices = sector_prices(conn, args.etf, args.start, args.end,
+                               schema=args.schema)
+    finally:
+        conn.close()
+
+    if args.out:
+        prices.to_csv(args.out)
+        print(f"Saved {prices.shape[0]} days x {prices.shape[1]} tickers "
+              f"-> {args.out}")
+    else:
+        print(prices.describe().T)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import argparse
+import importlib
+import inspect
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_ingest.panel import PANEL_DIR, Panel
+from overlay.features import (
+    FEATURE_DIR, TRADING_DAYS, FeatureSet, rolling_sum
+)
+from overlay.neutral import (
+    SECTOR_LIMIT, attach, cap_sectors, overlay_rows, sector_codes, to_shared,
+    zscore_weights
+)
+
+# Config
+BACKTEST_DIR = Path("data/backtest/")
+COST_BPS = 5.0
+TRAIN_DAYS = 3 * TRADING_DAYS
+TEST_DAYS = TRADING_DAYS
+
+# Default sweep: every combination is one configuration. `limit` and
+# `rebalance` go to the portfolio step, the rest to the signal.
+PORTFOLIO_KEYS = ("limit", "rebalance")
+GRID = {
+    "lookback": [1, 2, 3, 5, 10, 15, 21, 42],
+    "sign": [-1, 1],
+    "limit": [0.01, 0.02, 0.05, 0.10],
+    "rebalance": [1, 2, 5],
+}
+
+
+# Arrays every configuration reads: sector-residual log returns, simple
+# returns (0 where missing), sector codes and the tradable mask (inside
+# the ticker's universe window and in a sector)
+def backtest_inputs(features, mask):
+    returns = np.asarray(features["returns"], dtype=np.float64)
+    ref, code = sector_codes(features.tickers, features["sector_col"])
+    residual = overlay_rows(
+        returns, features["beta_sector"], ref, code, 0, len(returns)
+    )["residual"]
+    return {
+        "residual": residual,
+        "returns": np.nan_to_num(np.expm1(returns)),
+        "code": code,
+        "tradable": np.asarray(mask[:len(returns)]) & (code >= 0),
+    }
+
+
+# Default signal: residual return summed over `lookback` days, times
+# `sign` (-1 fades recent moves, +1 follows them)
+def residual_signal(inputs, lookback=5, sign=-1):
+    residual = inputs["residual"]
+    score = rolling_sum(np.nan_to_num(residual), lookback)
+    return np.where(np.isfinite(residual), sign * score, np.nan)
+
+
+# Scores -> dollar-neutral target weights with unit gross: per-day
+# z-scores over tradable names scaled by sum|z|, sector nets capped
+def target_weights(score, tradable, code, limit=SECTOR_LIMIT):
+    _, weight = zscore_weights(np.where(tradable, score, np.nan))
+    cap_sectors(weight, code, limit)
+    return weight
+
+
+# Daily net P&L of weights set at each close and held over the next day.
+# Targets are refreshed every `rebalance` rows, positions outside the
+# universe window are closed, and every unit of traded weight costs
+# cost_bps. Returns (net pnl, turnover) per day.
+def simulate(weights, returns, tradable, rebalance=1, cost_bps=COST_BPS):
+    rows = np.arange(len(weights)) // rebalance * rebalance
+    held = weights[rows]
+    held = np.where(tradable & np.isfinite(held), held, 0.0)
+    turnover = np.abs(np.diff(held, axis=0, prepend=0.0)).sum(axis=1)
+    gross = np.zeros(len(held))
+    gross[1:] = (held[:-1] * returns[1:]).sum(axis=1)
+    return gross - turnover * cost_bps / 1e4, turnover
+
+
+# One configuration over the whole history
+def run_config(inputs, params, signal=residual_signal, cost_bps=COST_BPS):
+    params = dict(params)
+    limit = params.pop("limit", SECTOR_LIMIT)
+    rebalance = params.pop("rebalance", 1)
+    weights = target_weights(
+        signal(inputs, **params), inputs["tradable"], inputs["code"], limit
+    )
+    return simulate(
+        weights, inputs["returns"], inputs["tradable"], rebalance, cost_bps
+    )
+
+
+# Annualized statistics along the last axis, so one call covers a single
+# P&L series or a (configs x days) block
+def summarize(pnl, turnover):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = pnl.mean(axis=-1) * TRADING_DAYS
+        vol = pnl.std(axis=-1, ddof=1) * np.sqrt(TRADING_DAYS)
+        equity = np.cumprod(1 + pnl, axis=-1)
+        drawdown = equity / np.maximum.accumulate(equity, axis=-1) - 1
+        return {
+            "ann_return": mean,
+            "ann_vol": vol,
+            "sharpe": np.where(vol > 0, mean / vol, np.nan),
+            "max_drawdown": drawdown.min(axis=-1),
+            "turnover": turnover.mean(axis=-1),
+        }
+
+
+# Every combination of a {name: values} grid, in a fixed order
+def expand_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values))
+            for values in itertools.product(*grid.values())]
+
+
+# Per-worker views of the shared inputs, attached once per process
+_shared = {"handles": [], "inputs": {}, "signal": residual_signal,
+           "cost_bps": COST_BPS}
+
+
+def _init_worker(specs, signal, cost_bps):
+    _shared["signal"] = signal
+    _shared["cost_bps"] = cost_bps
+    for key, spec in specs.items():
+        shm, values = attach(spec)
+        _shared["handles"].append(shm)
+        _shared["inputs"][key] = values
+
+
+def _run_config(params):
+    return run_config(
+        _shared["inputs"], params, _shared["signal"], _shared["cost_bps"]
+    )
+
+
+# All configurations, each over the whole history. Configurations are
+# independent, so they go to a process pool that reads the inputs through
+# shared memory; only the daily P&L and turnover come back. Returns
+# (configs x days) arrays of net pnl and turnover.
+def sweep(inputs, configs, signal=residual_signal, cost_bps=COST_BPS,
+          workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(configs) == 1:
+        results = [run_config(inputs, p, signal, cost_bps) for p in configs]
+    else:
+        handles, specs = {}, {}
+        try:
+            for key, values in inputs.items():
+                handles[key], specs[key] = to_shared(
+                    np.ascontiguousarray(values)
+                )
+            with ProcessPoolExecutor(
+                workers, initializer=_init_worker,
+                initargs=(specs, signal, cost_bps),
+            ) as pool:
+                chunk = max(1, len(configs) // (workers * 4))
+                results = list(
+                    pool.map(_run_config, configs, chunksize=chunk)
+                )
+        finally:
+            for shm in handles.values():
+                shm.close()
+                shm.unlink()
+    pnl, turnover = zip(*results)
+    return np.vstack(pnl), np.vstack(turnover)
+
+
+# Rolling (train, test) row ranges: train on `train_days`, test on the
+# next `test_days`, then step forward by the test length
+def walk_forward_folds(n_dates, train_days=TRAIN_DAYS, test_days=TEST_DAYS):
+    return [
+        (lo, lo + train_days, min(lo + train_days + test_days, n_dates))
+        for lo in range(0, n_dates - train_days, test_days)
+    ]
+
+
+# Pick the best in-sample Sharpe per fold and score it out of sample.
+# Signals only use data through each day, so slicing the full-history
+# P&L matches rerunning each fold, apart from the position carried into
+# the fold's first day. Returns (fold table, out-of-sample pnl
+# and the configuration index used on each day, NaN/-1 before the first
+# test window).
+def walk_forward(pnl, turnover, folds):
+    oos = np.full(pnl.shape[1], np.nan)
+    chosen = np.full(pnl.shape[1], -1)
+    rows = []
+    for lo, mid, hi in folds:
+        train = summarize(pnl[:, lo:mid], turnover[:, lo:mid])
+        best = int(np.nanargmax(np.nan_to_num(train["sharpe"], nan=-np.inf)))
+        test = summarize(pnl[best, mid:hi], turnover[best, mid:hi])
+        oos[mid:hi] = pnl[best, mid:hi]
+        chosen[mid:hi] = best
+        rows.append({
+            "train_start": lo, "test_start": mid, "test_end": hi,
+            "config": best, "train_sharpe": train["sharpe"][best],
+            **{f"test_{k}": float(v) for k, v in test.items()},
+        })
+    return pd.DataFrame(rows), oos, chosen
+
+
+# GRID restricted to what a signal accepts: the portfolio keys always,
+# the signal keys only if they are parameters of `signal`
+def default_grid(signal):
+    params = inspect.signature(signal).parameters
+    takes_any = any(p.kind is p.VAR_KEYWORD for p in params.values())
+    return {
+        name: values for name, values in GRID.items()
+        if name in PORTFOLIO_KEYS or takes_any or name in params
+    }
+
+
+# "name=v1,v2,..." items -> grid; numbers are parsed as int or float
+def parse_grid(items):
+    grid = {}
+    for item in items:
+        name, values = item.split("=", 1)
+        grid[name] = [
+            int(v) if v.lstrip("-").isdigit() else float(v)
+            for v in values.split(",")
+        ]
+    return grid
+
+
+# "package.module:function" -> the signal function
+def load_signal(path):
+    module, name = path.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Sweep overlay configurations and walk forward."
+    )
+    parser.add_argument("--panel", default=str(PANEL_DIR))
+    parser.add_argument("--features", default=str(FEATURE_DIR))
+    parser.add_argument("--out", default=str(BACKTEST_DIR))
+    parser.add_argument("--signal", default="overlay.backtest:residual_signal",
+                        help="module:function returning dates x tickers")
+    parser.add_argument("--grid", nargs="*", default=[],
+                        help="name=v1,v2 overrides of the default grid")
+    parser.add_argument("--cost-bps", type=float, default=COST_BPS)
+    parser.add_argument("--train-days", type=int, default=TRAIN_DAYS)
+    parser.add_argument("--test-days", type=int, default=TEST_DAYS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    features = FeatureSet.load(args.features)
+    panel = Panel.load(args.panel, fields=["adjClose"])
+    if features.tickers != panel.tickers:
+        raise ValueError("Feature store and panel tickers differ; "
+                         "rebuild the features")
+    inputs = backtest_inputs(features, panel.mask)
+    signal = load_signal(args.signal)
+    configs = expand_grid({**default_grid(signal), **parse_grid(args.grid)})
+
+    pnl, turnover = sweep(inputs, configs, signal, args.cost_bps,
+                          args.workers)
+    dates = pd.DatetimeIndex(features.dates.astype("datetime64[D]"))
+    folds = walk_forward_folds(len(dates), args.train_days, args.test_days)
+    table, oos, chosen = walk_forward(pnl, turnover, folds)
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stats = pd.DataFrame(configs).assign(**summarize(pnl, turnover))
+    stats.rename_axis("config").to_csv(out_dir / "sweep.csv")
+    for col in ("train_start", "test_start", "test_end"):
+        table[col] = dates[np.minimum(table[col], len(dates) - 1)]
+    table.to_csv(out_dir / "walk_forward.csv", index=False)
+    pd.DataFrame(
+        {"pnl": oos, "config": chosen}, index=dates.rename("date")
+    ).to_csv(out_dir / "oos_pnl.csv")
+
+    print(f"Swept {len(configs)} configurations over {len(dates)} days "
+          f"-> {out_dir}")
+    tested = np.flatnonzero(chosen >= 0)
+    if len(tested):
+        total = summarize(oos[tested], turnover[chosen[tested], tested])
+        print(f"{len(folds)} walk-forward folds, out-of-sample Sharpe "
+              f"{total['sharpe']:.2f}")
+    else:
+        print("History shorter than one train window; no folds")
+
+
+if __name__ == "__main__":
+    main()
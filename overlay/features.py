@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_ingest.panel import BENCHMARK, PANEL_DIR, Panel
+from data_ingest.sectors import SECTOR_FILE, SectorTable, sector_matrix
+
+# Config
+FEATURE_DIR = Path("data/features/")
+FEATURE_VERSION = 2
+WINDOW = 63
+MIN_OBS = WINDOW * 2 // 3
+TRADING_DAYS = 252
+
+
+# Daily log returns of a (dates x tickers) price array; first row is NaN
+def log_returns(prices):
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(prices.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[1:] = np.log(prices[1:] / prices[:-1])
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+# Trailing-window sums along axis 0 via one cumulative sum:
+# out[t] = x[t - window + 1] + ... + x[t]
+def rolling_sum(x, window):
+    c = np.cumsum(x, axis=0)
+    out = c.copy()
+    out[window:] -= c[:-window]
+    return out
+
+
+# Rolling count, sums and cross-products over rows where x and y are both
+# present; y broadcasts against x
+def rolling_moments(x, y, window):
+    x, y = np.broadcast_arrays(x, y)
+    both = np.isfinite(x) & np.isfinite(y)
+    x = np.where(both, x, 0.0)
+    y = np.where(both, y, 0.0)
+    return (
+        rolling_sum(both.astype(np.float64), window),
+        rolling_sum(x, window),
+        rolling_sum(y, window),
+        rolling_sum(x * x, window),
+        rolling_sum(y * y, window),
+        rolling_sum(x * y, window),
+    )
+
+
+# Annualized rolling volatility (sample standard deviation)
+def rolling_vol(returns, window=WINDOW, min_obs=MIN_OBS):
+    n, sx, _, sxx, _, _ = rolling_moments(returns, returns, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (sxx - sx * sx / n) / (n - 1)
+    var = np.where(n >= min_obs, np.maximum(var, 0.0), np.nan)
+    return np.sqrt(var) * np.sqrt(TRADING_DAYS)
+
+
+# Rolling OLS beta of each column of `returns` on `market`
+def rolling_beta(returns, market, window=WINDOW, min_obs=MIN_OBS):
+    n, sx, sy, _, syy, sxy = rolling_moments(returns, market, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (sxy - sx * sy / n) / (syy - sy * sy / n)
+    return np.where(n >= min_obs, beta, np.nan)
+
+
+# Rolling correlation matrix of k return series: (dates, k, k)
+def rolling_corr(returns, window=WINDOW, min_obs=MIN_OBS):
+    x = returns[:, :, None]
+    y = returns[:, None, :]
+    n, sx, sy, sxx, syy, sxy = rolling_moments(x, y, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        corr = cov / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+    return np.where(n >= min_obs, corr, np.nan)
+
+
+# Column of each ticker's sector ETF, -1 if it is not a column. `sectors`
+# is one ETF per ticker or a (dates x tickers) array from the sector table.
+def sector_columns(tickers, sectors):
+    sectors = np.asarray(sectors, dtype=object)
+    col = pd.Index(tickers).get_indexer(sectors.ravel())
+    return col.reshape(sectors.shape)
+
+
+# All features for a block of prices, vectorized across tickers
+def compute_features(prices, tickers, sectors, window=WINDOW,
+                     min_obs=MIN_OBS):
+    returns = log_returns(prices)
+    col = {t: j for j, t in enumerate(tickers)}
+
+    sector_col = np.broadcast_to(
+        sector_columns(tickers, sectors), returns.shape
+    )
+    sector_etfs = sorted({tickers[j] for j in np.unique(sector_col) if j >= 0})
+    sector_returns = np.where(
+        sector_col >= 0,
+        np.take_along_axis(returns, np.maximum(sector_col, 0), axis=1),
+        np.nan,
+    )
+    bench = (
+        returns[:, [col[BENCHMARK]]] if BENCHMARK in col
+        else np.full((len(returns), 1), np.nan)
+    )
+
+    features = {
+        "returns": returns,
+        "vol": rolling_vol(returns, window, min_obs),
+        "beta_sector": rolling_beta(returns, sector_returns, window, min_obs),
+        "beta_spy": rolling_beta(returns, bench, window, min_obs),
+    }
+    features = {k: v.astype(np.float32) for k, v in features.items()}
+    features["sector_corr"] = rolling_corr(
+        returns[:, [col[s] for s in sector_etfs]], window, min_obs
+    ).astype(np.float32)
+    features["sector_col"] = sector_col.astype(np.int32)
+    return features, sector_etfs
+
+
+# Versioned feature arrays on disk, one memory-mappable .npy per feature
+class FeatureSet:
+    def __init__(self, dates, tickers, sector_etfs, arrays, window=WINDOW):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.sector_etfs = list(sector_etfs)
+        self.arrays = arrays
+        self.window = window
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    @staticmethod
+    def path(feature_dir=FEATURE_DIR):
+        return Path(feature_dir) / f"v{FEATURE_VERSION}"
+
+    def save(self, feature_dir=FEATURE_DIR):
+        out_dir = self.path(feature_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name, values in {"dates": self.dates, **self.arrays}.items():
+            tmp = out_dir / f".{name}.npy.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, values)
+            os.replace(tmp, out_dir / f"{name}.npy")
+        manifest = {
+            "version": FEATURE_VERSION,
+            "window": self.window,
+            "tickers": self.tickers,
+            "sector_etfs": self.sector_etfs,
+            "arrays": list(self.arrays),
+            "built_through": str(self.dates[-1].astype("datetime64[D]")),
+        }
+        (out_dir / "manifest.json").write_text(json.dumps(manifest))
+
+    @classmethod
+    def load(cls, feature_dir=FEATURE_DIR, mmap_mode="r"):
+        in_dir = cls.path(feature_dir)
+        manifest = json.loads((in_dir / "manifest.json").read_text())
+        return cls(
+            np.load(in_dir / "dates.npy"),
+            manifest["tickers"],
+            manifest["sector_etfs"],
+            {
+                name: np.load(in_dir / f"{name}.npy", mmap_mode=mmap_mode)
+                for name in manifest["arrays"]
+            },
+            manifest["window"],
+        )
+
+
+# Last panel row with any price, so not-yet-loaded days are not stored
+def last_priced_row(prices):
+    rows = np.flatnonzero(np.isfinite(prices).any(axis=1))
+    return rows[-1] + 1 if len(rows) else 0
+
+
+# Recompute only the rows after the stored history, plus the last
+# `window` stored rows as an overlap check. If their returns moved (the
+# price history was revised), any stored day's sector changed or the
+# universe changed, rebuild everything. `sectors` defaults to the panel's
+# static SectorETF per ticker. Returns the feature set and the number of
+# newly computed rows.
+def update_features(panel, old=None, window=WINDOW, min_obs=MIN_OBS,
+                    sectors=None):
+    prices = panel["adjClose"]
+    end = last_priced_row(prices)
+    dates = panel.dates[:end]
+    if sectors is None:
+        sectors = panel.sectors
+    sectors = np.asarray(sectors, dtype=object)
+    if sectors.ndim == 1:
+        sectors = np.broadcast_to(sectors, (len(panel.dates), len(sectors)))
+
+    n_old = 0
+    if (
+        old is not None
+        and old.window == window
+        and old.tickers == panel.tickers
+        and len(old.dates) <= end
+        and np.array_equal(old.dates, dates[:len(old.dates)])
+    ):
+        n_old = len(old.dates)
+
+    # One extra bar so the first overlap row has a return
+    start = max(n_old - window - 1, 0)
+    new, sector_etfs = compute_features(
+        prices[start:end], panel.tickers, sectors[start:end], window,
+        min_obs,
+    )
+    if n_old:
+        lo = max(n_old - window, start + 1)
+        same = sector_etfs == old.sector_etfs and np.allclose(
+            new["returns"][lo - start:n_old - start],
+            old["returns"][lo:n_old],
+            equal_nan=True, atol=1e-6,
+        )
+        if not same:
+            print("Price history changed; rebuilding all features")
+            return update_features(panel, None, window, min_obs, sectors)
+        if not np.array_equal(
+            old["sector_col"][:n_old],
+            sector_columns(panel.tickers, sectors[:n_old]),
+        ):
+            print("Sector history changed; rebuilding all features")
+            return update_features(panel, None, window, min_obs, sectors)
+
+        new = {
+            name: np.concatenate([old[name][:n_old], values[n_old - start:]])
+            for name, values in new.items()
+        }
+    features = FeatureSet(dates, panel.tickers, sector_etfs, new, window)
+    return features, end - n_old
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build or extend the return/risk feature store."
+    )
+    parser.add_argument("--panel", default=str(PANEL_DIR))
+    parser.add_argument("--out", default=str(FEATURE_DIR))
+    parser.add_argument("--sectors", default=str(SECTOR_FILE),
+                        help="Point-in-time sector table, if present")
+    parser.add_argument("--window", type=int, default=WINDOW)
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore stored features and rebuild")
+    args = parser.parse_args(argv)
+
+    panel = Panel.load(args.panel, fields=["adjClose"])
+    old = None
+    manifest = FeatureSet.path(args.out) / "manifest.json"
+    if not args.full and manifest.exists():
+        old = FeatureSet.load(args.out, mmap_mode=None)
+
+    # Sector ETF per day where the table covers it, else the panel's
+    sectors = None
+    if Path(args.sectors).exists():
+        sectors = sector_matrix(
+            SectorTable.load(args.sectors), panel.tickers, panel.dates,
+            panel.sectors,
+        )
+
+    min_obs = max(2, args.window * 2 // 3)
+    features, added = update_features(
+        panel, old, args.window, min_obs, sectors
+    )
+    if added == 0:
+        print("Features are up to date")
+        return
+    features.save(args.out)
+    print(
+        f"Computed {added} new rows; features through "
+        f"{features.dates[-1].astype('datetime64[D]')} for "
+        f"{len(features.tickers)} tickers -> {FeatureSet.path(args.out)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from data_ingest.sectors import ETF_MAP
+from overlay.features import FEATURE_DIR, FeatureSet
+
+# Config
+OVERLAY_DIR = Path("data/overlay/")
+SECTOR_LIMIT = 0.05
+BLOCK_ROWS = 256
+
+SECTOR_ETFS = list(ETF_MAP.values())
+
+
+# Stored sector ETF columns -> (ref, code): the column of each stock's
+# sector ETF and its sector (index into SECTOR_ETFS) per day, both -1 for
+# ETFs, the benchmark and days without a sector
+def sector_codes(tickers, sector_col):
+    etf_code = np.array([
+        SECTOR_ETFS.index(t) if t in SECTOR_ETFS else -1 for t in tickers
+    ])
+    stock = etf_code < 0
+    code = np.where(
+        (sector_col >= 0) & stock, etf_code[np.maximum(sector_col, 0)], -1
+    )
+    return np.where(code >= 0, sector_col, -1), code
+
+
+# Residuals, z-scores and limited weights for rows [lo, hi); ref and code
+# are per-day (dates x tickers) as from sector_codes(). Residuals use the
+# previous day's beta, so a row only depends on data through that day.
+# Weights are z / sum|z|, then each sector's net weight is pulled back
+# inside +-limit by shifting its names equally.
+def overlay_rows(returns, beta, ref, code, lo, hi, limit=SECTOR_LIMIT):
+    first = max(lo - 1, 0)
+    r = returns[first:hi].astype(np.float64)
+    b = beta[first:hi].astype(np.float64)
+    prev_beta = np.full_like(b, np.nan)
+    prev_beta[1:] = b[:-1]
+    ref = ref[first:hi]
+    r_sector = np.where(
+        ref >= 0, np.take_along_axis(r, np.maximum(ref, 0), axis=1), np.nan
+    )
+    drop = lo - first
+    residual = (r - prev_beta * r_sector)[drop:]
+    code = code[lo:hi]
+    residual[code < 0] = np.nan
+
+    zscore, weight = zscore_weights(residual)
+    exposure = cap_sectors(weight, code, limit)
+    return {
+        "residual": residual,
+        "zscore": zscore,
+        "weight": weight,
+        "exposure": exposure,
+    }
+
+
+# Per-row z-scores over the finite values (sample std) and weights
+# z / sum|z|; NaN where the value is missing or the row has fewer than
+# two values or no spread. Returns (zscore, weight).
+def zscore_weights(values):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = np.isfinite(values).sum(axis=1, keepdims=True)
+        mean = np.nansum(values, axis=1, keepdims=True) / n
+        std = np.sqrt(
+            np.nansum((values - mean) ** 2, axis=1, keepdims=True) / (n - 1)
+        )
+        zscore = np.where((n > 1) & (std > 0), (values - mean) / std,
+                          np.nan)
+        weight = zscore / np.nansum(np.abs(zscore), axis=1, keepdims=True)
+    weight[~np.isfinite(weight)] = np.nan
+    return zscore, weight
+
+
+# Pull each row's net weight per sector back inside +-limit by shifting
+# that sector's names equally, in place. Weights are NaN where not held
+# and must have code >= 0 elsewhere. Returns the net exposure per (row,
+# sector) after the cap, i.e. of the weights as left.
+def cap_sectors(weight, code, limit=SECTOR_LIMIT):
+    # Net weight per (row, sector) via one bincount over flat indices
+    n_rows, n_sectors = len(weight), len(SECTOR_ETFS)
+    ok = np.isfinite(weight)
+    flat = (np.arange(n_rows)[:, None] * n_sectors + code)[ok]
+    size = n_rows * n_sectors
+    exposure = np.bincount(flat, weight[ok], size).reshape(n_rows, -1)
+    count = np.bincount(flat, minlength=size).reshape(n_rows, -1)
+
+    excess = exposure - np.clip(exposure, -limit, limit)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = np.where(count > 0, excess / count, 0.0)
+    rows, cols = np.nonzero(ok)
+    weight[rows, cols] -= shift[rows, code[rows, cols]]
+    return exposure - excess
+
+
+# Arrays shared with pool workers by name instead of pickling
+def to_shared(values):
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    view = np.ndarray(values.shape, values.dtype, buffer=shm.buf)
+    view[:] = values
+    return shm, (shm.name, values.shape, values.dtype.str)
+
+
+def attach(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype, buffer=shm.buf)
+
+
+# Per-worker names of the shared arrays
+_shared = {"specs": {}, "limit": SECTOR_LIMIT}
+
+
+def _init_worker(specs, limit):
+    _shared["specs"] = specs
+    _shared["limit"] = limit
+
+
+# Copy of rows [lo, hi) of a shared array
+def _read_rows(spec, lo, hi):
+    shm, values = attach(spec)
+    try:
+        return values[lo:hi].copy()
+    finally:
+        del values
+        shm.close()
+
+
+def _write_rows(spec, lo, values):
+    shm, target = attach(spec)
+    try:
+        target[lo:lo + len(values)] = values
+    finally:
+        del target
+        shm.close()
+
+
+# One block from copies of its input rows (from lo - 1, for the previous
+# day's beta). The worker holds each shared array only while copying in
+# or out and closes it even when the block fails.
+def _run_block(lo, hi):
+    specs = _shared["specs"]
+    first = max(lo - 1, 0)
+    inputs = [
+        _read_rows(specs[key], first, hi)
+        for key in ("returns", "beta", "ref", "code")
+    ]
+    out = overlay_rows(*inputs, lo - first, hi - first, _shared["limit"])
+    for name, values in out.items():
+        _write_rows(specs[name], lo, values)
+    return hi - lo
+
+
+# Whole history in date blocks. Rows are independent given the inputs, so
+# blocks go to a process pool that reads the inputs and writes the outputs
+# through shared memory.
+def compute_overlay(returns, beta, ref, code, limit=SECTOR_LIMIT,
+                    workers=None, block_rows=BLOCK_ROWS):
+    n_dates, n_tickers = returns.shape
+    workers = workers or os.cpu_count() or 1
+    blocks = [
+        (lo, min(lo + block_rows, n_dates))
+        for lo in range(0, n_dates, block_rows)
+    ]
+    if workers == 1 or len(blocks) == 1:
+        return overlay_rows(returns, beta, ref, code, 0, n_dates, limit)
+
+    shapes = {
+        "residual": (n_dates, n_tickers),
+        "zscore": (n_dates, n_tickers),
+        "weight": (n_dates, n_tickers),
+        "exposure": (n_dates, len(SECTOR_ETFS)),
+    }
+    inputs = {
+        "returns": np.ascontiguousarray(returns),
+        "beta": np.ascontiguousarray(beta),
+        "ref": np.ascontiguousarray(ref),
+        "code": np.ascontiguousarray(code),
+    }
+    inputs.update(
+        (name, np.full(shape, np.nan)) for name, shape in shapes.items()
+    )
+    handles, specs = {}, {}
+    try:
+        for key, values in inputs.items():
+            handles[key], specs[key] = to_shared(values)
+        with ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(specs, limit)
+        ) as pool:
+            list(pool.map(_run_block, *zip(*blocks)))
+        return {
+            name: np.ndarray(shape, np.float64,
+                             buffer=handles[name].buf).copy()
+            for name, shape in shapes.items()
+        }
+    finally:
+        for shm in handles.values():
+            shm.close()
+            shm.unlink()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compute the sector-neutral risk overlay."
+    )
+    parser.add_argument("--features", default=str(FEATURE_DIR))
+    parser.add_argument("--out", default=str(OVERLAY_DIR))
+    parser.add_argument("--limit", type=float, default=SECTOR_LIMIT)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    features = FeatureSet.load(args.features)
+    ref, code = sector_codes(features.tickers, features["sector_col"])
+
+    out = compute_overlay(
+        features["returns"], features["beta_sector"], ref, code,
+        args.limit, args.workers,
+    )
+    out = {name: values.astype(np.float32) for name, values in out.items()}
+    overlay = FeatureSet(
+        features.dates, features.tickers, SECTOR_ETFS, out, features.window
+    )
+    overlay.save(args.out)
+    print(
+        f"Saved overlay for {len(features.dates)} dates x "
+        f"{int((code >= 0).any(axis=0).sum())} stocks -> "
+        f"{FeatureSet.path(args.out)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import hashlib
+import os
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_ingest.panel import BENCHMARK
+from overlay.features import (
+    FEATURE_DIR, MIN_OBS, TRADING_DAYS, WINDOW, FeatureSet
+)
+
+# Config
+STATE_FILE = Path("data/features/rolling_state.npz")
+LATEST_FILE = Path("data/features/rolling_latest.csv")
+
+
+# Sliding-window mean/variance/covariance of x against a reference series
+# y, one column per ticker. Each bar adds one observation and evicts the
+# one `window` bars back with Welford add/remove steps, so an update costs
+# O(1) per ticker whatever the window length. Pairs where either side is
+# NaN are skipped. Drawdown from the rolling peak of the cumulative
+# return uses one monotonic deque per ticker.
+class RollingEngine:
+    def __init__(self, tickers, window=WINDOW, min_obs=MIN_OBS):
+        k = len(tickers)
+        self.tickers = list(tickers)
+        self.window = window
+        self.min_obs = min_obs
+        self.bars = 0
+        self.last_date = None
+        self.fingerprint = ""
+
+        # Ring buffers of the last `window` pairs
+        self.buf_x = np.zeros((window, k))
+        self.buf_y = np.zeros((window, k))
+        self.buf_ok = np.zeros((window, k), dtype=bool)
+
+        # Running statistics
+        self.n = np.zeros(k)
+        self.mean_x = np.zeros(k)
+        self.mean_y = np.zeros(k)
+        self.m2_x = np.zeros(k)
+        self.m2_y = np.zeros(k)
+        self.c_xy = np.zeros(k)
+
+        # Cumulative log return and its rolling maximum
+        self.level = np.zeros(k)
+        self.peaks = [deque() for _ in range(k)]
+
+    def _add(self, x, y, ok):
+        n = self.n + ok
+        safe = np.where(n > 0, n, 1)
+        dx = np.where(ok, x - self.mean_x, 0.0)
+        dy = np.where(ok, y - self.mean_y, 0.0)
+        self.mean_x += dx / safe
+        self.mean_y += dy / safe
+        self.m2_x += dx * np.where(ok, x - self.mean_x, 0.0)
+        self.m2_y += dy * np.where(ok, y - self.mean_y, 0.0)
+        self.c_xy += dx * np.where(ok, y - self.mean_y, 0.0)
+        self.n = n
+
+    def _remove(self, x, y, ok):
+        n = self.n - ok
+        safe = np.where(n > 0, n, 1)
+        dx = np.where(ok, x - self.mean_x, 0.0)
+        dy = np.where(ok, y - self.mean_y, 0.0)
+        mean_x = self.mean_x - dx / safe
+        mean_y = self.mean_y - dy / safe
+        self.m2_x -= dx * np.where(ok, x - mean_x, 0.0)
+        self.m2_y -= dy * np.where(ok, y - mean_y, 0.0)
+        self.c_xy -= np.where(ok, x - mean_x, 0.0) * dy
+        empty = n == 0
+        self.mean_x = np.where(empty, 0.0, mean_x)
+        self.mean_y = np.where(empty, 0.0, mean_y)
+        self.m2_x[empty] = self.m2_y[empty] = self.c_xy[empty] = 0.0
+        self.n = n
+
+    # One bar of ticker returns x and reference returns y
+    def update(self, x, y, date=None):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        slot = self.bars % self.window
+        if self.bars >= self.window:
+            self._remove(
+                self.buf_x[slot], self.buf_y[slot], self.buf_ok[slot]
+            )
+
+        ok = np.isfinite(x) & np.isfinite(y)
+        self.buf_x[slot] = np.where(ok, x, 0.0)
+        self.buf_y[slot] = np.where(ok, y, 0.0)
+        self.buf_ok[slot] = ok
+        self._add(self.buf_x[slot], self.buf_y[slot], ok)
+
+        # Missing returns leave the price level unchanged
+        self.level += np.where(np.isfinite(x), x, 0.0)
+        oldest = self.bars - self.window
+        for j, peaks in enumerate(self.peaks):
+            value = self.level[j]
+            while peaks and peaks[-1][1] <= value:
+                peaks.pop()
+            peaks.append((self.bars, value))
+            if peaks[0][0] <= oldest:
+                peaks.popleft()
+
+        self.bars += 1
+        self.last_date = date
+
+    def _ready(self, values):
+        return np.where(self.n >= self.min_obs, values, np.nan)
+
+    def mean(self):
+        return self._ready(self.mean_x)
+
+    def var(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._ready(np.maximum(self.m2_x, 0.0) / (self.n - 1))
+
+    def std(self):
+        return np.sqrt(self.var())
+
+    def cov(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._ready(self.c_xy / (self.n - 1))
+
+    def beta(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._ready(self.c_xy / self.m2_y)
+
+    def corr(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self._ready(
+                self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+            )
+
+    # Current level relative to the highest level in the window, minus 1
+    def drawdown(self):
+        peak = np.array([p[0][1] if p else 0.0 for p in self.peaks])
+        return np.expm1(self.level - peak)
+
+    def snapshot(self):
+        return pd.DataFrame({
+            "Ticker": self.tickers,
+            "Mean": self.mean(),
+            "Vol": self.std() * np.sqrt(TRADING_DAYS),
+            "Beta": self.beta(),
+            "Corr": self.corr(),
+            "Drawdown": self.drawdown(),
+        })
+
+    # Only the last `window` bars matter, so seeding replays just those
+    @classmethod
+    def seed(cls, tickers, x, y, dates=None, window=WINDOW,
+             min_obs=MIN_OBS):
+        engine = cls(tickers, window, min_obs)
+        start = max(len(x) - window, 0)
+        for i in range(start, len(x)):
+            engine.update(x[i], y[i], None if dates is None else dates[i])
+        return engine
+
+    def save(self, state_file=STATE_FILE):
+        peaks = np.full((self.window, len(self.tickers), 2), np.nan)
+        for j, p in enumerate(self.peaks):
+            if p:
+                peaks[:len(p), j] = np.array(p)
+        state_file = Path(state_file)
+        tmp = state_file.with_name(f".{state_file.name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                tickers=np.array(self.tickers),
+                params=np.array([self.window, self.min_obs, self.bars]),
+                last_date=np.array(
+                    -1 if self.last_date is None else self.last_date
+                ),
+                fingerprint=np.array(self.fingerprint),
+                buf_x=self.buf_x, buf_y=self.buf_y, buf_ok=self.buf_ok,
+                n=self.n, mean_x=self.mean_x, mean_y=self.mean_y,
+                m2_x=self.m2_x, m2_y=self.m2_y, c_xy=self.c_xy,
+                level=self.level, peaks=peaks,
+            )
+        os.replace(tmp, state_file)
+
+    @classmethod
+    def load(cls, state_file=STATE_FILE):
+        with np.load(state_file) as state:
+            window, min_obs, bars = (int(v) for v in state["params"])
+            engine = cls(state["tickers"].tolist(), window, min_obs)
+            engine.bars = bars
+            last_date = int(state["last_date"])
+            engine.last_date = None if last_date < 0 else last_date
+            if "fingerprint" in state:
+                engine.fingerprint = str(state["fingerprint"])
+            for name in ("buf_x", "buf_y", "buf_ok", "n", "mean_x",
+                         "mean_y", "m2_x", "m2_y", "c_xy", "level"):
+                setattr(engine, name, state[name].copy())
+            for j, p in enumerate(state["peaks"].transpose(1, 0, 2)):
+                engine.peaks[j] = deque(
+                    (int(i), float(v)) for i, v in p if not np.isnan(i)
+                )
+        return engine
+
+
+# Ticker returns and their sector ETF's returns from the feature store,
+# following the stored day-by-day sector; tickers without a sector ETF
+# are paired with the benchmark
+def sector_pairs(features):
+    returns = features["returns"]
+    tickers = features.tickers
+    bench = tickers.index(BENCHMARK) if BENCHMARK in tickers else -1
+    ref = np.where(features["sector_col"] >= 0, features["sector_col"],
+                   bench)
+    y = np.where(
+        ref >= 0,
+        np.take_along_axis(returns, np.maximum(ref, 0), axis=1),
+        np.nan,
+    )
+    return returns, y
+
+
+# Digest of the `window` input rows ending before row `end`, the only
+# bars the engine's state depends on
+def window_fingerprint(x, y, end, window=WINDOW):
+    h = hashlib.blake2b(digest_size=16)
+    for values in (x, y):
+        block = np.asarray(values[max(end - window, 0):end], dtype=np.float64)
+        ok = np.isfinite(block)
+        h.update(ok.tobytes())
+        h.update(np.where(ok, block, 0.0).tobytes())
+    return h.hexdigest()
+
+
+# Saved state still valid for these inputs: its last bar present and the
+# window of bars it holds unchanged (a rebuilt feature store can revise
+# them)
+def state_matches(engine, x, y, dates):
+    if engine.last_date is None:
+        return False
+    end = int(np.searchsorted(dates, engine.last_date, side="right"))
+    if end == 0 or dates[end - 1] != engine.last_date:
+        return False
+    return engine.fingerprint == window_fingerprint(x, y, end, engine.window)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Advance the rolling risk engine with new bars."
+    )
+    parser.add_argument("--features", default=str(FEATURE_DIR))
+    parser.add_argument("--state", default=str(STATE_FILE))
+    parser.add_argument("--out", default=str(LATEST_FILE))
+    args = parser.parse_args(argv)
+
+    features = FeatureSet.load(args.features)
+    x, y = sector_pairs(features)
+    dates = features.dates
+
+    state_file = Path(args.state)
+    engine = None
+    if state_file.exists():
+        engine = RollingEngine.load(state_file)
+        if (engine.tickers != features.tickers
+                or not state_matches(engine, x, y, dates)):
+            print("Saved state does not match the features; reseeding")
+            engine = None
+    if engine is None:
+        engine = RollingEngine.seed(features.tickers, x, y, dates)
+        print(f"Seeded engine from {min(len(dates), engine.window)} bars")
+    else:
+        new = np.flatnonzero(dates > engine.last_date)
+        for i in new:
+            engine.update(x[i], y[i], dates[i])
+        print(f"Applied {len(new)} new bars")
+
+    engine.fingerprint = window_fingerprint(x, y, len(dates), engine.window)
+    engine.save(state_file)
+    engine.snapshot().to_csv(args.out, index=False)
+    print(f"Saved latest rolling metrics -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()